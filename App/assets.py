@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+# Built files are served from /static/<BUILD_PREFIX>/...
+BUILD_PREFIX = "dist"
+COMPRESSIBLE = {".css", ".js", ".html", ".svg", ".json", ".txt", ".map"}
+# Below this, compressed variants save less than their headers cost
+MIN_COMPRESS_BYTES = 256
+# Preferred first when the browser accepts both
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _brotli():
+    """The optional brotli package, or None: without it only gzip variants are built."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def build_assets(static_dir, build_dir):
+    """
+    Copy every file in static_dir to build_dir under a content-hashed name
+    (style.css -> style.3f2a9c1b7d0e.css), with .gz and, if brotli is
+    installed, .br variants of text files compressed at their highest
+    levels. Writes manifest.json mapping original names to hashed ones and
+    removes files left over from earlier builds. Returns build totals.
+    """
+    static_dir, build_dir = os.path.abspath(static_dir), os.path.abspath(build_dir)
+    brotli = _brotli()
+    manifest, keep = {}, {MANIFEST}
+    totals = {"files": 0, "bytes": 0, "gzip_bytes": 0, "br_bytes": 0}
+
+    def write(name, data):
+        path = os.path.join(build_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        keep.add(name)
+
+    for root, dirs, files in os.walk(static_dir):
+        # Don't fingerprint an earlier build kept inside the static folder
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != build_dir)
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, static_dir).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                data = f.read()
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{fingerprint(data)}{ext}"
+            write(hashed, data)
+            manifest[name] = hashed
+            totals["files"] += 1
+            totals["bytes"] += len(data)
+            if ext.lower() not in COMPRESSIBLE or len(data) < MIN_COMPRESS_BYTES:
+                continue
+            # mtime=0 keeps the .gz byte-identical between builds
+            variants = [("gzip", ".gz", gzip.compress(data, 9, mtime=0))]
+            if brotli is not None:
+                variants.append(("br", ".br", brotli.compress(data, quality=11)))
+            for encoding, suffix, compressed in variants:
+                if len(compressed) < len(data):
+                    write(hashed + suffix, compressed)
+                    totals[f"{encoding}_bytes"] += len(compressed)
+
+    for root, _, files in os.walk(build_dir):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if os.path.relpath(path, build_dir).replace(os.sep, "/") not in keep:
+                os.remove(path)
+    with open(os.path.join(build_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return totals
+
+
+def init_assets(app):
+    """
+    Serve the build in ASSETS_BUILD_DIR, if there is one. url_for('static',
+    filename='style.css') then resolves to the hashed name, which is sent
+    with Cache-Control: immutable for ASSETS_MAX_AGE (the name changes with
+    the content), pre-compressed when the browser accepts br or gzip.
+    Files missing from the build fall back to the plain static view.
+    """
+    build_dir = app.config["ASSETS_BUILD_DIR"] or os.path.join(app.static_folder, BUILD_PREFIX)
+    try:
+        with open(os.path.join(build_dir, MANIFEST)) as f:
+            manifest = {name: f"{BUILD_PREFIX}/{hashed}" for name, hashed in json.load(f).items()}
+    except FileNotFoundError:
+        logger.info("No asset build in %s; serving static files as they are", build_dir)
+        return False
+
+    # Which compressed variants exist, looked up once rather than per request
+    variants = {
+        url: [(encoding, suffix) for encoding, suffix in ENCODINGS
+              if os.path.exists(os.path.join(build_dir, url[len(BUILD_PREFIX) + 1:] + suffix))]
+        for url in manifest.values()
+    }
+    max_age = app.config["ASSETS_MAX_AGE"]
+    plain_static = app.view_functions["static"]
+
+    @app.url_defaults
+    def fingerprinted(endpoint, values):
+        if endpoint == "static":
+            hashed = manifest.get(values.get("filename"))
+            if hashed is not None:
+                values["filename"] = hashed
+
+    def static(filename):
+        if filename not in variants:
+            return plain_static(filename=filename)
+        name = filename[len(BUILD_PREFIX) + 1:]
+        encoding = next((e for e, _ in variants[filename] if request.accept_encodings[e]), None)
+        if encoding is None:
+            response = send_from_directory(build_dir, name, max_age=max_age)
+        else:
+            suffix = dict(ENCODINGS)[encoding]
+            response = send_from_directory(build_dir, name + suffix, max_age=max_age,
+                                           mimetype=mimetypes.guess_type(name)[0] or "application/octet-stream")
+            response.content_encoding = encoding
+        if variants[filename]:
+            response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions["static"] = static
+    app.extensions["assets"] = manifest
+    return True
@@ -0,0 +1,229 @@
+import logging
+import time
+import zlib
+from functools import wraps
+
+from flask import g, request
+
+from App.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = {
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "text/html", "text/plain", "text/css", "text/csv", "text/calendar", "text/javascript",
+    "text/event-stream", "image/svg+xml",
+}
+
+
+class _Gzip:
+    module = None
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    module = "brotli"
+
+    def __init__(self, level):
+        import brotli
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _Zstd:
+    module = "zstandard"
+
+    def __init__(self, level):
+        import zstandard
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+ENCODERS = {"gzip": _Gzip, "br": _Brotli, "zstd": _Zstd}
+
+
+def _installed(encoder):
+    if encoder.module is None:
+        return True
+    try:
+        __import__(encoder.module)
+    except ImportError:
+        return False
+    return True
+
+
+def available_encodings(preferred):
+    """The encodings in preferred whose (optional) packages are installed, in the same order."""
+    return [name for name in preferred if name in ENCODERS and _installed(ENCODERS[name])]
+
+
+def negotiate(accept, encodings):
+    """The encoding the client rates highest in Accept-Encoding, ties going to the earlier in encodings."""
+    best, best_quality = None, 0
+    for name in encodings:
+        quality = accept[name]
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compression(enabled=True, **levels):
+    """
+    Set a view's compression level per encoding, e.g. @compression(gzip=1,
+    br=1, zstd=1) for big or frequent responses where CPU matters more than
+    bytes, or turn compression off for it with @compression(False).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.compression = levels if enabled else None
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class CompressedStream:
+    """
+    A streamed body compressed chunk by chunk as it is sent. Event streams
+    are flushed after every chunk so each message reaches the browser
+    straight away; other streams let the compressor fill its window.
+    """
+
+    def __init__(self, chunks, encoder, flush_each, done):
+        self._chunks = chunks
+        self._encoder = encoder
+        self._flush_each = flush_each
+        self._done = done
+        self.size = self.compressed = 0
+        self.seconds = 0.0
+
+    def _timed(self, call, *args):
+        start = time.perf_counter()
+        out = call(*args)
+        self.seconds += time.perf_counter() - start
+        self.compressed += len(out)
+        return out
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            self.size += len(chunk)
+            out = self._timed(self._encoder.compress, chunk)
+            if self._flush_each:
+                out += self._timed(self._encoder.flush)
+            if out:
+                yield out
+        yield self._timed(self._encoder.finish)
+
+    def close(self):
+        if hasattr(self._chunks, "close"):
+            self._chunks.close()
+        if self._done is not None:
+            done, self._done = self._done, None
+            done(self.size, self.compressed, self.seconds)
+
+
+def init_compression(app):
+    """
+    Compress responses the client accepts zstd, br or gzip for: bodies of
+    COMPRESS_MIN_BYTES or more at once, streamed bodies as they are sent.
+    Levels come from COMPRESS_LEVELS, then the view's @compression, then
+    COMPRESS_ENDPOINT_LEVELS. Ratios and times are counted per endpoint in
+    the request metrics and logged at debug level.
+    """
+    encodings = available_encodings(app.config["COMPRESS_ENCODINGS"])
+    missing = [name for name in app.config["COMPRESS_ENCODINGS"] if name not in encodings]
+    if missing:
+        logger.info("Response compression without %s (package not installed)", ", ".join(missing))
+    defaults = app.config["COMPRESS_LEVELS"]
+    endpoint_levels = app.config["COMPRESS_ENDPOINT_LEVELS"]
+    min_size = app.config["COMPRESS_MIN_BYTES"]
+    metrics_enabled = app.config["METRICS_ENABLED"]
+
+    def _levels():
+        """This request's levels, or None when its endpoint isn't compressed."""
+        levels = g.get("compression", {})
+        configured = endpoint_levels.get(request.endpoint, {})
+        if levels is None or configured is None or configured is False:
+            return None
+        return {**defaults, **levels, **configured}
+
+    def _recorder(encoding):
+        endpoint = request.endpoint or "none"
+        metrics = get_metrics() if metrics_enabled else None
+
+        def record(size, compressed, seconds):
+            if metrics is not None:
+                metrics.observe_compression(endpoint, encoding, size, compressed, seconds)
+            logger.debug("%s: %s %d -> %d bytes (%.1fx) in %.2f ms", endpoint, encoding, size, compressed,
+                         size / compressed if compressed else 0, seconds * 1000)
+        return record
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            request.method == "HEAD"
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE
+            or response.cache_control.no_transform
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        levels = _levels()
+        encoding = negotiate(request.accept_encodings, encodings) if levels is not None else None
+        if encoding is None:
+            return response
+        encoder = ENCODERS[encoding]
+        if response.is_streamed:
+            response.response = CompressedStream(response.response, encoder(levels[encoding]),
+                                                 response.mimetype == "text/event-stream", _recorder(encoding))
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            start = time.perf_counter()
+            encoder = encoder(levels[encoding])
+            body = encoder.compress(data) + encoder.finish()
+            seconds = time.perf_counter() - start
+            if len(body) >= len(data):
+                return response
+            response.set_data(body)
+            _recorder(encoding)(len(data), len(body), seconds)
+        response.content_encoding = encoding
+        # The compressed bytes differ from the original's, so a strong ETag would be wrong
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
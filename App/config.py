@@ -15,5 +15,88 @@ def load_config(app, overrides):
     app.config["JWT_COOKIE_SECURE"] = False
     app.config["JWT_COOKIE_CSRF_PROTECT"] = False
     app.config['FLASK_ADMIN_SWATCH'] = 'darkly'
+    # Connection pool (ignored for in-memory SQLite)
+    app.config.setdefault('DB_POOL_SIZE', 10)
+    app.config.setdefault('DB_MAX_OVERFLOW', 20)
+    app.config.setdefault('DB_POOL_TIMEOUT', 10)
+    app.config.setdefault('DB_POOL_RECYCLE', 1800)
+    app.config.setdefault('DB_POOL_PRE_PING', True)
+    # SQLite profile: WAL and tuned pragmas on connect, optional group-commit writer
+    app.config.setdefault('SQLITE_TUNE', True)
+    app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config.setdefault('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+    app.config.setdefault('SQLITE_CACHE_SIZE', -64000)  # negative means KiB
+    app.config.setdefault('SQLITE_WRITE_QUEUE', False)
+    app.config.setdefault('SQLITE_WRITE_BATCH', 64)
+    app.config.setdefault('SQLITE_WRITE_DELAY_MS', 2)
+    # Read replicas for @read_only GET views; clients that just wrote stay on
+    # the primary for REPLICA_LAG_TOLERANCE seconds to read their own writes
+    app.config.setdefault('SQLALCHEMY_REPLICA_URIS', [])
+    app.config.setdefault('REPLICA_LAG_TOLERANCE', 5)
+    app.config.setdefault('PUSH_APP_CONTEXT', True)
+    # Request metrics; with METRICS_DIR set, workers share snapshots there
+    app.config.setdefault('METRICS_ENABLED', True)
+    app.config.setdefault('METRICS_DIR', None)
+    app.config.setdefault('METRICS_FLUSH_SECONDS', 1)
+    # Per-request query counting, on by default only under TESTING or DEBUG; it
+    # fingerprints every statement. Headers are always on in debug mode
+    app.config.setdefault('QUERY_PROFILE_ENABLED', None)
+    app.config.setdefault('QUERY_PROFILE_HEADERS', False)
+    app.config.setdefault('QUERY_N_PLUS_ONE_THRESHOLD', 5)
+    app.config.setdefault('QUERY_LOG_TOP', 3)
+    # Auto-populate captures: "cprofile", "tracemalloc" or both, comma separated;
+    # with PROFILE_ALLOW_HEADER a request can ask for them via X-Profile
+    app.config.setdefault('PROFILE_CAPTURE', '')
+    app.config.setdefault('PROFILE_ALLOW_HEADER', False)
+    app.config.setdefault('PROFILE_DIR', None)
+    app.config.setdefault('WARMUP_CONNECTIONS', 2)
+    # API-only workers can turn these off for a faster cold start
+    app.config.setdefault('ENABLE_ADMIN_UI', True)
+    app.config.setdefault('ENABLE_UPLOADS', True)
+    app.config.setdefault('ENABLE_CORS', True)
+    app.config.setdefault('STARTUP_PROFILE', False)
+    app.config.setdefault('USER_IMPORT_CHUNK_SIZE', 500)
+    app.config.setdefault('USER_IMPORT_WORKERS', None)
+    app.config.setdefault('IDENTITY_CACHE_TTL', 60)
+    app.config.setdefault('IDENTITY_CACHE_SIZE', 1024)
+    app.config.setdefault('TOKEN_REVOCATION_SYNC_SECONDS', 5)
+    app.config.setdefault('TOKEN_PRUNE_INTERVAL_SECONDS', 3600)
+    # add_shift rejects longer shifts, and ones closer than this to the staff member's others
+    app.config.setdefault('SHIFT_MAX_HOURS', 24)
+    app.config.setdefault('SHIFT_MIN_REST_HOURS', 0)
+    app.config.setdefault('SHIFT_IMPORT_CHUNK_SIZE', 1000)
+    # Staff calendar feeds: shifts starting in [today - past, today + future)
+    app.config.setdefault('CALENDAR_PAST_DAYS', 60)
+    app.config.setdefault('CALENDAR_FUTURE_DAYS', 180)
+    app.config.setdefault('CALENDAR_REFRESH_MINUTES', 60)
+    app.config.setdefault('CALENDAR_CACHE_SIZE', 512)
+    # Attendance reports for ended periods, reused until the next shift write
+    app.config.setdefault('ANALYTICS_CACHE_SIZE', 256)
+    # Roster event streams: each worker polls new events once per interval for all
+    # its open streams; a stream holds at most QUEUE_SIZE undelivered events, and events
+    # committed up to COMMIT_LAG_SECONDS after a higher id are still delivered. Requests
+    # that write prune events older than RETENTION_SECONDS, whether or not streams are open
+    app.config.setdefault('ROSTER_EVENTS_POLL_SECONDS', 1.0)
+    app.config.setdefault('ROSTER_EVENTS_QUEUE_SIZE', 50)
+    app.config.setdefault('ROSTER_EVENTS_COMMIT_LAG_SECONDS', 10)
+    app.config.setdefault('ROSTER_EVENTS_HEARTBEAT_SECONDS', 20)
+    app.config.setdefault('ROSTER_EVENTS_MAX_AGE_SECONDS', 3600)
+    app.config.setdefault('ROSTER_EVENTS_RETENTION_SECONDS', 6 * 3600)
+    app.config.setdefault('ROSTER_EVENT_BULK_LIMIT', 200)
+    # Static assets built by `flask assets build` (default: App/static/dist);
+    # hashed names never change content, so browsers may keep them a year
+    app.config.setdefault('ASSETS_ENABLED', True)
+    app.config.setdefault('ASSETS_BUILD_DIR', None)
+    app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)
+    # Response compression, best first; zstd and br need the zstandard and brotli
+    # packages. Levels per encoding, overridable per endpoint (or False to skip it)
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_ENCODINGS', ['zstd', 'br', 'gzip'])
+    app.config.setdefault('COMPRESS_MIN_BYTES', 1024)
+    app.config.setdefault('COMPRESS_LEVELS', {'zstd': 3, 'br': 4, 'gzip': 6})
+    app.config.setdefault('COMPRESS_ENDPOINT_LEVELS', {})
     for key in overrides:
-        app.config[key] = overrides[key]
\ No newline at end of file
+        app.config[key] = overrides[key]
+    if app.config['QUERY_PROFILE_ENABLED'] is None:
+        app.config['QUERY_PROFILE_ENABLED'] = bool(app.config.get('TESTING') or app.config.get('DEBUG'))
\ No newline at end of file
@@ -5,7 +5,9 @@ from .user import (
     get_user_by_username,
     get_all_users,
     get_all_users_json,
-    update_user
+    update_user,
+    bulk_import_users,
+    parse_user_records
 )
 
 # Authentication
@@ -13,6 +15,7 @@ from .auth import login, loginCLI, logout
 
 # Initialize database
 from .initialize import initialize
+from .seed import seed_organization
 
 # Staff actions
 from .staff import (
@@ -22,14 +25,43 @@ from .staff import (
     get_shift
 )
 
+# Calendar feeds
+from .calendar import issue_calendar_token, calendar_feed, touch_rosters
+
 # Admin schedule functions
 from .admin import (
     create_schedule,
     add_shift,
+    add_shifts,
+    clone_schedule,
     auto_populate_schedule,
-    get_schedule_report
+    get_schedule_report,
+    get_attendance_report,
+    get_schedule_conflicts,
+    list_schedule_versions,
+    snapshot_schedule,
+    diff_schedule_versions,
+    restore_schedule_version,
+    schedule_events,
+    export_payroll
 )
 
+# Bulk shift import
+from .shift_import import bulk_add_shifts, parse_shift_records
+
+# Shift conflict checks
+from .conflicts import ShiftConflictError, validate_shift, find_conflicts, schedule_conflicts
+
+# Roster change streams
+from .roster_events import publish, publish_resync, open_stream
+
+# Schedule versions
+from .versions import record_version, record_change, list_versions, diff_versions, restore_version
+
+# Attendance analytics
+from .analytics import attendance_summary
+from .payroll import payroll_rows, encode_payroll
+
 # Schedule controller (class)
 from .schedule_controller import ScheduleController
 
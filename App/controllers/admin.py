@@ -1,12 +1,18 @@
 from datetime import datetime
 from App.database import db
-from App.controllers.user import get_user
+from App.controllers.identity import resolve_identity
 from App.models.admin import Admin
 from App.controllers.schedule_controller import ScheduleController
+from App.controllers.analytics import attendance_summary
+from App.controllers.payroll import payroll_rows, encode_payroll
+from App.controllers.conflicts import schedule_conflicts
+from App.controllers.shift_import import bulk_add_shifts
+from App.controllers import versions
+from App.controllers.roster_events import open_stream
 
 def create_schedule(admin_id, schedule_name, user_id=None):
     """Allow an admin to create a new schedule."""
-    admin = get_user(admin_id)
+    admin = resolve_identity(admin_id)
     if not admin or admin.role != "admin":
         raise PermissionError("Only admins can create schedules")
 
@@ -14,15 +20,31 @@ def create_schedule(admin_id, schedule_name, user_id=None):
 
 def add_shift(admin_id, staff_id, schedule_id, start_time, end_time, shift_type="day"):
     """Allow an admin to manually add a shift."""
-    admin = get_user(admin_id)
+    admin = resolve_identity(admin_id)
     if not admin or admin.role != "admin":
         raise PermissionError("Only admins can schedule shifts")
 
     return ScheduleController.add_shift(schedule_id, staff_id, start_time, end_time, shift_type)
 
+def add_shifts(admin_id, records, chunk_size=1000):
+    """Allow an admin to add many shifts at once; bad records are reported per row."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can schedule shifts")
+
+    return bulk_add_shifts(records, chunk_size=chunk_size)
+
+def clone_schedule(admin_id, schedule_id, offset, name=None, keep_staff=True):
+    """Allow an admin to copy a schedule, moved by offset, e.g. to roll a week forward."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can clone schedules")
+
+    return ScheduleController.clone_schedule(schedule_id, offset, admin_id, name=name, keep_staff=keep_staff)
+
 def auto_populate_schedule(admin_id, schedule_id, strategy_name):
     """Allow an admin to auto-populate shifts using a strategy."""
-    admin = get_user(admin_id)
+    admin = resolve_identity(admin_id)
     if not admin or admin.role != "admin":
         raise PermissionError("Only admins can populate schedules")
 
@@ -30,8 +52,78 @@ def auto_populate_schedule(admin_id, schedule_id, strategy_name):
 
 def get_schedule_report(admin_id, schedule_id):
     """Allow an admin to view the schedule report."""
-    admin = get_user(admin_id)
+    admin = resolve_identity(admin_id)
     if not admin or admin.role != "admin":
         raise PermissionError("Only admins can view schedule reports")
 
     return ScheduleController.get_Schedule_report(schedule_id)
+
+
+def get_schedule_conflicts(admin_id, schedule_id, min_rest=None):
+    """Allow an admin to list overlapping or too-close shifts in a schedule."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can check schedules for conflicts")
+
+    return schedule_conflicts(schedule_id, min_rest)
+
+
+def list_schedule_versions(admin_id, schedule_id):
+    """Allow an admin to list the saved versions of a schedule."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can view schedule versions")
+
+    return versions.list_versions(schedule_id)
+
+def snapshot_schedule(admin_id, schedule_id, label=None):
+    """Allow an admin to save a schedule's current shifts as a version."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can save schedule versions")
+
+    return versions.snapshot_schedule(schedule_id, created_by=admin_id, label=label)
+
+def diff_schedule_versions(admin_id, schedule_id, old, new=None):
+    """Allow an admin to see what changed between two versions of a schedule."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can view schedule versions")
+
+    return versions.diff_versions(schedule_id, old, new)
+
+def restore_schedule_version(admin_id, schedule_id, number):
+    """Allow an admin to put a schedule back to an earlier version."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can restore schedule versions")
+
+    return versions.restore_version(schedule_id, number, created_by=admin_id)
+
+
+def schedule_events(admin_id, schedule_id, last_event_id=None):
+    """Allow an admin to follow changes to a schedule's shifts as they happen."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can follow schedule changes")
+
+    return open_stream(("schedule", schedule_id), last_event_id)
+
+
+def get_attendance_report(admin_id, group_by="staff", start=None, end=None, schedule_id=None, staff_id=None):
+    """Allow an admin to view attendance analytics."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can view attendance reports")
+
+    return attendance_summary(group_by, start, end, schedule_id, staff_id)
+
+
+def export_payroll(admin_id, fmt="csv", period="week", start=None, end=None, schedule_id=None, staff_id=None):
+    """Allow an admin to export payroll hours; returns the encoded export as a stream of text chunks."""
+    admin = resolve_identity(admin_id)
+    if not admin or admin.role != "admin":
+        raise PermissionError("Only admins can export payroll")
+
+    rows = payroll_rows(start, end, period, staff_id=staff_id, schedule_id=schedule_id)
+    return encode_payroll(rows, fmt)
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
+from sqlalchemy import case, func
+from flask import current_app
+
+from App.database import db
+from App.models import RosterEvent, Shift, User
+
+GROUP_BY_OPTIONS = {"staff", "schedule", "day"}
+
+
+def minutes_between(start, end):
+    """SQL expression for the minutes elapsed between two datetime columns."""
+    if db.session.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 1440.0
+    return func.extract("epoch", end - start) / 60.0
+
+
+def _group_columns(group_by):
+    """Return the (key, label) columns used to group the attendance query."""
+    if group_by == "staff":
+        return Shift.staff_id, User.username
+    if group_by == "schedule":
+        return Shift.schedule_id, Shift.schedule_id
+    return func.date(Shift.start_time), func.date(Shift.start_time)
+
+
+class AttendanceCache:
+    """
+    LRU of report arguments -> (generation, report) for periods that have
+    ended. The generation is the latest roster event id: every shift write
+    publishes an event, so a report is only reused while no shift has been
+    added, changed, clocked or removed since, by any worker.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, generation, report):
+        with self._lock:
+            self._entries[key] = (generation, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def _cache():
+    cache = current_app.extensions.get("attendance_cache")
+    if cache is None:
+        cache = current_app.extensions["attendance_cache"] = AttendanceCache(
+            current_app.config["ANALYTICS_CACHE_SIZE"])
+    return cache
+
+
+def _generation():
+    return db.session.scalar(db.select(func.max(RosterEvent.id)))
+
+
+def attendance_summary(group_by="staff", start=None, end=None, schedule_id=None, staff_id=None):
+    """
+    Lateness, no-show, early leave and overtime figures for shifts starting
+    in [start, end), computed in a single GROUP BY query.
+    Reports for periods that have already ended are cached until the next
+    shift write.
+    """
+    if group_by not in GROUP_BY_OPTIONS:
+        raise ValueError(f"group_by must be one of {sorted(GROUP_BY_OPTIONS)}")
+    if start and end and end <= start:
+        raise ValueError("end must be after start")
+
+    now = datetime.now()
+    cache_key = (group_by, start, end, schedule_id, staff_id)
+    closed = end is not None and end <= now
+    if closed:
+        generation = _generation()
+        report = _cache().get(cache_key, generation)
+        if report is not None:
+            return report
+
+    key, label = _group_columns(group_by)
+    late_minutes = minutes_between(Shift.start_time, Shift.clock_in)
+    scheduled_minutes = minutes_between(Shift.start_time, Shift.end_time)
+    worked_minutes = minutes_between(Shift.clock_in, Shift.clock_out)
+
+    is_late = Shift.clock_in > Shift.start_time
+    is_no_show = (Shift.clock_in.is_(None)) & (Shift.end_time < now)
+    is_early_leave = Shift.clock_out < Shift.end_time
+    overtime = case(
+        (worked_minutes > scheduled_minutes, worked_minutes - scheduled_minutes),
+        else_=0,
+    )
+
+    query = (
+        db.select(
+            key.label("key"),
+            label.label("label"),
+            func.count(Shift.id).label("shifts"),
+            func.count(Shift.clock_in).label("attended"),
+            func.sum(case((is_late, 1), else_=0)).label("late"),
+            func.avg(case((is_late, late_minutes))).label("avg_minutes_late"),
+            func.sum(case((is_no_show, 1), else_=0)).label("no_shows"),
+            func.sum(case((is_early_leave, 1), else_=0)).label("early_leaves"),
+            func.coalesce(func.sum(overtime), 0).label("overtime_minutes"),
+        )
+        .group_by(key, label)
+        .order_by(key)
+    )
+    # Open shifts (no staff member yet) count towards schedule and day totals;
+    # per staff member there is no one to attribute them to
+    if group_by == "staff":
+        query = query.join(User, User.id == Shift.staff_id)
+    else:
+        query = query.outerjoin(User, User.id == Shift.staff_id)
+    if start:
+        query = query.where(Shift.start_time >= start)
+    if end:
+        query = query.where(Shift.start_time < end)
+    if schedule_id:
+        query = query.where(Shift.schedule_id == schedule_id)
+    if staff_id:
+        query = query.where(Shift.staff_id == staff_id)
+
+    rows = []
+    for row in db.session.execute(query):
+        rows.append({
+            group_by: str(row.key) if group_by == "day" else row.key,
+            "label": str(row.label) if group_by == "day" else row.label,
+            "shifts": row.shifts,
+            "attended": row.attended,
+            "late": row.late,
+            "lateness_rate": round(row.late / row.attended, 4) if row.attended else 0.0,
+            "avg_minutes_late": round(row.avg_minutes_late or 0.0, 2),
+            "no_shows": row.no_shows,
+            "early_leaves": row.early_leaves,
+            "overtime_minutes": round(row.overtime_minutes, 2),
+        })
+
+    report = {
+        "group_by": group_by,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "rows": rows,
+    }
+    if closed:
+        _cache().put(cache_key, generation, report)
+    return report
@@ -1,10 +1,13 @@
 from flask import jsonify
 from flask_jwt_extended import (
     create_access_token, jwt_required, JWTManager,
-    get_jwt_identity, set_access_cookies, verify_jwt_in_request
+    get_jwt_identity, set_access_cookies, verify_jwt_in_request,
+    get_current_user
 )
 from App.models import User, user
 from App.database import db
+from App.controllers.identity import resolve_identity
+from App.controllers.token_store import issue_token, is_token_revoked, revoke_user_tokens
 
 def _get_user_by_username(username):
     """Fetch a user object by username."""
@@ -14,24 +17,15 @@ def _get_user_by_username(username):
 def login(username, password):
     user = _get_user_by_username(username)
     if user and user.check_password(password):
-        token = create_access_token(identity=user)
-        return token
+        return issue_token(user)
     return None
 
 def loginCLI(username, password):
     user = _get_user_by_username(username)
 
     if user and user.check_password(password):
-
-        # Return existing token if already logged in
-        if user.active_token:
-            return {"message": "User already logged in", "token": user.active_token}
-
-        # Generate new token
-        token = create_access_token(identity=str(user.id))
-        user.active_token = token
-        db.session.commit()
-
+        # Each login is its own session, so other devices stay logged in
+        token = issue_token(user)
         return {"message": "Login successful", "token": token}
 
     return {"message": "Invalid username or password"}
@@ -43,12 +37,9 @@ def logout(username):
     if not user:
         return {"message": "User not found"}
 
-    if not user.active_token:
+    if not revoke_user_tokens(user.id):
         return {"message": f"User '{username}' is not logged in"}
 
-    user.active_token = None
-    db.session.commit()
-
     return {"message": f"User '{username}' logged out successfully"}
 
 
@@ -61,14 +52,16 @@ def setup_jwt(app):
         user_id = getattr(identity, "id", identity)
         return str(user_id) if user_id is not None else None
 
-    # Automatically load user from JWT on request
+    # Revoked tokens are checked against an in-memory set, not a query
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(_jwt_header, jwt_data):
+        return is_token_revoked(jwt_data.get("jti"))
+
+    # Automatically resolve the user from JWT on request; shares the
+    # request-scoped identity with inject_user and the role checks
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
-        identity = jwt_data.get("sub")
-        try:
-            return db.session.get(User, int(identity))
-        except (TypeError, ValueError):
-            return None
+        return resolve_identity(jwt_data.get("sub"))
 
     return jwt
 
@@ -76,14 +69,8 @@ def add_auth_context(app):
     @app.context_processor
     def inject_user():
         try:
-            verify_jwt_in_request()
-            identity = get_jwt_identity()
-            user_id = int(identity) if identity is not None else None
-
-            current_user = (
-                db.session.get(User, user_id)
-                if user_id is not None else None
-            )
+            verify_jwt_in_request(optional=True)
+            current_user = get_current_user()
 
             is_authenticated = current_user is not None
 
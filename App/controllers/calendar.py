@@ -0,0 +1,227 @@
+import hashlib
+import secrets
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from threading import Lock
+
+from flask import current_app, request
+from sqlalchemy import Select, event, inspect
+from sqlalchemy.orm import Session
+
+from App.database import db
+from App.models import Schedule, Shift, Staff, User
+from App.controllers.staff import _assert_staff
+
+# Shift columns that show up in a calendar event
+CALENDAR_FIELDS = ("staff_id", "schedule_id", "start_time", "end_time", "type")
+PRODID = "-//AgileMinds//Roster//EN"
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class CalendarCache:
+    """LRU of staff id -> (etag, body) for rendered calendar feeds."""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, staff_id, etag):
+        with self._lock:
+            entry = self._entries.get(staff_id)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(staff_id)
+            return entry[1]
+
+    def put(self, staff_id, etag, body):
+        with self._lock:
+            self._entries[staff_id] = (etag, body)
+            self._entries.move_to_end(staff_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def _cache():
+    cache = current_app.extensions.get("calendar_cache")
+    if cache is None:
+        cache = current_app.extensions["calendar_cache"] = CalendarCache(current_app.config["CALENDAR_CACHE_SIZE"])
+    return cache
+
+
+def issue_calendar_token(staff_id):
+    """
+    Give a staff member a new calendar feed secret, replacing any earlier one.
+    Only its hash is stored, so the returned token cannot be shown again.
+    """
+    _assert_staff(staff_id)
+    token = secrets.token_urlsafe(24)
+    db.session.execute(
+        db.update(Staff.__table__)
+        .where(Staff.__table__.c.id == staff_id)
+        .values(calendar_token_hash=_hash_token(token),
+                roster_changed_at=db.func.coalesce(Staff.__table__.c.roster_changed_at, _utcnow()))
+    )
+    db.session.commit()
+    return token
+
+
+def touch_rosters(staff_ids, connection=None):
+    """
+    Mark the calendar feeds of these staff as changed. Writes that go around
+    the ORM (bulk or Core UPDATEs of shift rows) must call this themselves.
+    staff_ids may also be a SELECT of ids, so the set never leaves the database.
+    """
+    if isinstance(staff_ids, Select):
+        condition = Staff.__table__.c.id.in_(staff_ids)
+    else:
+        staff_ids = {staff_id for staff_id in staff_ids if staff_id is not None}
+        if not staff_ids:
+            return
+        condition = Staff.__table__.c.id.in_(sorted(staff_ids))
+    statement = db.update(Staff.__table__).where(condition).values(roster_changed_at=_utcnow())
+    (connection or db.session).execute(statement)
+
+
+def calendar_window(today=None):
+    """The [start, end) range of shift start times a feed covers."""
+    today = today or date.today()
+    start = datetime.combine(today - timedelta(days=current_app.config["CALENDAR_PAST_DAYS"]), datetime.min.time())
+    end = datetime.combine(today + timedelta(days=current_app.config["CALENDAR_FUTURE_DAYS"]), datetime.min.time())
+    return start, end
+
+
+def _escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _fold(line):
+    """Split content lines longer than 75 octets as RFC 5545 requires."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts, current = [], b""
+    for char in line:
+        piece = char.encode()
+        if len(current) + len(piece) > (75 if not parts else 74):
+            parts.append(current.decode())
+            current = b""
+        current += piece
+    parts.append(current.decode())
+    return "\r\n ".join(parts)
+
+
+def _ical_time(value):
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def render_calendar(staff_id, username, changed_at, window, host):
+    """
+    Build the feed for the staff member's shifts starting inside `window`,
+    from a projection over the (staff_id, start_time) index, so years of
+    history are never loaded.
+    """
+    rows = db.session.execute(
+        db.select(Shift.id, Shift.start_time, Shift.end_time, Shift.type, Schedule.name)
+        .outerjoin(Schedule, Schedule.id == Shift.schedule_id)
+        .where(Shift.staff_id == staff_id, Shift.start_time >= window[0], Shift.start_time < window[1])
+        .order_by(Shift.start_time)
+    )
+    stamp = changed_at.strftime("%Y%m%dT%H%M%SZ")
+    refresh = f"PT{current_app.config['CALENDAR_REFRESH_MINUTES']}M"
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(username)} shifts",
+        f"REFRESH-INTERVAL;VALUE=DURATION:{refresh}",
+        f"X-PUBLISHED-TTL:{refresh}",
+    ]
+    for shift_id, start_time, end_time, kind, schedule_name in rows:
+        summary = f"{(kind or 'day').capitalize()} shift"
+        if schedule_name:
+            summary += f" ({schedule_name})"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:shift-{shift_id}@{host}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_ical_time(start_time)}",
+            f"DTEND:{_ical_time(end_time)}",
+            f"SUMMARY:{_escape(summary)}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+def calendar_feed(token):
+    """
+    Resolve a feed token to (etag, last_modified, render) or None when the
+    token is unknown. `render()` returns the body, from the cache while the
+    staff member's shifts and the feed window are unchanged.
+    """
+    row = db.session.execute(
+        db.select(Staff.__table__.c.id, Staff.__table__.c.roster_changed_at, User.username)
+        .join(User.__table__, User.__table__.c.id == Staff.__table__.c.id)
+        .where(Staff.__table__.c.calendar_token_hash == _hash_token(token))
+    ).first()
+    if row is None:
+        return None
+    staff_id, changed_at, username = row
+    changed_at = changed_at or datetime(1970, 1, 1)
+    today = date.today()
+    etag = f"{staff_id}-{changed_at:%Y%m%d%H%M%S%f}-{today:%Y%m%d}"
+
+    def render():
+        cache = _cache()
+        body = cache.get(staff_id, etag)
+        if body is None:
+            body = render_calendar(staff_id, username, changed_at, calendar_window(today), request.host)
+            cache.put(staff_id, etag, body)
+        return body
+
+    return etag, changed_at.replace(tzinfo=timezone.utc), render
+
+
+def _attribute_changes(target, name):
+    history = inspect(target).attrs[name].history
+    return history.added, history.deleted
+
+
+@event.listens_for(Session, "after_flush")
+def _touch_changed_rosters(session, flush_context):
+    """Bump roster_changed_at for the staff whose calendar a flush changed."""
+    staff_ids, schedule_ids = set(), set()
+    for shift in session.new | session.deleted:
+        if isinstance(shift, Shift):
+            staff_ids.add(shift.staff_id)
+    for target in session.dirty:
+        if isinstance(target, Shift):
+            for name in CALENDAR_FIELDS:
+                added, deleted = _attribute_changes(target, name)
+                if added or deleted:
+                    staff_ids.add(target.staff_id)
+                    if name == "staff_id":
+                        staff_ids.update(deleted)
+        elif isinstance(target, Schedule) and target.id is not None:
+            added, deleted = _attribute_changes(target, "name")
+            if added or deleted:
+                schedule_ids.add(target.id)
+    staff_ids.discard(None)
+    if not staff_ids and not schedule_ids:
+        return
+    connection = session.connection()
+    if schedule_ids:
+        staff_ids.update(connection.execute(
+            db.select(Shift.staff_id).where(Shift.schedule_id.in_(schedule_ids)).distinct()
+        ).scalars())
+    touch_rosters(staff_ids, connection)
@@ -0,0 +1,125 @@
+import heapq
+from collections import namedtuple
+from datetime import timedelta
+
+from flask import current_app
+
+from App.database import db
+from App.models import Shift
+
+# The columns conflict checks need, in sweep order
+Interval = namedtuple("Interval", ["id", "staff_id", "schedule_id", "start_time", "end_time"])
+
+_INTERVAL_COLUMNS = (Shift.id, Shift.staff_id, Shift.schedule_id, Shift.start_time, Shift.end_time)
+
+
+class ShiftConflictError(ValueError):
+    """A shift overlaps, or leaves too little rest around, the staff member's other shifts."""
+
+    def __init__(self, message, conflicts):
+        super().__init__(message)
+        self.conflicts = conflicts
+
+
+def wall_clock(value):
+    """Shift times are naive wall-clock times: drop the UTC offset of an aware datetime."""
+    return value.replace(tzinfo=None) if value.tzinfo is not None else value
+
+
+def _min_rest(min_rest):
+    if min_rest is None:
+        min_rest = timedelta(hours=current_app.config["SHIFT_MIN_REST_HOURS"])
+    return min_rest
+
+
+def _describe(staff_id, shift_id, other, start_time, end_time, min_rest):
+    """A conflict between a shift and `other`: an overlap, or a gap shorter than min_rest."""
+    if other.start_time < end_time and other.end_time > start_time:
+        overlap = min(end_time, other.end_time) - max(start_time, other.start_time)
+        kind, minutes = "overlap", overlap.total_seconds() / 60
+    else:
+        gap = other.start_time - end_time if other.start_time >= end_time else start_time - other.end_time
+        kind, minutes = "rest", gap.total_seconds() / 60
+    return {
+        "staff_id": staff_id,
+        "shift_id": shift_id,
+        "other_shift_id": other.id,
+        "kind": kind,
+        "minutes": round(minutes, 2),
+        "min_rest_minutes": round(min_rest.total_seconds() / 60, 2),
+    }
+
+
+def validate_shift(staff_id, start_time, end_time, min_rest=None, exclude_id=None):
+    """
+    Check a new shift for staff_id before it is written: the range must be
+    positive and no longer than SHIFT_MAX_HOURS, and must not come within
+    min_rest (SHIFT_MIN_REST_HOURS by default) of the staff member's other
+    shifts. Raises ValueError, or ShiftConflictError listing the clashes.
+
+    Clashes come from one range query on the (staff_id, start_time) index.
+    Stored shifts may be longer than SHIFT_MAX_HOURS (seeded rows, or the
+    limit lowered since), so start_time is only bounded above.
+    """
+    if end_time <= start_time:
+        raise ValueError("end_time must be after start_time")
+    max_length = timedelta(hours=current_app.config["SHIFT_MAX_HOURS"])
+    if end_time - start_time > max_length:
+        raise ValueError(f"Shifts can be at most {current_app.config['SHIFT_MAX_HOURS']} hours long")
+    min_rest = _min_rest(min_rest)
+
+    window_start, window_end = start_time - min_rest, end_time + min_rest
+    query = db.select(*_INTERVAL_COLUMNS).where(
+        Shift.staff_id == staff_id,
+        Shift.start_time < window_end,
+        Shift.end_time > window_start,
+    ).order_by(Shift.start_time)
+    if exclude_id is not None:
+        query = query.where(Shift.id != exclude_id)
+    clashes = [Interval(*row) for row in db.session.execute(query)]
+    if clashes:
+        conflicts = [_describe(staff_id, None, other, start_time, end_time, min_rest) for other in clashes]
+        raise ShiftConflictError(f"Shift conflicts with {len(conflicts)} other shift(s) of staff {staff_id}", conflicts)
+
+
+def find_conflicts(intervals, min_rest=timedelta(0), schedule_id=None):
+    """
+    Every pair of one staff member's intervals that overlap or are less than
+    min_rest apart, by sort and sweep: O(n log n + conflicts). With
+    schedule_id, only pairs involving a shift of that schedule are reported.
+    """
+    conflicts = []
+    active = []  # (end_time + min_rest, sequence, interval) for the current staff member
+    current_staff = None
+    for seq, shift in enumerate(sorted(intervals, key=lambda i: (i.staff_id, i.start_time, i.id))):
+        if shift.staff_id != current_staff:
+            current_staff, active = shift.staff_id, []
+        while active and active[0][0] <= shift.start_time:
+            heapq.heappop(active)
+        for _, _, other in active:
+            if schedule_id is None or schedule_id in (shift.schedule_id, other.schedule_id):
+                conflicts.append(_describe(shift.staff_id, shift.id, other, shift.start_time, shift.end_time, min_rest))
+        heapq.heappush(active, (shift.end_time + min_rest, seq, shift))
+    return conflicts
+
+
+def schedule_conflicts(schedule_id, min_rest=None):
+    """
+    Conflicts involving a schedule's shifts, including clashes with the same
+    staff members' shifts in other schedules over the schedule's time span.
+    """
+    min_rest = _min_rest(min_rest)
+    span = db.session.execute(
+        db.select(db.func.min(Shift.start_time), db.func.max(Shift.end_time)).where(Shift.schedule_id == schedule_id)
+    ).first()
+    if span is None or span[0] is None:
+        return []
+    staff_ids = db.select(Shift.staff_id).where(Shift.schedule_id == schedule_id).distinct()
+    rows = db.session.execute(
+        db.select(*_INTERVAL_COLUMNS).where(
+            Shift.staff_id.in_(staff_ids),
+            Shift.start_time < span[1] + min_rest,
+            Shift.end_time > span[0] - min_rest,
+        )
+    )
+    return find_conflicts((Interval(*row) for row in rows), min_rest, schedule_id)
@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event
+
+from App.database import db
+from App.models import User
+
+# Lightweight stand-in for the User row: enough for role checks and templates
+Identity = namedtuple("Identity", ["id", "role", "username"])
+
+DEFAULT_TTL = 60
+DEFAULT_SIZE = 1024
+
+
+class IdentityCache:
+    """Small TTL'd LRU of user id -> Identity shared across requests."""
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            identity, expires = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return identity
+
+    def put(self, identity):
+        with self._lock:
+            self._entries[identity.id] = (identity, time.monotonic() + self.ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+def _cache():
+    cache = current_app.extensions.get("identity_cache")
+    if cache is None:
+        cache = current_app.extensions["identity_cache"] = IdentityCache(
+            current_app.config.get("IDENTITY_CACHE_TTL", DEFAULT_TTL),
+            current_app.config.get("IDENTITY_CACHE_SIZE", DEFAULT_SIZE),
+        )
+    return cache
+
+
+def _request_identities():
+    if not has_request_context():
+        return None
+    if "_identities" not in g:
+        g._identities = {}
+    return g._identities
+
+
+def resolve_identity(user_id):
+    """
+    Resolve a user id to an Identity, at most once per request and, across
+    requests, from the TTL cache before falling back to a single column query.
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    scoped = _request_identities()
+    if scoped is not None and user_id in scoped:
+        return scoped[user_id]
+
+    cache = _cache()
+    identity = cache.get(user_id)
+    if identity is None:
+        row = db.session.execute(
+            db.select(User.id, User.role, User.username).where(User.id == user_id)
+        ).first()
+        identity = Identity(*row) if row else None
+        if identity:
+            cache.put(identity)
+
+    if scoped is not None:
+        scoped[user_id] = identity
+    return identity
+
+
+def invalidate_identity(user_id=None):
+    """Drop a cached identity (or all of them when no id is given)."""
+    if not has_app_context():
+        return
+    _cache().invalidate(user_id)
+    scoped = _request_identities()
+    if scoped is not None:
+        if user_id is None:
+            scoped.clear()
+        else:
+            scoped.pop(user_id, None)
+
+
+@event.listens_for(User, "after_insert", propagate=True)
+@event.listens_for(User, "after_update", propagate=True)
+@event.listens_for(User, "after_delete", propagate=True)
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_identity(target.id)
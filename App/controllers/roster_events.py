@@ -0,0 +1,388 @@
+import json
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, g
+from sqlalchemy import Select, event, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from App.database import db
+from App.models import RosterEvent, Shift
+
+logger = logging.getLogger(__name__)
+
+# One shift change, as written by publish()
+Change = namedtuple("Change", ["kind", "shift_id", "schedule_id", "staff_id", "old_staff_id"], defaults=(None,))
+
+# Kinds whose message carries the shift as it is now
+_WITH_SHIFT = ("added", "reassigned", "changed", "clocked")
+_SHIFT_COLUMNS = (Shift.id, Shift.staff_id, Shift.schedule_id, Shift.type,
+                  Shift.start_time, Shift.end_time, Shift.clock_in, Shift.clock_out)
+_TIME_FIELDS = ("start_time", "end_time", "type")
+_CLOCK_FIELDS = ("clock_in", "clock_out")
+_BATCH = 1000
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def publish(changes, connection=None):
+    """
+    Record shift changes for the roster streams, on the caller's transaction
+    (so they are only seen once it commits). A write that changes more than
+    ROSTER_EVENT_BULK_LIMIT shifts records one resync per staff member and
+    schedule instead, and their views reload. Single changes don't read the
+    config, so they can be published from the SQLite writer thread.
+    """
+    changes = [c for c in changes if (c.staff_id, c.old_staff_id, c.schedule_id) != (None, None, None)]
+    if not changes:
+        return
+    now = _utcnow()
+    if len(changes) > 1 and len(changes) > current_app.config["ROSTER_EVENT_BULK_LIMIT"]:
+        staff_ids = {s for c in changes for s in (c.staff_id, c.old_staff_id) if s is not None}
+        rows = [{"kind": "resync", "staff_id": s, "created_at": now} for s in sorted(staff_ids)]
+        rows.extend({"kind": "resync", "schedule_id": s, "created_at": now}
+                    for s in sorted({c.schedule_id for c in changes if c.schedule_id is not None}))
+    else:
+        rows = [dict(change._asdict(), created_at=now) for change in changes]
+    # Rows with different keys would be split into separate executemany calls
+    for row in rows:
+        for key in Change._fields:
+            row.setdefault(key, None)
+    (connection or db.session).execute(db.insert(RosterEvent.__table__), rows)
+
+
+def publish_resync(staff_ids, connection=None):
+    """Tell these staff members' views to reload; staff_ids may be a SELECT of ids."""
+    table = RosterEvent.__table__
+    if isinstance(staff_ids, Select):
+        ids = staff_ids.subquery()
+        statement = db.insert(table).from_select(
+            ["kind", "staff_id", "created_at"],
+            db.select(db.literal("resync"), ids.c[0], db.literal(_utcnow(), db.DateTime)).where(ids.c[0].is_not(None)),
+        )
+        (connection or db.session).execute(statement)
+        return
+    rows = [{"kind": "resync", "staff_id": s, "created_at": _utcnow()} for s in sorted(set(staff_ids) - {None})]
+    if rows:
+        (connection or db.session).execute(db.insert(table), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _publish_flushed_changes(session, flush_context):
+    """Record events for shifts added, changed or deleted through the ORM."""
+    changes = []
+    for shift in session.new:
+        if isinstance(shift, Shift):
+            changes.append(Change("added", shift.id, shift.schedule_id, shift.staff_id))
+    for shift in session.deleted:
+        if isinstance(shift, Shift):
+            changes.append(Change("removed", shift.id, shift.schedule_id, shift.staff_id))
+    for shift in session.dirty:
+        if not isinstance(shift, Shift):
+            continue
+        attrs = inspect(shift).attrs
+        owner = attrs.staff_id.history
+        if owner.added or owner.deleted:
+            old = owner.deleted[0] if owner.deleted else None
+            changes.append(Change("reassigned", shift.id, shift.schedule_id, shift.staff_id, old))
+        elif any(attrs[name].history.has_changes() for name in _TIME_FIELDS + ("schedule_id",)):
+            changes.append(Change("changed", shift.id, shift.schedule_id, shift.staff_id))
+        elif any(attrs[name].history.has_changes() for name in _CLOCK_FIELDS):
+            changes.append(Change("clocked", shift.id, shift.schedule_id, shift.staff_id))
+    if changes:
+        publish(changes, session.connection())
+
+
+def _message(event_id, kind, data):
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def _shift_data(row):
+    return {
+        "id": row.id,
+        "staff_id": row.staff_id,
+        "schedule_id": row.schedule_id,
+        "type": row.type,
+        "start_time": row.start_time.isoformat(),
+        "end_time": row.end_time.isoformat(),
+        "clock_in": row.clock_in.isoformat() if row.clock_in else None,
+        "clock_out": row.clock_out.isoformat() if row.clock_out else None,
+    }
+
+
+def _deliveries(events, wanted):
+    """
+    (subscriber key, event id, message) for each of these events that a
+    wanted key ("staff" or "schedule", id) should see. The shifts named are
+    read with one query. Staff see a shift reassigned away from them as
+    removed and one reassigned to them as added; schedules see reassigned.
+    """
+    shift_ids = {e.shift_id for e in events if e.kind in _WITH_SHIFT}
+    shifts = {}
+    if shift_ids:
+        rows = db.session.execute(db.select(*_SHIFT_COLUMNS).where(Shift.id.in_(sorted(shift_ids))))
+        shifts = {row.id: _shift_data(row) for row in rows}
+
+    for e in events:
+        shift = shifts.get(e.shift_id)
+        if e.kind in _WITH_SHIFT and shift is None:
+            kind, data = "removed", {"id": e.shift_id}  # deleted since
+        elif e.kind in _WITH_SHIFT:
+            kind, data = e.kind, shift
+        else:
+            kind, data = e.kind, {"id": e.shift_id} if e.shift_id is not None else {}
+
+        if e.schedule_id is not None and ("schedule", e.schedule_id) in wanted:
+            yield ("schedule", e.schedule_id), e.id, _message(e.id, kind, data)
+        if e.staff_id is not None and ("staff", e.staff_id) in wanted:
+            yield ("staff", e.staff_id), e.id, _message(e.id, "added" if kind == "reassigned" else kind, data)
+        if e.old_staff_id not in (None, e.staff_id) and ("staff", e.old_staff_id) in wanted:
+            yield ("staff", e.old_staff_id), e.id, _message(e.id, "removed", {"id": e.shift_id})
+
+
+def _events_after(after_id, condition=None, limit=_BATCH):
+    query = db.select(RosterEvent.id, RosterEvent.kind, RosterEvent.shift_id, RosterEvent.schedule_id,
+                      RosterEvent.staff_id, RosterEvent.old_staff_id, RosterEvent.created_at) \
+        .where(RosterEvent.id > after_id)
+    if condition is not None:
+        query = query.where(condition)
+    return db.session.execute(query.order_by(RosterEvent.id).limit(limit)).all()
+
+
+class Subscriber:
+    """
+    One open stream. Holds at most `size` undelivered messages; if more
+    arrive before the stream takes them, they are dropped for a single
+    resync, so a slow or stalled client costs bounded memory.
+    """
+
+    __slots__ = ("key", "size", "overflowed", "_messages", "_ready")
+
+    def __init__(self, key, size):
+        self.key = key
+        self.size = size
+        self.overflowed = False
+        self._messages = deque()
+        self._ready = threading.Event()
+
+    def push(self, event_id, message):
+        if len(self._messages) >= self.size or (self.overflowed and self._messages):
+            # Too far behind: everything waiting becomes one resync
+            self.overflowed = True
+            self._messages.clear()
+            message = _message(event_id, "resync", {})
+        self._messages.append(message)
+        self._ready.set()
+
+    def take(self, timeout):
+        """The waiting messages, blocking up to timeout for the first one."""
+        self._ready.wait(timeout)
+        self._ready.clear()
+        messages = []
+        while self._messages:
+            messages.append(self._messages.popleft())
+        self.overflowed = False
+        return messages
+
+
+class RosterHub:
+    """
+    Fans roster events out to this worker's open streams. While anyone is
+    subscribed, one background thread (a greenlet under gevent) reads the
+    events committed since the last poll, by any worker, every
+    `poll_interval` seconds: one query per worker however many streams are
+    open.
+
+    Ids are assigned at insert but seen at commit, so a transaction can
+    commit an id below one already read. Each poll also re-reads the events
+    created in the last `lag` seconds below the watermark and delivers the
+    ones it hasn't read before, as RevocationCache.sync overlaps its window.
+    """
+
+    def __init__(self, app, poll_interval=1.0, queue_size=50, lag=10.0):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.lag = lag
+        self._subscribers = {}  # key -> set of Subscribers
+        self._last_id = None
+        self._recent = {}  # id -> created_at of the events read within the last `lag` seconds
+        self._thread = None
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    def subscribe(self, key):
+        if self._last_id is None:
+            self._last_id = db.session.scalar(db.select(db.func.max(RosterEvent.id))) or 0
+            cutoff = _utcnow() - timedelta(seconds=self.lag)
+            self._recent = dict(db.session.execute(
+                db.select(RosterEvent.id, RosterEvent.created_at).where(RosterEvent.created_at >= cutoff)
+            ).all())
+        subscriber = Subscriber(key, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="roster-events", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.key)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.key]
+
+    def stats(self):
+        with self._lock:
+            return {"streams": sum(len(s) for s in self._subscribers.values()), "keys": len(self._subscribers)}
+
+    def _loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception:
+                logger.exception("Polling roster events failed")
+
+    def poll(self):
+        """Deliver events committed since the last poll; returns how many were read."""
+        with self._poll_lock:
+            with self._lock:
+                wanted = set(self._subscribers)
+            cutoff = _utcnow() - timedelta(seconds=self.lag)
+            for event_id in [i for i, created_at in self._recent.items() if created_at < cutoff]:
+                del self._recent[event_id]
+            below = (RosterEvent.id <= (self._last_id or 0)) & (RosterEvent.created_at >= cutoff)
+            late = _events_after(0, below, None)
+            events, more, read = [e for e in late if e.id not in self._recent], True, 0
+            while True:
+                if events:
+                    read += len(events)
+                    self._recent.update((e.id, e.created_at) for e in events)
+                    deliveries = list(_deliveries(events, wanted))
+                    with self._lock:
+                        for key, event_id, message in deliveries:
+                            for subscriber in self._subscribers.get(key, ()):
+                                subscriber.push(event_id, message)
+                if not more:
+                    break
+                events = _events_after(self._last_id or 0)
+                more = len(events) == _BATCH
+                if events:
+                    self._last_id = events[-1].id
+            return read
+
+
+def prune_events(retention):
+    """Delete events older than retention seconds."""
+    result = db.session.execute(
+        db.delete(RosterEvent).where(RosterEvent.created_at < _utcnow() - timedelta(seconds=retention))
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def init_roster_events(app):
+    """
+    Keep the event table bounded whether or not any stream is open: after a
+    request that wrote, prune events older than ROSTER_EVENTS_RETENTION_SECONDS,
+    at most once per retention / 10 seconds per worker.
+    """
+    retention = app.config["ROSTER_EVENTS_RETENTION_SECONDS"]
+    next_prune = [0.0]
+
+    @app.after_request
+    def prune_after_writes(response):
+        if g.get("db_wrote") and time.monotonic() >= next_prune[0]:
+            next_prune[0] = time.monotonic() + retention / 10
+            try:
+                prune_events(retention)
+            except SQLAlchemyError:
+                db.session.rollback()
+                logger.exception("Pruning roster events failed")
+        return response
+
+
+def _hub():
+    hub = current_app.extensions.get("roster_hub")
+    if hub is None:
+        config = current_app.config
+        hub = current_app.extensions["roster_hub"] = RosterHub(
+            current_app._get_current_object(),
+            config["ROSTER_EVENTS_POLL_SECONDS"],
+            config["ROSTER_EVENTS_QUEUE_SIZE"],
+            config["ROSTER_EVENTS_COMMIT_LAG_SECONDS"],
+        )
+    return hub
+
+
+class RosterStream:
+    """
+    The text/event-stream body for one subscriber: missed events first,
+    then new ones as they arrive, with a comment line every `heartbeat`
+    seconds so idle connections stay open and dead ones are noticed. It ends
+    after `max_age` seconds; the browser reconnects with Last-Event-ID.
+    Holds no database connection while open.
+    """
+
+    def __init__(self, hub, subscriber, backlog, heartbeat, max_age):
+        self.hub = hub
+        self.subscriber = subscriber
+        self.backlog = backlog
+        self.heartbeat = heartbeat
+        self.max_age = max_age
+
+    def __iter__(self):
+        yield f"retry: {int(self.heartbeat * 1000)}\n\n"
+        if self.backlog:
+            yield "".join(self.backlog)
+            self.backlog = None
+        deadline = time.monotonic() + self.max_age
+        while time.monotonic() < deadline:
+            messages = self.subscriber.take(min(self.heartbeat, max(deadline - time.monotonic(), 0)))
+            yield "".join(messages) if messages else ": ping\n\n"
+
+    def close(self):
+        self.hub.unsubscribe(self.subscriber)
+
+
+def open_stream(key, last_event_id=None):
+    """
+    Subscribe key ("staff", id) or ("schedule", id) to roster events. After
+    a reconnect, the events since last_event_id are replayed from the table,
+    or a resync is sent if there were too many or they were pruned.
+    """
+    hub = _hub()
+    subscriber = hub.subscribe(key)
+    backlog = []
+    if last_event_id is not None:
+        kind, key_id = key
+        if kind == "staff":
+            condition = (RosterEvent.staff_id == key_id) | (RosterEvent.old_staff_id == key_id)
+        else:
+            condition = RosterEvent.schedule_id == key_id
+        events = _events_after(last_event_id, condition, hub.queue_size + 1)
+        oldest = db.session.scalar(db.select(db.func.min(RosterEvent.id)))
+        if len(events) > hub.queue_size or (oldest is not None and oldest > last_event_id + 1):
+            latest = max([last_event_id] + [e.id for e in events])
+            backlog = [_message(latest, "resync", {})]
+        else:
+            backlog = [message for _, _, message in _deliveries(events, {key})]
+    # Idle streams must not hold a pooled connection
+    db.session.remove()
+    config = current_app.config
+    return RosterStream(hub, subscriber, backlog,
+                        config["ROSTER_EVENTS_HEARTBEAT_SECONDS"], config["ROSTER_EVENTS_MAX_AGE_SECONDS"])
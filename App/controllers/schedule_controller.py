@@ -1,13 +1,62 @@
-from App.database import db
+from App.database import db, run_write
+from App.metrics import observe_strategy
+from App.profiling import Profile, requested_captures
+from App.controllers.calendar import touch_rosters
+from App.controllers.conflicts import validate_shift, wall_clock
+from App.controllers.versions import record_change
+from App.controllers.roster_events import Change, publish, publish_resync
 from App.models.schedule import Schedule
 from App.models.shift import Shift
 from App.models import Staff, Admin
 from datetime import datetime
 
+from sqlalchemy.orm import joinedload, selectinload
+
 # Import strategies
 from App.models.strategies.even_distribution import EvenDistributionStrategy
 from App.models.strategies.minimize_days import MinimizeDaysStrategy
 from App.models.strategies.balance_day_night import BalanceDayNightStrategy
+from App.models.strategies.records import StaffRecord, ShiftRecord
+
+
+def _load_staff_records():
+    """Staff ids only, as StaffRecords."""
+    return [StaffRecord(*row) for row in db.session.execute(db.select(Staff.id).order_by(Staff.id))]
+
+
+def _load_shift_records(schedule_id):
+    """The schedule's shifts as ShiftRecords, from a projection of the columns strategies read."""
+    query = db.select(Shift.id, Shift.staff_id, Shift.type, Shift.start_time, Shift.end_time) \
+        .where(Shift.schedule_id == schedule_id).order_by(Shift.id)
+    return [ShiftRecord(*row) for row in db.session.execute(query)]
+
+
+def _write_assignments(schedule_id, shift_list, original):
+    """UPDATE staff_id by primary key for the shifts a strategy reassigned; returns how many."""
+    changed, owners, events = [], set(), []
+    for shift, staff_id in zip(shift_list, original):
+        if shift.staff_id != staff_id:
+            changed.append({"id": shift.id, "staff_id": shift.staff_id})
+            owners.update((staff_id, shift.staff_id))
+            events.append(Change("reassigned", shift.id, schedule_id, shift.staff_id, staff_id))
+    if changed:
+        db.session.execute(db.update(Shift), changed)
+        # Bulk UPDATEs skip the flush hooks, so mark both owners' calendars
+        # changed and publish the reassignments here
+        touch_rosters(owners)
+        publish(events)
+    return len(changed)
+
+
+def _shifted(column, offset, dialect):
+    """SQL for a DateTime column moved by offset, evaluated in the database."""
+    if dialect == "sqlite":
+        # SQLite stores DateTimes as 'YYYY-MM-DD HH:MM:SS.ffffff' text; strftime
+        # drops the fraction, so it is carried over to keep text comparisons right
+        seconds = int(offset.total_seconds())
+        moved = db.func.strftime("%Y-%m-%d %H:%M:%S", column, f"{seconds:+d} seconds")
+        return moved.concat(db.func.substr(column, 20))
+    return column + offset
 
 class ScheduleController:
     """Controller to manage schedules and auto-assign shifts using strategies."""
@@ -32,30 +81,86 @@ class ScheduleController:
         staff = db.session.get(Staff, staff_id)
         if not schedule or not staff:
             raise ValueError("Invalid schedule or staff")
+        # Times given with an offset would not compare with the stored naive ones
+        start_time, end_time = wall_clock(start_time), wall_clock(end_time)
+        validate_shift(staff_id, start_time, end_time)
 
-        shift = Shift(
+        values = dict(
             staff_id=staff_id,
             schedule_id=schedule_id,
             start_time=start_time,
             end_time=end_time,
+            # Optional type attribute for day/night shifts
+            type=shift_type,
         )
-        # Optional type attribute for day/night shifts
-        shift.type = shift_type
-
-        db.session.add(shift)
-        db.session.commit()
-        return shift
+        # A single INSERT so shift creation can be group-committed on SQLite
+        def insert(connection):
+            shift_id = connection.execute(db.insert(Shift).values(**values)).inserted_primary_key[0]
+            # Core inserts skip the flush hooks that mark calendars changed and publish events
+            touch_rosters([staff_id], connection)
+            publish([Change("added", shift_id, schedule_id, staff_id)], connection)
+            return shift_id
+        shift_id = run_write(insert)
+        db.session.expire(schedule, ["shifts"])
+        db.session.expire(staff, ["shifts"])
+        return db.session.get(Shift, shift_id)
 
     @staticmethod
-    def auto_populate(schedule_id, strategy_name):
-        """Auto-populate the shifts of a schedule using a strategy."""
-        schedule = db.session.get(Schedule, schedule_id)
-        if not schedule:
+    def clone_schedule(schedule_id, offset, created_by, name=None, keep_staff=True):
+        """
+        Copy a schedule and all its shifts, moved by offset (a timedelta, e.g.
+        7 days to roll a week forward). The shifts are copied by one
+        INSERT ... SELECT, so none of them pass through Python. Staff
+        assignments are kept or left open; clock-ins are never copied.
+        Returns the new schedule's id and how many shifts were copied.
+        """
+        if offset.microseconds:
+            raise ValueError("offset must be a whole number of seconds")
+        source = db.session.execute(
+            db.select(Schedule.name, Schedule.user_id, Schedule.strategy_used).where(Schedule.id == schedule_id)
+        ).first()
+        if source is None:
             raise ValueError("Schedule not found")
+        name = name or f"{source.name} (copy)"[:50]
 
-        staff_list = Staff.query.all()
-        shift_list = schedule.shifts  # Existing shifts in the schedule
+        def clone(connection):
+            new_id = connection.execute(db.insert(Schedule).values(
+                name=name,
+                created_by=created_by,
+                user_id=source.user_id,
+                strategy_used=source.strategy_used,
+            )).inserted_primary_key[0]
+            dialect = connection.dialect.name
+            copied = db.select(
+                Shift.staff_id if keep_staff else db.null(),
+                db.literal(new_id),
+                _shifted(Shift.start_time, offset, dialect),
+                _shifted(Shift.end_time, offset, dialect),
+                Shift.type,
+            ).where(Shift.schedule_id == schedule_id)
+            columns = ["staff_id", "schedule_id", "start_time", "end_time", "type"]
+            count = connection.execute(db.insert(Shift).from_select(columns, copied)).rowcount
+            if keep_staff and count:
+                # INSERT ... SELECT skips the flush hooks that mark calendars changed and publish events
+                owners = db.select(Shift.staff_id).where(Shift.schedule_id == new_id).distinct()
+                touch_rosters(owners, connection)
+                publish_resync(owners, connection)
+            elif count:
+                # Open shifts have no staff to resync, but cached reports must still see the write
+                publish([Change("resync", None, new_id, None)], connection)
+            return new_id, count
 
+        new_id, count = run_write(clone)
+        return {"schedule_id": new_id, "source_id": schedule_id, "name": name, "shifts": count}
+
+    @staticmethod
+    def auto_populate(schedule_id, strategy_name):
+        """
+        Auto-populate the shifts of a schedule using a strategy. Strategies
+        work on StaffRecord/ShiftRecord rows rather than ORM objects and
+        return ShiftRecords. Times the load, assign, flush and commit phases,
+        with optional cProfile and tracemalloc captures (see App.profiling).
+        """
         # Assign strategy
         if strategy_name == "even_distribution":
             strategy = EvenDistributionStrategy()
@@ -66,17 +171,42 @@ class ScheduleController:
         else:
             raise ValueError("Invalid strategy name")
 
-        # Generate schedule using the strategy
-        updated_shifts = strategy.generate(staff_list, shift_list)
+        profile = Profile("auto_populate", requested_captures())
+        with profile.capture():
+            with profile.phase("load"):
+                if db.session.execute(db.select(Schedule.id).where(Schedule.id == schedule_id)).first() is None:
+                    raise ValueError("Schedule not found")
+                staff_list = _load_staff_records()
+                shift_list = _load_shift_records(schedule_id)  # Existing shifts in the schedule
+                original = [shift.staff_id for shift in shift_list]
 
-        # Commit updated staff assignments
-        db.session.commit()
+            # Generate schedule using the strategy
+            updated_shifts = strategy.run(staff_list, shift_list, profile)
+
+            # Write the new staff assignments back by primary key
+            with profile.phase("flush"):
+                _write_assignments(schedule_id, shift_list, original)
+                # Keep the run as a version so admins can diff or restore it
+                record_change(
+                    schedule_id,
+                    [(s.id, staff_id, s.start_time, s.end_time, s.type) for s, staff_id in zip(shift_list, original)],
+                    [(s.id, s.staff_id, s.start_time, s.end_time, s.type) for s in shift_list],
+                    label=f"auto_populate:{strategy_name}",
+                )
+            with profile.phase("commit"):
+                db.session.commit()
+        observe_strategy(strategy_name, profile.phases["assign"] / 1000)
+        profile.count(strategy=strategy_name)
+        profile.publish()
         return updated_shifts
 
     @staticmethod
     def get_Schedule_report(schedule_id):
         """Return JSON data for a schedule and its shifts."""
-        schedule = db.session.get(Schedule, schedule_id)
+        schedule = db.session.get(
+            Schedule, schedule_id,
+            options=[selectinload(Schedule.shifts).joinedload(Shift.staff)],
+        )
         if not schedule:
             raise ValueError("Schedule not found")
         return schedule.get_json()
@@ -0,0 +1,129 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from App.database import db
+from App.models import Admin, Schedule, Shift, Staff, User
+from App.controllers.identity import invalidate_identity
+
+DISTRIBUTIONS = ("uniform", "skewed")
+# Shift start hours and length by type
+SHIFT_STARTS = {"day": (6, 8, 10), "night": (18, 20, 22)}
+SHIFT_HOURS = 8
+
+
+def _staff_weights(count, distribution, rng):
+    """Relative number of shifts per staff member: everyone alike, or a few full-timers and many part-timers."""
+    if distribution == "uniform":
+        return None
+    return [rng.paretovariate(1.5) for _ in range(count)]
+
+
+def _clock_times(start, end, now, rng, late_rate, no_show_rate, early_leave_rate):
+    """Clock-in/out for a shift: none yet if it hasn't ended, sometimes a no-show, late or early leave."""
+    if end > now or rng.random() < no_show_rate:
+        return None, None
+    if rng.random() < late_rate:
+        clock_in = start + timedelta(minutes=rng.randint(1, 60))
+    else:
+        clock_in = start - timedelta(minutes=rng.randint(0, 15))
+    if rng.random() < early_leave_rate:
+        clock_out = end - timedelta(minutes=rng.randint(15, 120))
+    else:
+        clock_out = end + timedelta(minutes=rng.randint(0, 30))
+    return clock_in, clock_out
+
+
+def seed_organization(staff=1000, schedules=10, shifts=50000, start=None, days=28,
+                      night_ratio=0.3, late_rate=0.1, no_show_rate=0.03, early_leave_rate=0.05,
+                      distribution="uniform", password="staffpass", prefix="seed",
+                      seed=None, chunk_size=50000, progress=None):
+    """
+    Generate a large organization for benchmarks: an admin, `staff` staff
+    members, `schedules` schedules and `shifts` shifts spread over `days`
+    days from `start` with a day/night mix. Shifts that have already ended
+    get clock-in/out history with lateness, no-shows and early leaves.
+
+    Rows go in with bulk Core inserts, users and schedules with RETURNING
+    so the database assigns their ids (and advances PostgreSQL's
+    sequences), and the password is hashed once and shared by every seeded
+    account.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"distribution must be one of {DISTRIBUTIONS}")
+    if staff < 1 or schedules < 1 or shifts < 0 or days < 1:
+        raise ValueError("staff, schedules and days must be positive and shifts not negative")
+    if db.session.execute(db.select(User.id).where(User.username.like(f"{prefix}\\_%", escape="\\"))).first():
+        raise ValueError(f"Users prefixed '{prefix}_' already exist; use another prefix or reset the database")
+
+    rng = random.Random(seed)
+    timings = {}
+    began = time.perf_counter()
+    hashed = generate_password_hash(password)
+    start = start or (datetime.now() - timedelta(days=days // 2)).replace(hour=0, minute=0, second=0, microsecond=0)
+    now = datetime.now()
+
+    # Users: one admin and the staff, whose ids the shifts refer to
+    user_ids = db.session.scalars(
+        insert(User.__table__).returning(User.__table__.c.id, sort_by_parameter_order=True),
+        [{"username": f"{prefix}_admin", "password": hashed, "role": "admin"}]
+        + [{"username": f"{prefix}_staff{n}", "password": hashed, "role": "staff"} for n in range(staff)],
+    ).all()
+    admin_id, staff_ids = user_ids[0], user_ids[1:]
+    db.session.execute(insert(Admin.__table__), [{"id": admin_id}])
+    db.session.execute(insert(Staff.__table__), [{"id": i} for i in staff_ids])
+    timings["users"] = time.perf_counter() - began
+
+    schedule_ids = db.session.scalars(
+        insert(Schedule.__table__).returning(Schedule.__table__.c.id, sort_by_parameter_order=True),
+        [{"name": f"{prefix} schedule {n + 1}", "created_at": now, "created_by": admin_id} for n in range(schedules)],
+    ).all()
+
+    started = time.perf_counter()
+    weights = _staff_weights(staff, distribution, rng)
+    cum_weights = None
+    if weights:
+        cum_weights, total = [], 0.0
+        for weight in weights:
+            total += weight
+            cum_weights.append(total)
+    shift_table = Shift.__table__
+    day_starts = [start + timedelta(days=d) for d in range(days)]
+    length = timedelta(hours=SHIFT_HOURS)
+    written = 0
+    while written < shifts:
+        count = min(chunk_size, shifts - written)
+        owners = rng.choices(staff_ids, cum_weights=cum_weights, k=count)
+        rows = []
+        for staff_id in owners:
+            kind = "night" if rng.random() < night_ratio else "day"
+            begins = rng.choice(day_starts) + timedelta(hours=rng.choice(SHIFT_STARTS[kind]))
+            ends = begins + length
+            clock_in, clock_out = _clock_times(begins, ends, now, rng, late_rate, no_show_rate, early_leave_rate)
+            rows.append({
+                "staff_id": staff_id, "schedule_id": rng.choice(schedule_ids),
+                "start_time": begins, "end_time": ends, "type": kind,
+                "clock_in": clock_in, "clock_out": clock_out,
+            })
+        db.session.execute(insert(shift_table), rows)
+        written += count
+        if progress:
+            progress(written, shifts)
+    timings["shifts"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    db.session.commit()
+    timings["commit"] = time.perf_counter() - started
+    # Core inserts bypass the mapper events that keep the identity cache fresh
+    invalidate_identity()
+    timings["total"] = time.perf_counter() - began
+    return {
+        "admin": f"{prefix}_admin",
+        "staff": staff,
+        "schedules": schedules,
+        "shifts": shifts,
+        "timings": {name: round(seconds, 3) for name, seconds in timings.items()},
+    }
@@ -0,0 +1,195 @@
+import json
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from App.database import db, use_primary
+from App.models import Schedule, Shift, Staff
+from App.controllers.calendar import touch_rosters
+from App.controllers.roster_events import Change, publish
+from App.controllers.conflicts import Interval, find_conflicts, wall_clock
+
+REQUIRED_FIELDS = ("staff_id", "schedule_id", "start_time", "end_time")
+# Keeps each IN list under SQLite's bound parameter limit
+IN_CHUNK = 900
+
+
+def parse_shift_records(body, fmt="json"):
+    """
+    Read shift records from a JSON array (or {"shifts": [...]}) or from
+    NDJSON, given as text or as an iterable of lines such as request.stream.
+    """
+    if fmt == "json":
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ValueError("Invalid JSON")
+        if isinstance(data, dict):
+            data = data.get("shifts")
+        if not isinstance(data, list):
+            raise ValueError("Expected a JSON array of shifts")
+        return data
+    if fmt == "jsonl":
+        lines = body.splitlines() if isinstance(body, str) else body
+        records = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append({"_error": "Invalid JSON"})
+        return records
+    raise ValueError("format must be 'json' or 'jsonl'")
+
+
+def _parse_record(record, max_length):
+    """A record's insert values, or raise ValueError with what is wrong with it."""
+    if not isinstance(record, dict):
+        raise ValueError("Invalid record")
+    if "_error" in record:
+        raise ValueError(record["_error"])
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if missing:
+        raise ValueError(f"{', '.join(missing)} required")
+    try:
+        staff_id, schedule_id = int(record["staff_id"]), int(record["schedule_id"])
+    except (TypeError, ValueError):
+        raise ValueError("staff_id and schedule_id must be integers")
+    try:
+        start_time = wall_clock(datetime.fromisoformat(record["start_time"]))
+        end_time = wall_clock(datetime.fromisoformat(record["end_time"]))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid datetime format. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+    if end_time <= start_time:
+        raise ValueError("end_time must be after start_time")
+    if end_time - start_time > max_length:
+        raise ValueError(f"Shifts can be at most {current_app.config['SHIFT_MAX_HOURS']} hours long")
+    shift_type = record.get("shift_type") or record.get("type") or "day"
+    if not isinstance(shift_type, str) or len(shift_type) > 10:
+        raise ValueError("Invalid shift_type")
+    return {"staff_id": staff_id, "schedule_id": schedule_id, "start_time": start_time,
+            "end_time": end_time, "type": shift_type}
+
+
+def _existing_ids(column, ids):
+    """The subset of ids present in column, with one IN query per IN_CHUNK ids."""
+    ids = sorted(ids)
+    found = set()
+    for i in range(0, len(ids), IN_CHUNK):
+        found.update(db.session.scalars(db.select(column).where(column.in_(ids[i:i + IN_CHUNK]))))
+    return found
+
+
+def _conflicting_rows(rows, min_rest):
+    """
+    Row numbers to reject because they clash with an existing shift or an
+    earlier row of the import, found with one range query and one sweep.
+    """
+    staff_ids = sorted({row["staff_id"] for row in rows})
+    lowest = min(row["start_time"] for row in rows) - min_rest
+    highest = max(row["end_time"] for row in rows) + min_rest
+    existing = []
+    for i in range(0, len(staff_ids), IN_CHUNK):
+        existing.extend(Interval(*found) for found in db.session.execute(
+            db.select(Shift.id, Shift.staff_id, Shift.schedule_id, Shift.start_time, Shift.end_time).where(
+                Shift.staff_id.in_(staff_ids[i:i + IN_CHUNK]),
+                Shift.start_time < highest,
+                Shift.end_time > lowest,
+            )
+        ))
+    # New rows get negative ids so they can't collide with existing shift ids
+    new = [Interval(-row["row"], row["staff_id"], row["schedule_id"], row["start_time"], row["end_time"])
+           for row in rows]
+    conflicts = find_conflicts(existing + new, min_rest)
+
+    rejected, between_new = {}, []
+    for conflict in conflicts:
+        ids = (conflict["shift_id"], conflict["other_shift_id"])
+        new_rows = sorted(-i for i in ids if i < 0)
+        if len(new_rows) == 1:
+            rejected.setdefault(new_rows[0], f"Conflicts ({conflict['kind']}) with shift {max(ids)}")
+        elif len(new_rows) == 2:
+            between_new.append((new_rows, conflict["kind"]))
+    # Between two new rows, keep the earlier one
+    for (earlier, later), kind in sorted(between_new):
+        if earlier not in rejected and later not in rejected:
+            rejected[later] = f"Conflicts ({kind}) with row {earlier}"
+    return rejected
+
+
+def bulk_add_shifts(records, chunk_size=1000, check_conflicts=True, min_rest=None):
+    """
+    Create many shifts in one transaction. Staff and schedules are checked
+    with one IN query each, overlaps (and, with SHIFT_MIN_REST_HOURS, short
+    rests) against existing shifts and within the import by one sweep, and
+    rows go in with executemany INSERT ... RETURNING in chunks. Bad rows are
+    reported, not raised.
+    """
+    max_length = timedelta(hours=current_app.config["SHIFT_MAX_HOURS"])
+    if min_rest is None:
+        min_rest = timedelta(hours=current_app.config["SHIFT_MIN_REST_HOURS"])
+    rows, errors = [], []
+    for line, record in enumerate(records, start=1):
+        try:
+            rows.append(dict(_parse_record(record, max_length), row=line))
+        except ValueError as e:
+            errors.append({"row": line, "error": str(e)})
+
+    if rows:
+        staff = _existing_ids(Staff.id, {row["staff_id"] for row in rows})
+        schedules = _existing_ids(Schedule.id, {row["schedule_id"] for row in rows})
+        valid = []
+        for row in rows:
+            if row["staff_id"] not in staff:
+                errors.append({"row": row["row"], "error": f"Staff {row['staff_id']} not found"})
+            elif row["schedule_id"] not in schedules:
+                errors.append({"row": row["row"], "error": f"Schedule {row['schedule_id']} not found"})
+            else:
+                valid.append(row)
+        rows = valid
+    if rows and check_conflicts:
+        rejected = _conflicting_rows(rows, min_rest)
+        errors.extend({"row": line, "error": message} for line, message in rejected.items())
+        rows = [row for row in rows if row["row"] not in rejected]
+
+    created = []
+    if rows:
+        use_primary()
+        table = Shift.__table__
+        # Without a sentinel column SQLite can only keep RETURNING in parameter
+        # order one row per statement, so ids are matched back by (staff_id,
+        # start_time), which the conflict check makes unique
+        statement = insert(table).returning(table.c.id, table.c.staff_id, table.c.start_time,
+                                            sort_by_parameter_order=not check_conflicts)
+        try:
+            for i in range(0, len(rows), chunk_size):
+                chunk = rows[i:i + chunk_size]
+                params = [{k: v for k, v in row.items() if k != "row"} for row in chunk]
+                returned = db.session.execute(statement, params).all()
+                if check_conflicts:
+                    by_key = {(row["staff_id"], row["start_time"]): row["row"] for row in chunk}
+                    created.extend({"row": by_key[(staff_id, start)], "id": shift_id}
+                                   for shift_id, staff_id, start in returned)
+                else:
+                    created.extend({"row": row["row"], "id": shift_id} for row, (shift_id, _, _) in zip(chunk, returned))
+            # Core inserts skip the flush hooks that mark calendars changed and publish events
+            touch_rosters({row["staff_id"] for row in rows})
+            by_row = {row["row"]: row for row in rows}
+            publish(Change("added", c["id"], by_row[c["row"]]["schedule_id"], by_row[c["row"]]["staff_id"])
+                    for c in created)
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            errors.append({"row": None, "error": f"Import rolled back: {e.orig}"})
+            created = []
+
+    return {
+        "total": len(records),
+        "created": len(created),
+        "ids": sorted(created, key=lambda c: c["row"]),
+        "errors": sorted(errors, key=lambda e: e["row"] or 0),
+    }
@@ -1,12 +1,15 @@
 from datetime import datetime
 
-from App.database import db
+from sqlalchemy.orm import joinedload
+
+from App.database import db, run_write
 from App.models import Shift
-from App.controllers.user import get_user
+from App.controllers.identity import resolve_identity
+from App.controllers.roster_events import Change, publish
 
 def _assert_staff(staff_id):
     """Ensure the user exists and has the 'staff' role."""
-    staff = get_user(staff_id)
+    staff = resolve_identity(staff_id)
     if not staff or staff.role != "staff":
         raise PermissionError("Only staff members can perform this action")
     return staff
@@ -21,24 +24,31 @@ def _get_shift_for_staff(staff_id, shift_id):
 
 def get_combined_roster(staff_id):
     _assert_staff(staff_id)
-    shifts = Shift.query.order_by(Shift.start_time).all()
+    # Load each shift's staff member in the same query (get_json reads its username)
+    shifts = Shift.query.options(joinedload(Shift.staff)).order_by(Shift.start_time).all()
     return [shift.get_json() for shift in shifts]
 
 
+def _punch(shift, **values):
+    """Write clock times as a small UPDATE so punches can be group-committed."""
+    def punch(connection):
+        connection.execute(db.update(Shift).where(Shift.id == shift.id).values(**values))
+        publish([Change("clocked", shift.id, shift.schedule_id, shift.staff_id)], connection)
+    run_write(punch)
+    db.session.expire(shift, list(values))
+    return shift
+
+
 def clock_in(staff_id, shift_id):
     _assert_staff(staff_id)
     shift = _get_shift_for_staff(staff_id, shift_id)
-    shift.clock_in = datetime.now()
-    db.session.commit()
-    return shift
+    return _punch(shift, clock_in=datetime.now())
 
 
 def clock_out(staff_id, shift_id):
     _assert_staff(staff_id)
     shift = _get_shift_for_staff(staff_id, shift_id)
-    shift.clock_out = datetime.now()
-    db.session.commit()
-    return shift
+    return _punch(shift, clock_out=datetime.now())
 
 
 def get_shift(shift_id):
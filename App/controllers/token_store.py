@@ -0,0 +1,157 @@
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from flask_jwt_extended.config import config as jwt_config
+from sqlalchemy.exc import SQLAlchemyError
+
+from App.database import db
+from App.models import TokenSession
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class RevocationCache:
+    """
+    In-memory set of revoked jtis. Local revocations are added immediately;
+    revocations made by other workers are picked up by an incremental sync
+    every `sync_interval` seconds, so most token checks never hit the database.
+    """
+
+    def __init__(self, sync_interval=5, prune_interval=3600):
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self._revoked = {}  # jti -> expires_at
+        self._watermark = None
+        self._next_sync = 0.0
+        self._next_prune = 0.0
+        self._lock = Lock()
+
+    def add(self, jti, expires_at=None):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return jti in self._revoked
+
+    def sync(self):
+        """Pull revocations newer than the last watermark and drop expired ones."""
+        now = _utcnow()
+        query = db.select(TokenSession.jti, TokenSession.expires_at, TokenSession.revoked_at).where(
+            TokenSession.revoked_at.is_not(None),
+            TokenSession.expires_at.is_(None) | (TokenSession.expires_at > now),
+        )
+        if self._watermark is not None:
+            # Overlap by one interval so slow commits from other workers aren't missed
+            query = query.where(
+                TokenSession.revoked_at >= self._watermark - timedelta(seconds=self.sync_interval)
+            )
+        rows = db.session.execute(query).all()
+
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = expires_at
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            for jti in [j for j, exp in self._revoked.items() if exp is not None and exp < now]:
+                del self._revoked[jti]
+            self._next_sync = time.monotonic() + self.sync_interval
+
+        if time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + self.prune_interval
+            # This runs in the JWT check before the view: a transaction of its
+            # own keeps it from committing the request's session, and a failed
+            # prune from failing the check
+            try:
+                with db.engine.begin() as connection:
+                    prune_expired_tokens(connection)
+            except SQLAlchemyError:
+                logger.exception("Pruning expired token sessions failed")
+
+
+def _revocations():
+    cache = current_app.extensions.get("token_revocations")
+    if cache is None:
+        cache = current_app.extensions["token_revocations"] = RevocationCache(
+            current_app.config.get("TOKEN_REVOCATION_SYNC_SECONDS", 5),
+            current_app.config.get("TOKEN_PRUNE_INTERVAL_SECONDS", 3600),
+        )
+    return cache
+
+
+def issue_token(user):
+    """Create an access token for the user and record it as a session."""
+    jti = str(uuid.uuid4())
+    token = create_access_token(identity=user, additional_claims={"jti": jti})
+    expires = jwt_config.access_expires
+    expires_at = _utcnow() + expires if expires else None
+    db.session.add(TokenSession(jti=jti, user_id=user.id, expires_at=expires_at))
+    db.session.commit()
+    return token
+
+
+def is_token_revoked(jti):
+    return _revocations().is_revoked(jti)
+
+
+def revoke_token(jti):
+    """Revoke a single token. Returns False if it was unknown or already revoked."""
+    session = db.session.execute(
+        db.select(TokenSession).filter_by(jti=jti)
+    ).scalar_one_or_none()
+    if not session or session.is_revoked:
+        return False
+    session.revoked_at = _utcnow()
+    db.session.commit()
+    _revocations().add(jti, session.expires_at)
+    return True
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every live token of a user (all devices). Returns how many were revoked."""
+    now = _utcnow()
+    live = (TokenSession.user_id == user_id) & TokenSession.revoked_at.is_(None) & (
+        TokenSession.expires_at.is_(None) | (TokenSession.expires_at > now)
+    )
+    rows = db.session.execute(db.select(TokenSession.jti, TokenSession.expires_at).where(live)).all()
+    if not rows:
+        return 0
+    db.session.execute(db.update(TokenSession).where(live).values(revoked_at=now))
+    db.session.commit()
+    for jti, expires_at in rows:
+        _revocations().add(jti, expires_at)
+    return len(rows)
+
+
+def active_token_count(user_id):
+    now = _utcnow()
+    return db.session.scalar(
+        db.select(db.func.count(TokenSession.id)).where(
+            TokenSession.user_id == user_id,
+            TokenSession.revoked_at.is_(None),
+            TokenSession.expires_at.is_(None) | (TokenSession.expires_at > now),
+        )
+    )
+
+
+def prune_expired_tokens(connection=None):
+    """
+    Delete sessions whose tokens have expired; they can no longer be used
+    anyway. Commits the session, unless run on the caller's connection.
+    """
+    result = (connection or db.session).execute(
+        db.delete(TokenSession).where(TokenSession.expires_at < _utcnow())
+    )
+    if connection is None:
+        db.session.commit()
+    return result.rowcount
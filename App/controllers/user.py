@@ -1,9 +1,21 @@
+import csv, io, json, os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from werkzeug.security import generate_password_hash
+
 from App.database import db
 from App.models import User, Admin, Staff
+from App.controllers.identity import invalidate_identity
 
 VALID_ROLES = {"user", "staff", "admin"}
+ROLE_MODELS = {"user": User, "staff": Staff, "admin": Admin}
+
+# Below this many passwords a process pool costs more than it saves
+POOL_HASH_THRESHOLD = 32
 
 def _normalize_role(role):
     """Normalize role to lowercase and strip spaces."""
@@ -45,7 +57,8 @@ def get_all_users():
 
 def get_all_users_json():
     """Return all users as JSON objects."""
-    users = get_all_users()
+    # Staff.get_json reads each member's shifts; load them all in one query
+    users = User.query.options(selectinload(User.shifts)).all()
     return [user.get_json() for user in users] if users else []
 
 
@@ -57,3 +70,121 @@ def update_user(user_id, username):
         db.session.commit()
         return user
     return None
+
+
+def parse_user_records(stream, fmt="csv"):
+    """Read username/password/role records from CSV (with header) or JSONL text."""
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(stream)))
+    if fmt == "jsonl":
+        records = []
+        for line in stream.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append({"_error": "Invalid JSON"})
+        return records
+    raise ValueError("format must be 'csv' or 'jsonl'")
+
+
+def hash_passwords(passwords, workers=None):
+    """Hash passwords across a process pool, one process per core by default."""
+    if len(passwords) < POOL_HASH_THRESHOLD or workers == 1:
+        return [generate_password_hash(p) for p in passwords]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+
+def _validate_records(records):
+    """Split records into insertable rows and per-row errors."""
+    valid, errors, seen = [], [], set()
+    for line, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            errors.append({"row": line, "error": "Invalid record"})
+            continue
+        if "_error" in record:
+            errors.append({"row": line, "error": record["_error"]})
+            continue
+        username = record.get("username") or ""
+        password = record.get("password") or ""
+        role = record.get("role") or "staff"
+        if not all(isinstance(value, str) for value in (username, password, role)):
+            errors.append({"row": line, "error": "username, password and role must be strings"})
+            continue
+        username, role = username.strip(), _normalize_role(role)
+        if not username or not password:
+            errors.append({"row": line, "error": "username and password are required"})
+        elif len(username) > 20:
+            errors.append({"row": line, "username": username, "error": "username is too long"})
+        elif role not in VALID_ROLES:
+            errors.append({"row": line, "username": username, "error": f"Invalid role '{role}'"})
+        elif username in seen:
+            errors.append({"row": line, "username": username, "error": "Duplicate username in import"})
+        else:
+            seen.add(username)
+            valid.append({"row": line, "username": username, "password": password, "role": role})
+
+    if seen:
+        taken = set(db.session.scalars(db.select(User.username).where(User.username.in_(seen))))
+        for record in [r for r in valid if r["username"] in taken]:
+            errors.append({"row": record["row"], "username": record["username"], "error": "Username already exists"})
+        valid = [r for r in valid if r["username"] not in taken]
+    return valid, errors
+
+
+def _insert_chunk(rows):
+    """Insert one chunk grouped by role; returns the rows that failed."""
+    by_role = {}
+    for row in rows:
+        by_role.setdefault(row["role"], []).append(
+            {"username": row["username"], "password": row["password"], "role": row["role"]}
+        )
+    try:
+        for role, values in by_role.items():
+            db.session.execute(insert(ROLE_MODELS[role]), values)
+        db.session.commit()
+        return []
+    except IntegrityError:
+        db.session.rollback()
+
+    # Fall back to row-by-row so a single bad record doesn't sink the chunk
+    failed = []
+    for row in rows:
+        try:
+            db.session.execute(insert(ROLE_MODELS[row["role"]]), [
+                {"username": row["username"], "password": row["password"], "role": row["role"]}
+            ])
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            failed.append({"row": row["row"], "username": row["username"], "error": str(e.orig)})
+    return failed
+
+
+def bulk_import_users(records, chunk_size=500, workers=None):
+    """
+    Create many users at once: passwords are hashed in a process pool and
+    rows are bulk inserted in chunks. Bad rows are reported, not raised.
+    """
+    valid, errors = _validate_records(records)
+    hashes = hash_passwords([r["password"] for r in valid], workers)
+    for record, hashed in zip(valid, hashes):
+        record["password"] = hashed
+
+    failed = []
+    for i in range(0, len(valid), chunk_size):
+        failed.extend(_insert_chunk(valid[i:i + chunk_size]))
+    # Bulk inserts bypass the mapper events that keep the identity cache fresh
+    invalidate_identity()
+
+    errors = sorted(errors + failed, key=lambda e: e["row"])
+    return {
+        "total": len(records),
+        "created": len(valid) - len(failed),
+        "errors": errors,
+    }
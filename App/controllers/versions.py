@@ -0,0 +1,401 @@
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+
+from App.database import db, use_primary
+from App.models import Schedule, Shift, ScheduleVersion
+from App.controllers.calendar import touch_rosters
+from App.controllers.roster_events import Change, publish
+
+# A shift's versioned state: (id, staff_id, start_time, end_time, type),
+# and a schedule's state is a list of them sorted by id
+FIELDS = ("staff_id", "start_time", "end_time", "type")
+
+# Delta masks: which fields of a shift changed, or that it was removed.
+# A shift that is new since the last version has every field bit set.
+STAFF, START, END, TYPE = 1, 2, 4, 8
+ALL = STAFF | START | END | TYPE
+REMOVED = 16
+_BITS = (STAFF, START, END, TYPE)
+
+# Packed delta layout, zlib-compressed: header, length-prefixed type names,
+# then one column per field holding values only for the shifts whose mask has
+# that bit. Type code 0 is a shift with no type; names are coded from 1.
+# Format 1 joined the names with NULs, which can't hold None or "".
+_FORMAT = 2
+_HEADER = struct.Struct("<BII")  # format, shifts, type names
+_NAME = struct.Struct("<I")  # bytes in a type name
+_EPOCH = datetime(1970, 1, 1)
+# Versions between full-state checkpoints, which bounds how many deltas
+# reading any version replays
+CHECKPOINT_EVERY = 20
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _micros(value):
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _little_endian(column):
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def pack_delta(delta):
+    """Pack a delta (rows of (id, mask, staff_id, start_time, end_time, type)) into bytes."""
+    types = sorted({row[5] for row in delta if row[1] & TYPE and row[5] is not None})
+    codes = {name: i for i, name in enumerate(types, start=1)}
+    codes[None] = 0
+    ids, staff, starts, ends, kinds = array("q"), array("q"), array("q"), array("q"), array("H")
+    # Ids and start times are stored as steps from the previous value, and end
+    # times as shift lengths when the start is stored too: repetitive, so
+    # they compress well
+    previous_id = previous_start = 0
+    for shift_id, mask, staff_id, start_time, end_time, kind in delta:
+        ids.append(shift_id - previous_id)
+        previous_id = shift_id
+        if mask & STAFF:
+            staff.append(staff_id or 0)
+        if mask & START:
+            start = _micros(start_time)
+            starts.append(start - previous_start)
+            previous_start = start
+        if mask & END:
+            ends.append(_micros(end_time) - (start if mask & START else 0))
+        if mask & TYPE:
+            kinds.append(codes[kind])
+    names = [name.encode() for name in types]
+    body = [_HEADER.pack(_FORMAT, len(delta), len(names))]
+    body.extend(_NAME.pack(len(name)) + name for name in names)
+    body.append(bytes(row[1] for row in delta))
+    body.extend(_little_endian(column).tobytes() for column in (ids, staff, starts, ends, kinds))
+    return zlib.compress(b"".join(body))
+
+
+def unpack_delta(payload):
+    """The delta rows packed by pack_delta, sorted by shift id."""
+    data = zlib.decompress(payload)
+    fmt, count, names = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    if fmt == 1:
+        # Bytes of NUL-joined names, coded from 0
+        types = data[offset:offset + names].decode().split("\x00") if names else []
+        offset += names
+    elif fmt == _FORMAT:
+        types = [None]
+        for _ in range(names):
+            length, = _NAME.unpack_from(data, offset)
+            offset += _NAME.size
+            types.append(data[offset:offset + length].decode())
+            offset += length
+    else:
+        raise ValueError(f"Unknown schedule version format {fmt}")
+    masks = data[offset:offset + count]
+    offset += count
+
+    def column(typecode, length):
+        nonlocal offset
+        values = array(typecode)
+        values.frombytes(data[offset:offset + length * values.itemsize])
+        offset += length * values.itemsize
+        return iter(_little_endian(values))
+
+    ids = column("q", count)
+    staff = column("q", sum(1 for m in masks if m & STAFF))
+    starts = column("q", sum(1 for m in masks if m & START))
+    ends = column("q", sum(1 for m in masks if m & END))
+    kinds = column("H", sum(1 for m in masks if m & TYPE))
+    delta, shift_id, start = [], 0, 0
+    for mask in masks:
+        shift_id += next(ids)
+        if mask & START:
+            start += next(starts)
+        end = next(ends) + (start if mask & START else 0) if mask & END else None
+        delta.append((
+            shift_id,
+            mask,
+            (next(staff) or None) if mask & STAFF else None,
+            _EPOCH + start * _MICROSECOND if mask & START else None,
+            _EPOCH + end * _MICROSECOND if end is not None else None,
+            types[next(kinds)] if mask & TYPE else None,
+        ))
+    return delta
+
+
+def merge(old, new):
+    """
+    Walk two id-sorted row lists together, yielding (id, old_row, new_row)
+    with None on the side a shift is missing from: O(len(old) + len(new)).
+    """
+    old, new = iter(old), iter(new)
+    a, b = next(old, None), next(new, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a[0], a, None
+            a = next(old, None)
+        elif a is None or b[0] < a[0]:
+            yield b[0], None, b
+            b = next(new, None)
+        else:
+            yield a[0], a, b
+            a, b = next(old, None), next(new, None)
+
+
+def make_delta(old, new):
+    """The delta that turns state old into state new."""
+    delta = []
+    for shift_id, a, b in merge(old, new):
+        if a is None:
+            delta.append((shift_id, ALL) + tuple(b[1:]))
+        elif b is None:
+            delta.append((shift_id, REMOVED, None, None, None, None))
+        else:
+            mask = 0
+            for i, bit in enumerate(_BITS, start=1):
+                if a[i] != b[i]:
+                    mask |= bit
+            if mask:
+                delta.append((shift_id, mask) + tuple(b[i] if mask & bit else None for i, bit in enumerate(_BITS, start=1)))
+    return delta
+
+
+def apply_delta(state, delta):
+    """State with a delta applied, by one merge."""
+    result = []
+    for shift_id, row, change in merge(state, delta):
+        if change is None:
+            result.append(row)
+        elif change[1] & REMOVED:
+            continue
+        elif row is None:
+            result.append((shift_id,) + tuple(change[2:]))
+        else:
+            mask = change[1]
+            result.append((shift_id,) + tuple(
+                change[i + 1] if mask & bit else row[i] for i, bit in enumerate(_BITS, start=1)
+            ))
+    return result
+
+
+def live_state(schedule_id):
+    """The schedule's current shifts as a state, from one projection sorted by id."""
+    query = db.select(Shift.id, Shift.staff_id, Shift.start_time, Shift.end_time, Shift.type) \
+        .where(Shift.schedule_id == schedule_id).order_by(Shift.id)
+    return [tuple(row) for row in db.session.execute(query)]
+
+
+def _history(schedule_id, since=None, until=None):
+    """
+    (number, delta, checkpoint) for the schedule's versions, oldest first,
+    from the last checkpoint at or before version since (default: the last
+    checkpoint) up to version until, from one query. Version 1 always holds
+    the whole state, so it counts as a checkpoint.
+    """
+    start = db.select(db.func.max(ScheduleVersion.number)).where(
+        ScheduleVersion.schedule_id == schedule_id,
+        db.or_(ScheduleVersion.checkpoint, ScheduleVersion.number == 1),
+    )
+    if since is not None:
+        start = start.where(ScheduleVersion.number <= since)
+    query = db.select(ScheduleVersion.number, ScheduleVersion.delta, ScheduleVersion.checkpoint).where(
+        ScheduleVersion.schedule_id == schedule_id,
+        ScheduleVersion.number >= db.func.coalesce(start.scalar_subquery(), 1),
+    )
+    if until is not None:
+        query = query.where(ScheduleVersion.number <= until)
+    return db.session.execute(query.order_by(ScheduleVersion.number)).all()
+
+
+def _base(history):
+    """The number of the checkpoint a history read starts from."""
+    return history[0][0] if history else 0
+
+
+def _replay(history, number=None):
+    """The state at version number (default: the latest), replaying deltas from a checkpoint."""
+    state = []
+    for version, payload, checkpoint in history:
+        if number is not None and version > number:
+            break
+        state = apply_delta([] if checkpoint else state, unpack_delta(payload))
+    return state
+
+
+def _add_version(schedule_id, number, latest, state, created_by, label, base):
+    """
+    Add version number holding latest -> state, unless it would be empty
+    (version 1 never is). It is stored as a checkpoint, holding the whole
+    state, when it is CHECKPOINT_EVERY versions past checkpoint base.
+    """
+    delta = make_delta(latest, state)
+    if number > 1 and not delta:
+        return None
+    checkpoint = number == 1 or number - base >= CHECKPOINT_EVERY
+    version = ScheduleVersion(
+        schedule_id,
+        number,
+        pack_delta(make_delta([], state) if checkpoint else delta),
+        shift_count=len(state),
+        changed=len(delta),
+        created_by=created_by,
+        label=label,
+        checkpoint=checkpoint,
+    )
+    db.session.add(version)
+    return version
+
+
+def record_version(schedule_id, state=None, created_by=None, label=None, history=None):
+    """
+    Add a version holding the changes from the latest version to state (the
+    schedule's live shifts by default). Nothing is added when there are no
+    changes; returns the new ScheduleVersion or None. The caller commits.
+    """
+    history = _history(schedule_id) if history is None else history
+    if state is None:
+        state = live_state(schedule_id)
+    number = history[-1][0] + 1 if history else 1
+    return _add_version(schedule_id, number, _replay(history), state, created_by, label, _base(history))
+
+
+def record_change(schedule_id, before, after, created_by=None, label=None):
+    """
+    Version a bulk change such as an auto-populate run: first the state
+    before it, if that differs from the latest version (edits made since),
+    then the state after, so consecutive versions show exactly what the
+    change did. The caller commits.
+    """
+    history = _history(schedule_id)
+    latest, number, base = _replay(history), history[-1][0] if history else 0, _base(history)
+    version = _add_version(schedule_id, number + 1, latest, before, created_by, f"before {label}", base)
+    if version is not None:
+        latest, number = before, version.number
+        if version.checkpoint:
+            base = version.number
+    return _add_version(schedule_id, number + 1, latest, after, created_by, label, base)
+
+
+def snapshot_schedule(schedule_id, created_by=None, label=None):
+    """Save the schedule's current shifts as a new version, if anything changed since the last."""
+    if db.session.execute(db.select(Schedule.id).where(Schedule.id == schedule_id)).first() is None:
+        raise ValueError("Schedule not found")
+    version = record_version(schedule_id, created_by=created_by, label=label)
+    if version is not None:
+        db.session.commit()
+    return version
+
+
+def list_versions(schedule_id):
+    """The schedule's versions, oldest first, without loading their deltas."""
+    query = db.select(
+        ScheduleVersion.number, ScheduleVersion.created_at, ScheduleVersion.created_by, ScheduleVersion.label,
+        ScheduleVersion.shift_count, ScheduleVersion.changed, db.func.length(ScheduleVersion.delta),
+        ScheduleVersion.checkpoint,
+    ).where(ScheduleVersion.schedule_id == schedule_id).order_by(ScheduleVersion.number)
+    return [{
+        "schedule_id": schedule_id,
+        "version": number,
+        "created_at": created_at.isoformat() if created_at else None,
+        "created_by": created_by,
+        "label": label,
+        "shift_count": shift_count,
+        "changed": changed,
+        "size_bytes": size,
+        "checkpoint": checkpoint,
+    } for number, created_at, created_by, label, shift_count, changed, size, checkpoint in db.session.execute(query)]
+
+
+def _check_version(history, number):
+    if not any(row[0] == number for row in history):
+        raise ValueError(f"Version {number} not found")
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def diff_states(old, new):
+    """Per-shift differences between two states, by one sorted merge."""
+    changes = []
+    for shift_id, a, b in merge(old, new):
+        if a is None:
+            changes.append({"shift_id": shift_id, "change": "added",
+                            "fields": {f: [None, _value(v)] for f, v in zip(FIELDS, b[1:])}})
+        elif b is None:
+            changes.append({"shift_id": shift_id, "change": "removed",
+                            "fields": {f: [_value(v), None] for f, v in zip(FIELDS, a[1:])}})
+        elif a != b:
+            changes.append({"shift_id": shift_id, "change": "changed",
+                            "fields": {f: [_value(x), _value(y)] for f, x, y in zip(FIELDS, a[1:], b[1:]) if x != y}})
+    return changes
+
+
+def diff_versions(schedule_id, old, new=None):
+    """
+    What changed in a schedule from version old to version new (default: its
+    live shifts). Both states come from one read of the version history,
+    from the checkpoint before the earlier of the two.
+    """
+    if new is None:
+        history = _history(schedule_id, since=old, until=old)
+    else:
+        history = _history(schedule_id, since=min(old, new), until=max(old, new))
+    _check_version(history, old)
+    if new is not None:
+        _check_version(history, new)
+    changes = diff_states(_replay(history, old), _replay(history, new) if new is not None else live_state(schedule_id))
+    counts = {kind: sum(1 for c in changes if c["change"] == kind) for kind in ("added", "removed", "changed")}
+    return {"schedule_id": schedule_id, "from": old, "to": new if new is not None else "live",
+            "counts": counts, "changes": changes}
+
+
+def restore_version(schedule_id, number, created_by=None):
+    """
+    Put the schedule's shifts back to version number with one bulk UPDATE by
+    primary key. Shifts deleted since are reported as missing; shifts added
+    since are left alone. The result is saved as a new version, so a restore
+    can itself be undone.
+    """
+    # From the checkpoint before the target to the latest version, which the restore is recorded after
+    history = _history(schedule_id, since=number)
+    _check_version(history, number)
+    target = _replay(history, number)
+    current = live_state(schedule_id)
+
+    updates, owners, events, missing, restored, untracked = [], set(), [], [], [], 0
+    for shift_id, now, then in merge(current, target):
+        if now is None:
+            missing.append(shift_id)
+        elif then is None:
+            restored.append(now)
+            untracked += 1
+        else:
+            restored.append(then)
+            if now != then:
+                updates.append(dict(zip(("id",) + FIELDS, then)))
+                owners.update((now[1], then[1]))
+                if now[1] != then[1]:
+                    events.append(Change("reassigned", shift_id, schedule_id, then[1], now[1]))
+                else:
+                    events.append(Change("changed", shift_id, schedule_id, then[1]))
+
+    use_primary()
+    if updates:
+        db.session.execute(db.update(Shift), updates)
+        # Bulk UPDATEs skip the flush hooks, so mark both owners' calendars
+        # changed and publish the changes here
+        touch_rosters(owners)
+        publish(events)
+    version = record_version(schedule_id, restored, created_by, f"restore v{number}", history)
+    db.session.commit()
+    return {
+        "schedule_id": schedule_id,
+        "restored": number,
+        "version": version.number if version else history[-1][0],
+        "updated": len(updates),
+        "missing": missing,
+        "untracked": untracked,
+    }
@@ -1,14 +1,241 @@
+import itertools
+import os
+import time
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, g, has_request_context, request
+from flask.globals import app_ctx, request_ctx
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+def _session_scope():
+    # One session per request (and so per greenlet under gevent); outside a
+    # request, one per app context as Flask-SQLAlchemy does by default.
+    if has_request_context():
+        return id(request_ctx._get_current_object())
+    return id(app_ctx._get_current_object())
+
+
+# Cookie that pins a client to the primary for a while after it wrote,
+# so it reads its own writes even if the replicas lag behind
+PRIMARY_COOKIE = "db_primary_until"
+_replica_counter = itertools.count()
+
+
+def read_only(view):
+    """Mark a view as safe to serve from a read replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def use_primary():
+    """Route the rest of this request to the primary (it is about to write)."""
+    if has_request_context():
+        g.db_primary = True
+        g.db_wrote = True
+
 
+def _wants_primary():
+    if g.get("db_primary"):
+        return True
+    if request.headers.get("X-Read-Consistency") == "primary" or request.args.get("consistency") == "primary":
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """
+    Sends reads made by @read_only views to a replica engine and everything
+    else (writes, flushes, other views, work outside requests) to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            is_write = self._flushing or getattr(clause, "is_dml", False)
+            if is_write:
+                use_primary()
+            elif g.get("db_read_only") and not _wants_primary():
+                replicas = current_app.extensions.get("replica_engines")
+                if replicas:
+                    return replicas[next(_replica_counter) % len(replicas)]
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"scopefunc": _session_scope, "class_": RoutingSession})
 
 def get_migrate(app):
+    # Alembic is slow to import and only needed for the db commands
+    from flask_migrate import Migrate
     return Migrate(app, db)
 
 def create_db():
     db.create_all()
-    
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that counts checkouts that had to wait and ones that timed out."""
+
+    # Checkouts slower than this are counted as having waited for a connection
+    wait_threshold = 0.001
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = Lock()
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self.stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed > self.wait_threshold:
+                with self.stats_lock:
+                    self.waits += 1
+                    self.wait_time += elapsed
+
+
+def _is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def configure_engine(app):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings. Explicit
+    SQLALCHEMY_ENGINE_OPTIONS entries win over the pool settings.
+    """
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if not _is_memory_sqlite(uri):
+        options.setdefault("poolclass", InstrumentedQueuePool)
+        options.setdefault("pool_size", app.config["DB_POOL_SIZE"])
+        options.setdefault("max_overflow", app.config["DB_MAX_OVERFLOW"])
+        options.setdefault("pool_timeout", app.config["DB_POOL_TIMEOUT"])
+        options.setdefault("pool_recycle", app.config["DB_POOL_RECYCLE"])
+        options.setdefault("pool_pre_ping", app.config["DB_POOL_PRE_PING"])
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def _create_replica_engines(app):
+    """
+    One engine per SQLALCHEMY_REPLICA_URIS entry, with the primary's pool
+    settings. Relative SQLite paths resolve against the instance folder, as
+    Flask-SQLAlchemy does for the primary.
+    """
+    engines = []
+    for uri in app.config["SQLALCHEMY_REPLICA_URIS"]:
+        url = make_url(uri)
+        options = dict(app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+        if _is_memory_sqlite(uri):
+            # Pool settings don't apply to in-memory SQLite
+            options = {}
+        elif url.get_backend_name() == "sqlite" and not os.path.isabs(url.database):
+            url = url.set(database=os.path.join(app.instance_path, url.database))
+        engines.append(create_engine(url, **options))
+    app.extensions["replica_engines"] = engines
+
+
+def make_psycopg_green():
+    """
+    Make psycopg2 cooperate with gevent so a greenlet waiting on Postgres
+    yields instead of blocking the whole worker. Needs the optional psycogreen package.
+    """
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        return False
+    patch_psycopg()
+    return True
+
+
+def pool_stats(engine=None):
+    """Current pool usage: size, checked out/in, overflow, waits and timeouts."""
+    pool = (engine or db.engine).pool
+    stats = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            waits=pool.waits,
+            wait_time_ms=round(pool.wait_time * 1000, 3),
+            timeouts=pool.timeouts,
+        )
+    return stats
+
+
+def run_write(work):
+    """
+    Run work(connection) as a short write transaction. With SQLITE_WRITE_QUEUE
+    on it goes through the serialized writer and is group-committed with
+    other small writes; otherwise it runs on the session and commits.
+    """
+    use_primary()
+    write_queue = current_app.extensions.get("write_queue")
+    if write_queue is None:
+        result = work(db.session.connection())
+        db.session.commit()
+        return result
+    return write_queue.run(work)
+
+
+def _setup_sqlite(app):
+    from App.sqlite_profile import apply_sqlite_pragmas, SQLiteWriteQueue
+    with app.app_context():
+        engine = db.engine
+        engines = list(db.engines.values()) + app.extensions["replica_engines"]
+    if app.config["SQLITE_TUNE"]:
+        for each in engines:
+            if each.dialect.name == "sqlite":
+                apply_sqlite_pragmas(each, app.config)
+    if app.config["SQLITE_WRITE_QUEUE"] and not _is_memory_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+        app.extensions["write_queue"] = SQLiteWriteQueue(
+            engine,
+            max_batch=app.config["SQLITE_WRITE_BATCH"],
+            max_delay=app.config["SQLITE_WRITE_DELAY_MS"] / 1000,
+        )
+
+
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    configure_engine(app)
+    db.init_app(app)
+    _create_replica_engines(app)
+    if make_url(app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() == "sqlite":
+        _setup_sqlite(app)
+
+    # Hand the request's connection back to the pool as soon as it's done
+    @app.teardown_request
+    def remove_session(exc):
+        db.session.remove()
+
+    if app.extensions["replica_engines"]:
+        @app.after_request
+        def pin_writer_to_primary(response):
+            if g.get("db_wrote"):
+                tolerance = app.config["REPLICA_LAG_TOLERANCE"]
+                response.set_cookie(PRIMARY_COOKIE, str(time.time() + tolerance),
+                                    max_age=int(tolerance) + 1, httponly=True)
+            return response
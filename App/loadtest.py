@@ -0,0 +1,355 @@
+"""
+Load-test harness: replays weighted scenarios built from the requests in
+RosterAPI.postman_collection.json against a running app and reports
+throughput, latency percentiles and error rates per endpoint as JSON.
+"""
+import http.client
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+from sqlalchemy import insert
+
+from App.database import db
+from App.models import Schedule, Shift, User
+
+COLLECTION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "RosterAPI.postman_collection.json")
+
+# The collection predates some route and field renames
+ROUTE_MAP = {
+    "/createShift": "/addShift",
+    "/shiftReport": "/scheduleReport",
+    "/staff/roster": "/staff/combinedRoster",
+    "/staff/shift": "/staffshift",
+    "/staff/clock_in": "/staff/clockIn",
+    "/staff/clock_out": "/staff/clockOut",
+}
+FIELD_MAP = {
+    "scheduleName": "name",
+    "scheduleID": "schedule_id",
+    "staffID": "staff_id",
+    "shiftID": "shift_id",
+}
+# Fields the current views need that the collection bodies don't send
+REQUIRED_FIELDS = {
+    "/createSchedule": ("admin_id",),
+    "/addShift": ("admin_id",),
+    "/scheduleReport": ("admin_id", "schedule_id"),
+    "/autoPopulateSchedule": ("admin_id", "schedule_id"),
+    "/staff/clockOut": ("staff_id",),
+}
+# Endpoints the collection doesn't document yet
+EXTRA_REQUESTS = {
+    "Admin: Auto_Populate": {"method": "POST", "path": "/autoPopulateSchedule",
+                             "body": {"strategy_name": "even_distribution"}},
+    "Admin: Attendance_Report": {"method": "GET", "path": "/attendanceReport",
+                                 "query": ("admin_id",), "body": None},
+}
+
+# Scenarios that reassign shifts work on their own schedule so staff keep
+# the shifts they punch in the roster schedule
+Scenario = namedtuple("Scenario", "role weight steps schedule", defaults=("roster",))
+
+SCENARIOS = {
+    # Staff arriving and leaving around a shift change
+    "morning_punch_storm": Scenario("staff", 6, ("Staff: Clock_In", "Staff: Clock_Out")),
+    "staff_roster_check": Scenario("staff", 3, ("Staff: Show_Roster", "getShift")),
+    "admin_report_refresh": Scenario("admin", 2, ("Admin: Shift_Report", "Admin: Shift_Report",
+                                                  "Admin: Attendance_Report")),
+    "auto_populate_burst": Scenario("admin", 1, ("Admin: Create_Shift", "Admin: Auto_Populate",
+                                                 "Admin: Shift_Report"), schedule="burst"),
+}
+
+SEED_PASSWORD = "loadpass"
+
+
+def _walk(items):
+    for item in items:
+        if "item" in item:
+            yield from _walk(item["item"])
+        else:
+            yield item
+
+
+def load_collection(path=COLLECTION):
+    """Requests from the Postman collection by name, mapped onto the current routes."""
+    with open(path) as f:
+        collection = json.load(f)
+    requests = {}
+    for item in _walk(collection["item"]):
+        request = item["request"]
+        url = request["url"] if isinstance(request["url"], str) else request["url"]["raw"]
+        path = urlsplit(url.replace("{{host}}", "http://host")).path
+        raw = (request.get("body") or {}).get("raw", "").strip()
+        body = {FIELD_MAP.get(k, k): v for k, v in json.loads(raw).items()} if raw else None
+        requests.setdefault(item["name"], {
+            "method": request["method"],
+            "path": ROUTE_MAP.get(path, path),
+            "body": body,
+        })
+    for name, request in EXTRA_REQUESTS.items():
+        requests.setdefault(name, request)
+    return requests
+
+
+def seed_database(staff=40, admins=2, shifts_per_staff=5, seed=1):
+    """
+    Create load-test users, a roster schedule of shifts for them and an empty
+    schedule for auto-populate bursts. Users already there from an earlier
+    run are reused. Returns the ids the scenarios need.
+    """
+    from App.controllers.user import bulk_import_users
+    rng = random.Random(seed)
+    records = [{"username": f"load_admin{i}", "password": SEED_PASSWORD, "role": "admin"} for i in range(admins)]
+    records += [{"username": f"load_staff{i}", "password": SEED_PASSWORD, "role": "staff"} for i in range(staff)]
+    bulk_import_users(records)
+    ids = dict(db.session.execute(
+        db.select(User.username, User.id).where(User.username.in_([r["username"] for r in records]))
+    ).all())
+    admin_ids = [ids[f"load_admin{i}"] for i in range(admins)]
+    staff_ids = [ids[f"load_staff{i}"] for i in range(staff)]
+
+    schedule = Schedule(name=f"Load test {seed}", created_by=admin_ids[0])
+    burst = Schedule(name=f"Load test {seed} bursts", created_by=admin_ids[0])
+    db.session.add_all([schedule, burst])
+    db.session.flush()
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    rows = []
+    for staff_id in staff_ids:
+        for day in rng.sample(range(shifts_per_staff * 2), shifts_per_staff):
+            begins = start + timedelta(days=day, hours=rng.choice((0, 8, 16)))
+            rows.append({"staff_id": staff_id, "schedule_id": schedule.id, "start_time": begins,
+                         "end_time": begins + timedelta(hours=8), "type": "day"})
+    db.session.execute(insert(Shift), rows)
+    db.session.commit()
+
+    shifts = {}
+    for shift_id, staff_id in db.session.execute(
+            db.select(Shift.id, Shift.staff_id).where(Shift.schedule_id == schedule.id)):
+        shifts.setdefault(staff_id, []).append(shift_id)
+    return {
+        "admins": [(i, f"load_admin{n}") for n, i in enumerate(admin_ids)],
+        "staff": [(i, f"load_staff{n}", shifts[i]) for n, i in enumerate(staff_ids)],
+        "schedules": {"roster": schedule.id, "burst": burst.id},
+    }
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(pct / 100 * len(ordered)), 1) - 1]
+
+
+class Recorder:
+    """Latencies and statuses per endpoint, shared by all virtual users."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.scenarios = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, status, seconds):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            self.statuses.setdefault(endpoint, Counter())[status] += 1
+
+    def finish_scenario(self, name):
+        with self._lock:
+            self.scenarios[name] += 1
+
+    def _summary(self, latencies, statuses, duration):
+        ordered = sorted(latencies)
+        errors = sum(n for status, n in statuses.items() if not 200 <= status < 400)
+
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+        return {
+            "requests": len(ordered),
+            "errors": errors,
+            "error_rate": round(errors / len(ordered), 4) if ordered else 0,
+            "throughput_rps": round(len(ordered) / duration, 2) if duration else None,
+            "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+            "p50_ms": ms(percentile(ordered, 50)),
+            "p95_ms": ms(percentile(ordered, 95)),
+            "p99_ms": ms(percentile(ordered, 99)),
+            "max_ms": ms(ordered[-1]) if ordered else None,
+            "statuses": {str(s): n for s, n in sorted(statuses.items())},
+        }
+
+    def report(self, duration):
+        endpoints = {name: self._summary(self.latencies[name], self.statuses[name], duration)
+                     for name in sorted(self.latencies)}
+        totals = self._summary([s for values in self.latencies.values() for s in values],
+                               sum(self.statuses.values(), Counter()), duration)
+        return {"totals": totals, "endpoints": endpoints, "scenarios": dict(sorted(self.scenarios.items()))}
+
+
+class VirtualUser:
+    """One client with its own keep-alive connection, logging in lazily per role."""
+
+    def __init__(self, index, base_url, requests, seeded, recorder, seed):
+        self.rng = random.Random(seed * 1000 + index)
+        self.requests = requests
+        self.recorder = recorder
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        admin_id, admin_name = seeded["admins"][index % len(seeded["admins"])]
+        staff_id, staff_name, shift_ids = seeded["staff"][index % len(seeded["staff"])]
+        self.seeded = seeded
+        self.accounts = {"admin": (admin_id, admin_name), "staff": (staff_id, staff_name)}
+        self.shift_ids = shift_ids
+        self.tokens = {}
+
+    def call(self, method, path, body=None, token=None, endpoint=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        # The views read a JSON body even on GET, so always send one
+        payload = json.dumps(body if body is not None else {})
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            data, status = b"", 599
+        self.recorder.record(endpoint or f"{method} {path.split('?')[0]}", status, time.perf_counter() - start)
+        return status, data
+
+    def token(self, role):
+        if role not in self.tokens:
+            login = self.requests["Login"]
+            _, username = self.accounts[role]
+            status, data = self.call(login["method"], login["path"],
+                                     {"username": username, "password": SEED_PASSWORD})
+            self.tokens[role] = json.loads(data)["access_token"] if status == 200 else None
+        return self.tokens[role]
+
+    def context(self, role, schedule):
+        user_id, _ = self.accounts[role]
+        begins = datetime.now() + timedelta(days=self.rng.randint(30, 365), hours=self.rng.choice((0, 8, 16)))
+        values = {
+            "schedule_id": self.seeded["schedules"][schedule],
+            "shift_id": self.rng.choice(self.shift_ids),
+            "start_time": begins.isoformat(),
+            "end_time": (begins + timedelta(hours=8)).isoformat(),
+        }
+        if role == "admin":
+            values["admin_id"] = user_id
+            values["staff_id"] = self.rng.choice(self.seeded["staff"])[0]
+        else:
+            values["staff_id"] = user_id
+        return values
+
+    def run_scenario(self, name, scenario):
+        token = self.token(scenario.role)
+        values = self.context(scenario.role, scenario.schedule)
+        for step in scenario.steps:
+            request = self.requests[step]
+            body = dict(request["body"] or {})
+            for key in body:
+                if key in values:
+                    body[key] = values[key]
+            for key in REQUIRED_FIELDS.get(request["path"], ()):
+                body[key] = values[key]
+            path = request["path"]
+            if request.get("query"):
+                path += "?" + urlencode({key: values[key] for key in request["query"]})
+            self.call(request["method"], path, body, token, endpoint=f"{request['method']} {request['path']}")
+        self.recorder.finish_scenario(name)
+
+    def run(self, iterations, scenarios):
+        names = sorted(scenarios)
+        weights = [scenarios[name].weight for name in names]
+        try:
+            for _ in range(iterations):
+                name = self.rng.choices(names, weights)[0]
+                self.run_scenario(name, scenarios[name])
+        finally:
+            self.connection.close()
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load(base_url, seeded, users=8, iterations=20, seed=1, scenarios=None, collection=COLLECTION):
+    """
+    Run `users` virtual users for `iterations` weighted scenarios each. The
+    scenario mix is fixed by `seed`, so reports from different commits
+    describe the same workload.
+    """
+    scenarios = scenarios or SCENARIOS
+    requests = load_collection(collection)
+    recorder = Recorder()
+    clients = [VirtualUser(i, base_url, requests, seeded, recorder, seed) for i in range(users)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(users) as pool:
+        for future in [pool.submit(client.run, iterations, scenarios) for client in clients]:
+            future.result()
+    duration = time.perf_counter() - started
+
+    report = recorder.report(duration)
+    report["meta"] = {
+        "commit": _commit(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "duration_s": round(duration, 3),
+        "users": users,
+        "iterations": iterations,
+        "seed": seed,
+        "scenarios": {name: dict(s._asdict(), steps=list(s.steps))
+                      for name, s in sorted(scenarios.items())},
+        "python": platform.python_version(),
+    }
+    return report
+
+
+@contextmanager
+def local_server(app):
+    """Serve the app on an ephemeral localhost port for the duration of the block."""
+    from werkzeug.serving import make_server
+    # One access log line per request would swamp the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="loadtest-server", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def compare_reports(old, new):
+    """Per-endpoint change in latency percentiles and error rate between two reports."""
+    changes = {}
+    for endpoint in sorted(set(old["endpoints"]) & set(new["endpoints"])):
+        before, after = old["endpoints"][endpoint], new["endpoints"][endpoint]
+        row = {}
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if before[key] and after[key] is not None:
+                row[key] = {"old": before[key], "new": after[key],
+                            "change_pct": round((after[key] - before[key]) / before[key] * 100, 1)}
+        row["error_rate"] = {"old": before["error_rate"], "new": after["error_rate"]}
+        changes[endpoint] = row
+    return changes
@@ -1,15 +1,18 @@
 import os
+import time
+from contextlib import contextmanager
 from flask import Flask, render_template
-from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
-from flask_cors import CORS
-from werkzeug.utils import secure_filename
-from werkzeug.datastructures import  FileStorage
 
 from App.database import init_db
 from App.config import load_config
+from App.assets import init_assets
+from App.compression import init_compression
+from App.metrics import init_metrics
+from App.query_profile import init_query_profile
 
 
 from App.controllers.auth import setup_jwt, add_auth_context
+from App.controllers.roster_events import init_roster_events
 
 from App.views import views, setup_admin
 
@@ -19,20 +22,75 @@ def add_views(app):
     for view in views:
         app.register_blueprint(view)
 
-def create_app(overrides={}):
-    app = Flask(__name__, static_url_path='/static')
-    load_config(app, overrides)
+# Optional subsystems import their packages lazily so API-only workers
+# that switch them off never pay for the import.
+def setup_cors(app):
+    from flask_cors import CORS
     CORS(app)
-    add_auth_context(app)
+
+def setup_uploads(app):
+    from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
     photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
     configure_uploads(app, photos)
-    add_views(app)
-    init_db(app)
-    jwt = setup_jwt(app)
-    setup_admin(app)
+
+@contextmanager
+def _timed(timings, component):
+    start = time.perf_counter()
+    yield
+    timings[component] = (time.perf_counter() - start) * 1000
+
+def report_startup(app, timings):
+    """Log how long each startup component took (lazy imports included)."""
+    total = sum(timings.values())
+    lines = [f"  {name:<12} {ms:8.2f} ms" for name, ms in sorted(timings.items(), key=lambda t: -t[1])]
+    app.logger.warning("Startup profile (%.2f ms total):\n%s", total, "\n".join(lines))
+
+def create_app(overrides={}):
+    timings = {}
+    with _timed(timings, 'config'):
+        app = Flask(__name__, static_url_path='/static')
+        load_config(app, overrides)
+    if app.config['COMPRESS_ENABLED']:
+        # First, so its after_request hook runs last, on the final body
+        with _timed(timings, 'compression'):
+            init_compression(app)
+    if app.config['ENABLE_CORS']:
+        with _timed(timings, 'cors'):
+            setup_cors(app)
+    if app.config['METRICS_ENABLED']:
+        with _timed(timings, 'metrics'):
+            init_metrics(app)
+    with _timed(timings, 'auth'):
+        add_auth_context(app)
+    if app.config['ENABLE_UPLOADS']:
+        with _timed(timings, 'uploads'):
+            setup_uploads(app)
+    with _timed(timings, 'views'):
+        add_views(app)
+    if app.config['ASSETS_ENABLED']:
+        with _timed(timings, 'assets'):
+            init_assets(app)
+    with _timed(timings, 'database'):
+        init_db(app)
+    with _timed(timings, 'roster_events'):
+        init_roster_events(app)
+    if app.config['QUERY_PROFILE_ENABLED']:
+        with _timed(timings, 'query_profile'):
+            init_query_profile(app)
+    with _timed(timings, 'jwt'):
+        jwt = setup_jwt(app)
+    if app.config['ENABLE_ADMIN_UI']:
+        with _timed(timings, 'admin_ui'):
+            setup_admin(app)
     @jwt.invalid_token_loader
     @jwt.unauthorized_loader
     def custom_unauthorized_response(error):
         return render_template('401.html', error=error), 401
-    app.app_context().push()
-    return app
\ No newline at end of file
+    app.extensions['startup_timings'] = timings
+    if app.config['STARTUP_PROFILE']:
+        report_startup(app, timings)
+    # Convenient for the CLI and tests; gunicorn workers turn it off so
+    # nothing can fall back to a process-wide context and session
+    if app.config['PUSH_APP_CONTEXT']:
+        app.app_context().push()
+    return app
@@ -0,0 +1,260 @@
+import json
+import os
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, request
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram. Per-worker and unlocked: under gevent a bucket
+    increment never yields, so nothing can interleave with it."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, counts=None, total=0.0, count=0):
+        self.counts = counts or [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = total
+        self.count = count
+
+    def observe(self, seconds):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def merge(self, other):
+        for i, value in enumerate(other.counts):
+            self.counts[i] += value
+        self.sum += other.sum
+        self.count += other.count
+
+
+class Metrics:
+    """Counters for one worker process."""
+
+    def __init__(self):
+        self.latency = {}     # endpoint -> Histogram
+        self.statuses = {}    # (endpoint, status) -> count
+        self.in_flight = {}   # endpoint -> gauge
+        self.strategies = {}  # strategy name -> Histogram
+        self.compression = {}  # (endpoint, encoding) -> [responses, bytes in, bytes out, seconds]
+        self._next_flush = 0.0
+
+    def observe_request(self, endpoint, status, seconds):
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency[endpoint] = Histogram()
+        histogram.observe(seconds)
+        key = (endpoint, status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def observe_strategy(self, name, seconds):
+        histogram = self.strategies.get(name)
+        if histogram is None:
+            histogram = self.strategies[name] = Histogram()
+        histogram.observe(seconds)
+
+    def observe_compression(self, endpoint, encoding, size, compressed, seconds):
+        totals = self.compression.get((endpoint, encoding))
+        if totals is None:
+            totals = self.compression[(endpoint, encoding)] = [0, 0, 0, 0.0]
+        totals[0] += 1
+        totals[1] += size
+        totals[2] += compressed
+        totals[3] += seconds
+
+    def snapshot(self, pool=None):
+        return {
+            "latency": {k: [h.counts, h.sum, h.count] for k, h in self.latency.items()},
+            "statuses": [[e, s, c] for (e, s), c in self.statuses.items()],
+            "in_flight": dict(self.in_flight),
+            "strategies": {k: [h.counts, h.sum, h.count] for k, h in self.strategies.items()},
+            "compression": [[e, enc] + totals for (e, enc), totals in self.compression.items()],
+            "pool": pool or {},
+        }
+
+
+def get_metrics():
+    metrics = current_app.extensions.get("metrics")
+    if metrics is None:
+        metrics = current_app.extensions["metrics"] = Metrics()
+    return metrics
+
+
+def observe_strategy(name, seconds):
+    """Record how long a scheduling strategy took."""
+    get_metrics().observe_strategy(name, seconds)
+
+
+def _pool_snapshot():
+    from App.database import pool_stats
+    try:
+        return pool_stats()
+    except Exception:
+        return {}
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def clear_snapshots(directory):
+    """Delete the snapshot files workers wrote to directory, and nothing else there."""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith("metrics-") and (name.endswith(".json") or name.endswith(".json.tmp")):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def flush(metrics, directory):
+    """Write this worker's counters where the other workers can read them."""
+    path = _snapshot_path(directory, os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(metrics.snapshot(_pool_snapshot()), f)
+    os.replace(tmp, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """
+    This worker's live counters plus the last snapshot of every other worker.
+    Counters of workers that have exited are kept; their gauges are dropped.
+    """
+    metrics = get_metrics()
+    snapshots = [metrics.snapshot(_pool_snapshot())]
+    directory = current_app.config["METRICS_DIR"]
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if not (name.startswith("metrics-") and name.endswith(".json")):
+                continue
+            pid = int(name[len("metrics-"):-len(".json")])
+            if pid == os.getpid():
+                continue
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _alive(pid):
+                snapshot["in_flight"], snapshot["pool"] = {}, {}
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def _merge(snapshots):
+    latency, statuses, in_flight, strategies, compression, pool = {}, {}, {}, {}, {}, {}
+    for snapshot in snapshots:
+        for target, source in ((latency, snapshot["latency"]), (strategies, snapshot["strategies"])):
+            for key, (counts, total, count) in source.items():
+                target.setdefault(key, Histogram()).merge(Histogram(counts, total, count))
+        for endpoint, status, count in snapshot["statuses"]:
+            statuses[(endpoint, status)] = statuses.get((endpoint, status), 0) + count
+        # Snapshots written before compression was counted don't have it
+        for endpoint, encoding, *values in snapshot.get("compression", []):
+            totals = compression.setdefault((endpoint, encoding), [0, 0, 0, 0.0])
+            for i, value in enumerate(values):
+                totals[i] += value
+        for endpoint, value in snapshot["in_flight"].items():
+            in_flight[endpoint] = in_flight.get(endpoint, 0) + value
+        for key, value in snapshot["pool"].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                pool[key] = pool.get(key, 0) + value
+    return latency, statuses, in_flight, strategies, compression, pool
+
+
+def _histogram_lines(name, label, histograms):
+    lines = [f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, value in zip(LATENCY_BUCKETS + (float("inf"),), histogram.counts):
+            cumulative += value
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.sum}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+    return lines
+
+
+def render_prometheus():
+    """All workers' metrics in the Prometheus text exposition format."""
+    latency, statuses, in_flight, strategies, compression, pool = _merge(collect())
+    lines = _histogram_lines("http_request_duration_seconds", "endpoint", latency)
+    lines.append("# TYPE http_requests_total counter")
+    for (endpoint, status), count in sorted(statuses.items()):
+        lines.append(f'http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+    lines.append("# TYPE http_requests_in_flight gauge")
+    for endpoint, value in sorted(in_flight.items()):
+        lines.append(f'http_requests_in_flight{{endpoint="{endpoint}"}} {value}')
+    lines += _histogram_lines("schedule_strategy_duration_seconds", "strategy", strategies)
+    for i, (metric, kind) in enumerate((
+        ("http_responses_compressed_total", "counter"),
+        ("http_response_compression_input_bytes_total", "counter"),
+        ("http_response_compression_output_bytes_total", "counter"),
+        ("http_response_compression_seconds_total", "counter"),
+    )):
+        lines.append(f"# TYPE {metric} {kind}")
+        for (endpoint, encoding), totals in sorted(compression.items()):
+            lines.append(f'{metric}{{endpoint="{endpoint}",encoding="{encoding}"}} {totals[i]}')
+    for key, value in sorted(pool.items()):
+        metric = f"db_pool_{key}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app):
+    """Time every request per endpoint and count statuses and in-flight requests."""
+    interval = app.config["METRICS_FLUSH_SECONDS"]
+    directory = app.config["METRICS_DIR"]
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    @app.before_request
+    def start_timer():
+        metrics = get_metrics()
+        endpoint = request.endpoint or "none"
+        metrics.in_flight[endpoint] = metrics.in_flight.get(endpoint, 0) + 1
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return response
+        metrics = get_metrics()
+        endpoint = request.endpoint or "none"
+        metrics.in_flight[endpoint] -= 1
+        metrics.observe_request(endpoint, response.status_code, time.perf_counter() - start)
+        if directory:
+            now = time.monotonic()
+            if now >= metrics._next_flush:
+                metrics._next_flush = now + interval
+                flush(metrics, directory)
+        return response
+
+    @app.teardown_request
+    def release_in_flight(exc):
+        # after_request doesn't run when a view raises
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            metrics = get_metrics()
+            endpoint = request.endpoint or "none"
+            metrics.in_flight[endpoint] -= 1
+            metrics.observe_request(endpoint, 500, time.perf_counter() - start)
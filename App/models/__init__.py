@@ -2,5 +2,7 @@ from App.models.user import User
 from App.models.admin import Admin
 from App.models.staff import Staff
 from App.models.schedule import Schedule
-from App.models.shift import Shift 
-
+from App.models.shift import Shift
+from App.models.token_session import TokenSession
+from App.models.schedule_version import ScheduleVersion
+from App.models.roster_event import RosterEvent
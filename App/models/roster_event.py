@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from App.database import db
+
+class RosterEvent(db.Model):
+    """
+    One change to a shift, written in the same transaction as the change so
+    every worker can push it to the staff and schedule views it concerns
+    (see App.controllers.roster_events). Rows are pruned after a while.
+    """
+
+    __table_args__ = (
+        # Replays after a reconnect read one staff member's or schedule's events past an id
+        db.Index("ix_roster_event_staff", "staff_id", "id"),
+        db.Index("ix_roster_event_old_staff", "old_staff_id", "id"),
+        db.Index("ix_roster_event_schedule", "schedule_id", "id"),
+        # Streams resume from an id, so ids must never be reused after pruning
+        {"sqlite_autoincrement": True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # added, reassigned, changed, clocked, removed, or resync (reload everything)
+    kind = db.Column(db.String(10), nullable=False)
+    # Not foreign keys: events outlive the shifts they describe
+    shift_id = db.Column(db.Integer, nullable=True)
+    schedule_id = db.Column(db.Integer, nullable=True)
+    staff_id = db.Column(db.Integer, nullable=True)
+    # The previous owner of a reassigned shift
+    old_staff_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, index=True,
+                           default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
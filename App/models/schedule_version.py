@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from App.database import db
+
+class ScheduleVersion(db.Model):
+    """
+    One saved state of a schedule's shifts. Only the per-shift changes since
+    the previous version are stored, packed column by column (see
+    App.controllers.versions), so a version costs bytes per changed shift.
+    Checkpoints (version 1 and every so often after) hold the whole state,
+    so reading a version never replays more than the deltas since one.
+    """
+
+    # A schedule's versions are numbered 1, 2, ... and read back in order
+    __table_args__ = (db.UniqueConstraint("schedule_id", "number", name="uq_schedule_version_number"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey("schedule.id"), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    # What produced it, e.g. "auto_populate:even_distribution" or "restore v2"
+    label = db.Column(db.String(100), nullable=True)
+
+    # Shifts in the schedule at this version, and shifts changed since the last one
+    shift_count = db.Column(db.Integer, nullable=False, default=0)
+    changed = db.Column(db.Integer, nullable=False, default=0)
+    delta = db.Column(db.LargeBinary, nullable=False)
+    checkpoint = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    schedule = db.relationship(
+        "Schedule",
+        backref=db.backref("versions", lazy=True, cascade="all, delete-orphan", order_by="ScheduleVersion.number"),
+    )
+
+    def __init__(self, schedule_id, number, delta, shift_count, changed, created_by=None, label=None, checkpoint=False):
+        self.schedule_id = schedule_id
+        self.number = number
+        self.delta = delta
+        self.checkpoint = checkpoint
+        self.shift_count = shift_count
+        self.changed = changed
+        self.created_by = created_by
+        self.label = label
+
+    def get_json(self):
+        return {
+            "schedule_id": self.schedule_id,
+            "version": self.number,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "created_by": self.created_by,
+            "label": self.label,
+            "shift_count": self.shift_count,
+            "changed": self.changed,
+            "size_bytes": len(self.delta),
+            "checkpoint": self.checkpoint,
+        }
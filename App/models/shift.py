@@ -3,16 +3,19 @@ from App.database import db
 
 class Shift(db.Model):
 
+    # Per-staff date-window lookups (calendar feeds, rosters) use this index
+    __table_args__ = (db.Index("ix_shift_staff_start", "staff_id", "start_time"),)
+
     id = db.Column(db.Integer, primary_key=True)
 
-    # Who the shift belongs to
-    staff_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # Who the shift belongs to; None for an open shift (e.g. cloned without staff)
+    staff_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
 
     # Which schedule this shift is part of
-    schedule_id = db.Column(db.Integer, db.ForeignKey("schedule.id"), nullable=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey("schedule.id"), nullable=True, index=True)
 
     # Time range for the shift
-    start_time = db.Column(db.DateTime, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False, index=True)
     end_time = db.Column(db.DateTime, nullable=False)
 
     #day or night shift
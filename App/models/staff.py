@@ -12,6 +12,11 @@ class Staff(User):
     #Foreign key referring to User Class
     id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
 
+    # SHA-256 of the secret in the staff member's calendar feed URL
+    calendar_token_hash = db.Column(db.String(64), nullable=True, unique=True)
+    # When a shift shown in the calendar feed last changed (UTC)
+    roster_changed_at = db.Column(db.DateTime, nullable=True)
+
     __mapper_args__ = {
         "polymorphic_identity": "staff",
     }
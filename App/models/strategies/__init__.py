@@ -3,10 +3,13 @@ from .schedule_strategy import ScheduleStrategy
 from .even_distribution import EvenDistributionStrategy
 from .minimize_days import MinimizeDaysStrategy
 from .balance_day_night import BalanceDayNightStrategy
+from .records import StaffRecord, ShiftRecord
 
 __all__ = [
     "ScheduleStrategy",
     "EvenDistributionStrategy",
     "MinimizeDaysStrategy",
-    "BalanceDayNightStrategy"
+    "BalanceDayNightStrategy",
+    "StaffRecord",
+    "ShiftRecord"
 ]
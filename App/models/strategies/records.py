@@ -0,0 +1,22 @@
+from collections import namedtuple
+
+# Lightweight rows for strategies, built from column projections instead of
+# full ORM objects (no password hashes, no identity map, no change tracking)
+
+StaffRecord = namedtuple("StaffRecord", "id")
+
+
+class ShiftRecord:
+    """A shift as strategies see it; staff_id is the only field they change."""
+
+    __slots__ = ("id", "staff_id", "type", "start_time", "end_time")
+
+    def __init__(self, id, staff_id, type, start_time, end_time):
+        self.id = id
+        self.staff_id = staff_id
+        self.type = type
+        self.start_time = start_time
+        self.end_time = end_time
+
+    def __repr__(self):
+        return f"ShiftRecord(id={self.id}, staff_id={self.staff_id}, type={self.type!r})"
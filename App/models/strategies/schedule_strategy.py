@@ -6,3 +6,20 @@ class ScheduleStrategy(ABC):
     @abstractmethod
     def generate(self, staff_list, shift_list):
         pass
+
+    def run(self, staff_list, shift_list, profile=None):
+        """
+        generate(), recorded as the "assign" phase of an App.profiling.Profile
+        with the staff, shift and reassigned-shift counts when one is given.
+        """
+        if profile is None:
+            return self.generate(staff_list, shift_list)
+        before = [shift.staff_id for shift in shift_list]
+        with profile.phase("assign"):
+            result = self.generate(staff_list, shift_list)
+        profile.count(
+            staff=len(staff_list),
+            shifts=len(shift_list),
+            reassigned=sum(1 for shift, old in zip(shift_list, before) if shift.staff_id != old),
+        )
+        return result
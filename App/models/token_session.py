@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+from App.database import db
+
+class TokenSession(db.Model):
+    """
+    One issued access token, keyed by its JWT jti.
+    A user may hold several at once (one per device); logging out revokes them.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    # Null when the token never expires
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def __init__(self, jti, user_id, expires_at=None):
+        self.jti = jti
+        self.user_id = user_id
+        self.expires_at = expires_at
+
+    @property
+    def is_revoked(self):
+        return self.revoked_at is not None
+
+    def get_json(self):
+        return {
+            "jti": self.jti,
+            "user_id": self.user_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+            "revoked": self.is_revoked,
+        }
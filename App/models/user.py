@@ -9,13 +9,12 @@ class User(db.Model):
     # username (string): unique for login
     # password (string): hashed password
     # role (string): Role of user (staff/admin)
-    # active_token (string): optional for authentication
+    # sessions: issued tokens are tracked in TokenSession, keyed by jti
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(20), nullable=False, unique=True)
     password = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(10), nullable=False)
-    active_token = db.Column(db.String, nullable=True)
 
     __mapper_args__ = {
         "polymorphic_identity": "user",
@@ -0,0 +1,132 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+
+CAPTURES = ("cprofile", "tracemalloc")
+PROFILE_HEADER = "X-Profile"
+
+
+def _parse(value):
+    return {part.strip().lower() for part in (value or "").split(",") if part.strip()}
+
+
+def requested_captures():
+    """
+    Captures turned on by PROFILE_CAPTURE, or for this request by the
+    X-Profile header (e.g. "cprofile,tracemalloc") when PROFILE_ALLOW_HEADER is set.
+    """
+    captures = _parse(current_app.config["PROFILE_CAPTURE"])
+    if has_request_context() and current_app.config["PROFILE_ALLOW_HEADER"]:
+        captures |= _parse(request.headers.get(PROFILE_HEADER))
+    return captures & set(CAPTURES)
+
+
+class Profile:
+    """Phase timings and counts for one operation, plus optional cProfile/tracemalloc captures."""
+
+    def __init__(self, name, captures=()):
+        self.name = name
+        self.captures = set(captures)
+        self.phases = {}
+        self.counts = {}
+        self.results = {}
+        self.saved_to = None
+        self._profiler = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.phases[name] = round(self.phases.get(name, 0) + elapsed, 3)
+
+    def count(self, **counts):
+        self.counts.update(counts)
+
+    @contextmanager
+    def capture(self, top=25):
+        """Run the block under the requested captures."""
+        tracing = "tracemalloc" in self.captures
+        started_tracing = tracing and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        if "cprofile" in self.captures:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        try:
+            yield self
+        finally:
+            if self._profiler is not None:
+                self._profiler.disable()
+                self.results["cprofile"] = self._top_functions(top)
+            if tracing:
+                after = tracemalloc.take_snapshot()
+                self.results["tracemalloc"] = {
+                    "peak_kb": round(tracemalloc.get_traced_memory()[1] / 1024, 1),
+                    "top": [
+                        {"line": str(stat.traceback[0]), "size_kb": round(stat.size_diff / 1024, 1),
+                         "count": stat.count_diff}
+                        for stat in after.compare_to(before, "lineno")[:top]
+                    ],
+                }
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def _top_functions(self, top):
+        stats = pstats.Stats(self._profiler)
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:top]
+        return [
+            {"function": f"{os.path.basename(path)}:{line}({func})", "calls": calls,
+             "tottime_ms": round(tottime * 1000, 3), "cumtime_ms": round(cumtime * 1000, 3)}
+            for (path, line, func), (_, calls, tottime, cumtime, _) in rows
+        ]
+
+    def summary(self):
+        summary = {
+            "name": self.name,
+            "phases_ms": dict(self.phases),
+            "total_ms": round(sum(self.phases.values()), 3),
+            "counts": dict(self.counts),
+        }
+        summary.update(self.results)
+        if self.saved_to:
+            summary["saved_to"] = self.saved_to
+        return summary
+
+    def server_timing(self):
+        """The phases as a Server-Timing header value."""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.phases.items())
+
+    def save(self, directory):
+        """Write the summary as JSON, and the raw cProfile stats for snakeviz/pstats."""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"{self.name}-{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}")
+        with open(f"{stem}.json", "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        if self._profiler is not None:
+            self._profiler.dump_stats(f"{stem}.pstats")
+        return stem
+
+    def publish(self):
+        """Log the timings, save captures to PROFILE_DIR and make the profile visible to the view."""
+        summary = self.summary()
+        current_app.logger.info("%s profile %s", self.name, json.dumps(
+            {key: summary[key] for key in ("phases_ms", "total_ms", "counts")}))
+        directory = current_app.config["PROFILE_DIR"]
+        if self.captures and directory:
+            self.saved_to = self.save(directory)
+        if has_request_context():
+            g.profile = self
+        return self
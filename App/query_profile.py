@@ -0,0 +1,128 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Query collectors opened with record_queries(); a ContextVar so each
+# request (thread or greenlet) only sees its own
+_collectors = ContextVar("query_collectors", default=())
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|%s)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+|%s)\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement):
+    """
+    The shape of a statement: literals and IN lists collapsed, so the same
+    query issued for different rows gets the same fingerprint.
+    """
+    shape = _LITERALS.sub("?", statement)
+    shape = _PARAM_LISTS.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """Queries issued during one request (or one record_queries() block)."""
+
+    __slots__ = ("count", "time", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.time += seconds
+        self.shapes[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes issued more than threshold times: likely N+1s."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+@contextmanager
+def record_queries():
+    """Collect the queries issued inside the block, including by requests made through a test client."""
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        for stats in _collectors.get():
+            stats.record(statement, elapsed)
+        if has_request_context():
+            stats = g.get("_query_stats")
+            if stats is not None:
+                stats.record(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_failed_query(context):
+        # A failed statement never reaches after_cursor_execute; drop its start
+        # so the next statement on this pooled connection isn't timed from it
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts and context.statement is not None:
+            starts.pop()
+
+
+def init_query_profile(app):
+    """
+    Count queries and DB time per request, warn about statement shapes that
+    repeat more than QUERY_N_PLUS_ONE_THRESHOLD times, and in debug mode (or
+    with QUERY_PROFILE_HEADERS) report the figures in response headers.
+    """
+    from App.database import db
+    with app.app_context():
+        engines = list(db.engines.values()) + app.extensions["replica_engines"]
+    for engine in engines:
+        instrument_engine(engine)
+
+    threshold = app.config["QUERY_N_PLUS_ONE_THRESHOLD"]
+    top = app.config["QUERY_LOG_TOP"]
+    headers = app.debug or app.config["QUERY_PROFILE_HEADERS"]
+
+    @app.before_request
+    def start_query_stats():
+        g._query_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop("_query_stats", None)
+        if stats is None:
+            return response
+        repeated = stats.repeated(threshold)
+        if repeated:
+            app.logger.warning(
+                "Possible N+1 in %s: %d queries in %.1f ms\n%s",
+                request.endpoint, stats.count, stats.time * 1000,
+                "\n".join(f"  {n:>4}x {shape}" for shape, n in repeated[:top]),
+            )
+        elif stats.count:
+            app.logger.debug(
+                "%s: %d queries in %.1f ms, top shapes: %s",
+                request.endpoint, stats.count, stats.time * 1000, stats.shapes.most_common(top),
+            )
+        if headers:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Query-Time-Ms"] = f"{stats.time * 1000:.2f}"
+            if repeated:
+                response.headers["X-DB-N-Plus-One"] = str(len(repeated))
+        return response
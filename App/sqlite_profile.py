@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy import event
+
+
+def apply_sqlite_pragmas(engine, config):
+    """
+    Tune every new SQLite connection for concurrent use by several workers:
+    WAL lets readers run alongside the writer, and busy_timeout makes a
+    writer wait for the lock instead of failing with "database is locked".
+    """
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class SQLiteWriteQueue:
+    """
+    Serializes small write transactions through one writer thread and groups
+    whatever is queued together into a single commit. Each unit of work is a
+    callable taking a Connection; submit() returns a Future with its result.
+    If a batch fails, its units are retried one transaction each so only the
+    failing unit reports the error.
+    """
+
+    def __init__(self, engine, max_batch=64, max_delay=0.002):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self.retries = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, work):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((work, future))
+        return future
+
+    def run(self, work, timeout=None):
+        return self.submit(work).result(timeout)
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {"batches": self.batches, "writes": self.writes, "retries": self.retries,
+                "pending": self._queue.qsize()}
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+                    self._thread.start()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [item for item in self._collect(first) if not item[1].cancelled()]
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            with self.engine.begin() as connection:
+                results = [work(connection) for work, _ in batch]
+        except Exception:
+            self.retries += 1
+            for work, future in batch:
+                try:
+                    with self.engine.begin() as connection:
+                        future.set_result(work(connection))
+                except Exception as e:
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        self.batches += 1
+        self.writes += len(batch)
@@ -145,6 +145,24 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // --- Get Report ---
+    async function loadReport(scheduleId) {
+        try {
+            // Use query parameters
+            const url = `/scheduleReport?admin_id=${CURRENT_USER_ID}&schedule_id=${scheduleId}`;
+            const response = await fetch(url);
+            const data = await response.json();
+
+            if (response.ok) {
+                displayReport(data);
+            } else {
+                M.toast({ html: data.error || 'Error fetching report', classes: 'red' });
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            M.toast({ html: 'Network error', classes: 'red' });
+        }
+    }
+
     const getReportBtn = document.getElementById('getReportBtn');
     if (getReportBtn) {
         getReportBtn.addEventListener('click', async () => {
@@ -153,47 +171,58 @@ document.addEventListener('DOMContentLoaded', function () {
                 M.toast({ html: 'Please enter a Schedule ID', classes: 'red' });
                 return;
             }
-
-            try {
-                // Use query parameters
-                const url = `/scheduleReport?admin_id=${CURRENT_USER_ID}&schedule_id=${scheduleId}`;
-                const response = await fetch(url);
-                const data = await response.json();
-
-                if (response.ok) {
-                    displayReport(data);
-                } else {
-                    M.toast({ html: data.error || 'Error fetching report', classes: 'red' });
-                }
-            } catch (error) {
-                console.error('Error:', error);
-                M.toast({ html: 'Network error', classes: 'red' });
-            }
+            await loadReport(scheduleId);
         });
     }
 
+    let scheduleEvents = null; // stream for the schedule in the report
+
+    function reportRow(shift) {
+        const row = document.createElement('tr');
+        row.dataset.id = shift.id;
+        row.innerHTML = `
+            <td>${shift.id}</td>
+            <td>${shift.staff_id ?? ''}</td>
+            <td>${new Date(shift.start_time).toLocaleString()}</td>
+            <td>${new Date(shift.end_time).toLocaleString()}</td>
+            <td>${shift.type}</td>
+        `;
+        return row;
+    }
+
     function displayReport(data) {
         const resultDiv = document.getElementById('reportResult');
         const tbody = document.getElementById('reportTableBody');
         tbody.innerHTML = '';
 
         if (data.shifts && data.shifts.length > 0) {
-            data.shifts.forEach(shift => {
-                const row = `
-                    <tr>
-                        <td>${shift.id}</td>
-                        <td>${shift.staff_id}</td>
-                        <td>${new Date(shift.start_time).toLocaleString()}</td>
-                        <td>${new Date(shift.end_time).toLocaleString()}</td>
-                        <td>${shift.type}</td>
-                    </tr>
-                `;
-                tbody.innerHTML += row;
-            });
+            data.shifts.forEach(shift => tbody.appendChild(reportRow(shift)));
             resultDiv.style.display = 'block';
+            followSchedule(data.id);
         } else {
             M.toast({ html: 'No shifts found for this schedule', classes: 'orange' });
             resultDiv.style.display = 'none';
         }
     }
+
+    // Keep the report current with pushed changes instead of re-fetching it
+    function followSchedule(scheduleId) {
+        if (scheduleEvents) scheduleEvents.close();
+        if (!window.EventSource) return;
+        scheduleEvents = new EventSource(`/scheduleEvents?admin_id=${CURRENT_USER_ID}&schedule_id=${scheduleId}`);
+        const tbody = document.getElementById('reportTableBody');
+        const upsert = (e) => {
+            const shift = JSON.parse(e.data);
+            const row = reportRow(shift);
+            const existing = tbody.querySelector(`tr[data-id="${shift.id}"]`);
+            if (existing) existing.replaceWith(row);
+            else tbody.appendChild(row);
+        };
+        ['added', 'reassigned', 'changed', 'clocked'].forEach(kind => scheduleEvents.addEventListener(kind, upsert));
+        scheduleEvents.addEventListener('removed', (e) => {
+            const existing = tbody.querySelector(`tr[data-id="${JSON.parse(e.data).id}"]`);
+            if (existing) existing.remove();
+        });
+        scheduleEvents.addEventListener('resync', () => loadReport(scheduleId));
+    }
 });
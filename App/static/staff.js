@@ -2,10 +2,48 @@ document.addEventListener('DOMContentLoaded', function () {
     var modalElems = document.querySelectorAll('.modal');
     var modalInstances = M.Modal.init(modalElems);
 
-    loadShifts();
-
     let selectedShiftId = null;
     let actionType = null; // 'in' or 'out'
+    const cards = new Map(); // shift id -> card element
+
+    // Events that arrive while the roster is loading are applied after it
+    let loaded = loadShifts();
+    followRoster();
+
+    function renderCard(shift) {
+        const shiftDate = new Date(shift.start_time);
+        const endDate = new Date(shift.end_time);
+
+        const card = document.createElement('div');
+        card.className = 'col s12 m6 l4 animate-fade-in';
+        card.dataset.start = shift.start_time;
+        card.innerHTML = `
+            <div class="card">
+                <div class="card-content">
+                    <span class="card-title">${shift.type.toUpperCase()} Shift</span>
+                    <p><i class="material-icons tiny">event</i> ${shiftDate.toLocaleDateString()}</p>
+                    <p><i class="material-icons tiny">access_time</i> ${shiftDate.toLocaleTimeString()} - ${endDate.toLocaleTimeString()}</p>
+                    <div class="mt-4 center-align" style="margin-top: 20px;">
+                        <button class="btn waves-effect waves-light green darken-1 clock-btn" 
+                            data-id="${shift.id}" data-action="in">
+                            Clock In
+                        </button>
+                        <button class="btn waves-effect waves-light red darken-1 clock-btn" 
+                            data-id="${shift.id}" data-action="out" style="margin-left: 10px;">
+                            Clock Out
+                        </button>
+                    </div>
+                </div>
+            </div>
+        `;
+        return card;
+    }
+
+    function showEmpty(container) {
+        if (cards.size === 0) {
+            container.innerHTML = '<p class="center-align grey-text">No shifts assigned.</p>';
+        }
+    }
 
     async function loadShifts() {
         const container = document.getElementById('shiftsContainer');
@@ -15,53 +53,14 @@ document.addEventListener('DOMContentLoaded', function () {
             const shifts = await response.json();
 
             container.innerHTML = '';
-
-            if (shifts.length === 0) {
-                container.innerHTML = '<p class="center-align grey-text">No shifts assigned.</p>';
-                return;
-            }
+            cards.clear();
 
             shifts.forEach(shift => {
-                const shiftDate = new Date(shift.start_time);
-                const endDate = new Date(shift.end_time);
-
-                const card = document.createElement('div');
-                card.className = 'col s12 m6 l4 animate-fade-in';
-                card.innerHTML = `
-                    <div class="card">
-                        <div class="card-content">
-                            <span class="card-title">${shift.type.toUpperCase()} Shift</span>
-                            <p><i class="material-icons tiny">event</i> ${shiftDate.toLocaleDateString()}</p>
-                            <p><i class="material-icons tiny">access_time</i> ${shiftDate.toLocaleTimeString()} - ${endDate.toLocaleTimeString()}</p>
-                            <div class="mt-4 center-align" style="margin-top: 20px;">
-                                <button class="btn waves-effect waves-light green darken-1 clock-btn" 
-                                    data-id="${shift.id}" data-action="in">
-                                    Clock In
-                                </button>
-                                <button class="btn waves-effect waves-light red darken-1 clock-btn" 
-                                    data-id="${shift.id}" data-action="out" style="margin-left: 10px;">
-                                    Clock Out
-                                </button>
-                            </div>
-                        </div>
-                    </div>
-                `;
+                const card = renderCard(shift);
+                cards.set(shift.id, card);
                 container.appendChild(card);
             });
-
-            // Attach event listeners
-            document.querySelectorAll('.clock-btn').forEach(btn => {
-                btn.addEventListener('click', (e) => {
-                    selectedShiftId = e.target.dataset.id;
-                    actionType = e.target.dataset.action;
-
-                    const modal = M.Modal.getInstance(document.getElementById('clockModal'));
-                    document.getElementById('modalTitle').innerText = actionType === 'in' ? 'Clock In' : 'Clock Out';
-                    document.getElementById('actionText').innerText = actionType === 'in' ? 'clock in' : 'clock out';
-                    document.getElementById('shiftDetails').innerText = `Shift ID: ${selectedShiftId}`;
-                    modal.open();
-                });
-            });
+            showEmpty(container);
 
         } catch (error) {
             console.error('Error:', error);
@@ -69,6 +68,58 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
+    // Apply pushed roster changes instead of reloading the whole roster
+    function upsertShift(shift) {
+        const container = document.getElementById('shiftsContainer');
+        const card = renderCard(shift);
+        const existing = cards.get(shift.id);
+        if (existing) {
+            existing.replaceWith(card);
+        } else {
+            if (cards.size === 0) container.innerHTML = '';
+            // Keep cards in start time order
+            const later = [...cards.values()].find(c => c.dataset.start > shift.start_time);
+            container.insertBefore(card, later || null);
+        }
+        cards.set(shift.id, card);
+    }
+
+    function removeShift(shiftId) {
+        const card = cards.get(shiftId);
+        if (card) {
+            card.remove();
+            cards.delete(shiftId);
+            showEmpty(document.getElementById('shiftsContainer'));
+        }
+    }
+
+    function followRoster() {
+        if (!window.EventSource) return;
+        // The browser reconnects by itself and resumes from the last event it saw
+        const source = new EventSource('/staff/rosterEvents');
+        const apply = (handler) => (e) => {
+            const data = JSON.parse(e.data);
+            loaded = loaded.then(() => handler(data));
+        };
+        ['added', 'changed', 'clocked'].forEach(kind => source.addEventListener(kind, apply(upsertShift)));
+        source.addEventListener('removed', apply(data => removeShift(data.id)));
+        source.addEventListener('resync', () => { loaded = loaded.then(loadShifts); });
+    }
+
+    // One listener for every card, including ones added by pushed events
+    document.getElementById('shiftsContainer').addEventListener('click', (e) => {
+        const btn = e.target.closest('.clock-btn');
+        if (!btn) return;
+        selectedShiftId = btn.dataset.id;
+        actionType = btn.dataset.action;
+
+        const modal = M.Modal.getInstance(document.getElementById('clockModal'));
+        document.getElementById('modalTitle').innerText = actionType === 'in' ? 'Clock In' : 'Clock Out';
+        document.getElementById('actionText').innerText = actionType === 'in' ? 'clock in' : 'clock out';
+        document.getElementById('shiftDetails').innerText = `Shift ID: ${selectedShiftId}`;
+        modal.open();
+    });
+
     document.getElementById('confirmClockBtn').addEventListener('click', async () => {
         if (!selectedShiftId || !actionType) return;
 
@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+
+import pytest
+
+from App.query_profile import record_queries
+
+
+@pytest.fixture
+def query_budget(request):
+    """
+    Context manager asserting the block issues at most max_queries queries
+    and repeats no statement shape more than repeat_limit times (an N+1).
+    On unittest classes (via usefixtures) it is also set as self.query_budget.
+    """
+    @contextmanager
+    def budget(max_queries, repeat_limit=3):
+        with record_queries() as stats:
+            yield stats
+        details = "\n".join(f"  {n:>4}x {shape}" for shape, n in stats.shapes.most_common())
+        assert stats.count <= max_queries, \
+            f"{stats.count} queries, budget is {max_queries}:\n{details}"
+        repeated = stats.repeated(repeat_limit)
+        assert not repeated, f"statement repeated more than {repeat_limit} times (N+1):\n{details}"
+
+    if request.instance is not None:
+        request.instance.query_budget = budget
+    return budget
@@ -0,0 +1,90 @@
+"""
+Tests for the Flask-Admin list views over the large user and shift tables.
+"""
+import re
+import unittest
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift, Staff
+from App.controllers.seed import seed_organization
+from App.query_profile import record_queries
+from App.views.admin import ShiftView, UserView, indexed_columns
+
+
+class AdminViewTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_admin_views.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        seed_organization(staff=20, schedules=2, shifts=120, seed=1, prefix="adm", password="pass")
+        self.client = self.app.test_client()
+        response = self.client.post('/login', json={'username': 'adm_admin', 'password': 'pass'})
+        self.headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+        self.client.get('/admin/shift/', headers=self.headers)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def shift_ids(self, html):
+        return [int(i) for i in re.findall(r'name="id" type="hidden" value="(\d+)"', html)]
+
+    def test_shift_list_pages_by_keyset_without_counting(self):
+        with record_queries() as stats:
+            response = self.client.get('/admin/shift/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        html = response.get_data(as_text=True)
+        ids = self.shift_ids(html)
+        self.assertEqual(ids, list(range(120, 70, -1)))
+        self.assertIn("adm_staff", html)
+        self.assertIn("~120 rows", html)
+        self.assertFalse(any("count(" in shape.lower() for shape in stats.shapes))
+        # Staff and schedule are joined in, not lazy loaded per row
+        self.assertLessEqual(max(stats.shapes.values()), 1)
+
+        older = re.search(r'href="([^"]*after=71[^"]*)"', html).group(1).replace("&amp;", "&")
+        html = self.client.get(older, headers=self.headers).get_data(as_text=True)
+        self.assertEqual(self.shift_ids(html), list(range(70, 20, -1)))
+
+    def test_filtered_list_follows_the_cursor_without_an_estimate(self):
+        staff_id = db.session.execute(db.select(Shift.staff_id).limit(1)).scalar()
+        response = self.client.get(f'/admin/shift/?flt0_0={staff_id}&after=1000', headers=self.headers)
+        html = response.get_data(as_text=True)
+        expected = db.session.execute(
+            db.select(Shift.id).where(Shift.staff_id == staff_id).order_by(Shift.id.desc())).scalars().all()
+        self.assertEqual(self.shift_ids(html), expected)
+        self.assertNotIn("rows</p>", html)
+
+    def test_user_lists_leave_out_passwords(self):
+        for url in ('/admin/user/', '/admin/staff/', '/admin/admins/'):
+            html = self.client.get(url, headers=self.headers).get_data(as_text=True)
+            self.assertIn("adm_", html)
+            self.assertNotIn("scrypt:", html)
+            self.assertNotIn("pbkdf2:", html)
+        form = UserView(Staff, db.session, endpoint='staff_form').get_edit_form()
+        self.assertTrue(hasattr(form, 'username'))
+        self.assertFalse(hasattr(form, 'password'))
+        self.assertFalse(hasattr(form, 'shifts'))
+
+    def test_only_indexed_columns_sort_and_filter(self):
+        indexed = indexed_columns(Shift)
+        self.assertTrue({'id', 'staff_id', 'schedule_id', 'start_time'} <= indexed)
+        self.assertNotIn('type', indexed)
+
+        class TypeSortView(ShiftView):
+            column_sortable_list = ('id', 'type')
+            column_filters = ('type', 'start_time')
+
+        view = TypeSortView(Shift, db.session, endpoint='type_sort')
+        self.assertEqual(view.column_sortable_list, ('id',))
+        self.assertEqual(view.column_filters, ('start_time',))
+
+
+if __name__ == '__main__':
+    unittest.main()
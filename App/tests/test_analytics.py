@@ -0,0 +1,114 @@
+"""
+Tests for the SQL-computed attendance analytics.
+"""
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift, clone_schedule, get_attendance_report
+from App.controllers.analytics import attendance_summary
+
+
+class AttendanceAnalyticsTests(unittest.TestCase):
+    """Attendance figures are aggregated in the database."""
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_analytics.db'
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+        self.admin = create_user("analytics_admin", "pass", "admin")
+        self.staff1 = create_user("analytics_staff1", "pass", "staff")
+        self.staff2 = create_user("analytics_staff2", "pass", "staff")
+        self.schedule = create_schedule(self.admin.id, "Attendance")
+
+        self.day = datetime(2024, 1, 8, 8, 0)
+        # staff1: 15 minutes late, stays 30 minutes over
+        late = add_shift(self.admin.id, self.staff1.id, self.schedule.id,
+                         self.day, self.day + timedelta(hours=8))
+        late.clock_in = self.day + timedelta(minutes=15)
+        late.clock_out = self.day + timedelta(hours=8, minutes=45)
+        # staff1: no-show
+        add_shift(self.admin.id, self.staff1.id, self.schedule.id,
+                  self.day + timedelta(days=1), self.day + timedelta(days=1, hours=8))
+        # staff2: on time, leaves an hour early
+        early = add_shift(self.admin.id, self.staff2.id, self.schedule.id,
+                          self.day, self.day + timedelta(hours=8))
+        early.clock_in = self.day
+        early.clock_out = self.day + timedelta(hours=7)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_per_staff_summary(self):
+        report = attendance_summary("staff")
+        rows = {row["staff"]: row for row in report["rows"]}
+
+        first = rows[self.staff1.id]
+        self.assertEqual(first["label"], "analytics_staff1")
+        self.assertEqual(first["shifts"], 2)
+        self.assertEqual(first["late"], 1)
+        self.assertEqual(first["no_shows"], 1)
+        self.assertAlmostEqual(first["avg_minutes_late"], 15, places=1)
+        self.assertAlmostEqual(first["overtime_minutes"], 30, places=1)
+
+        second = rows[self.staff2.id]
+        self.assertEqual(second["late"], 0)
+        self.assertEqual(second["early_leaves"], 1)
+        self.assertEqual(second["overtime_minutes"], 0)
+
+    def test_date_range_and_day_grouping(self):
+        report = attendance_summary("day", start=self.day, end=self.day + timedelta(days=1))
+        self.assertEqual(len(report["rows"]), 1)
+        self.assertEqual(report["rows"][0]["shifts"], 2)
+
+    def test_open_shifts_count_per_schedule_and_day(self):
+        copy = clone_schedule(self.admin.id, self.schedule.id, timedelta(days=14), keep_staff=False)
+        by_schedule = {row["schedule"]: row for row in attendance_summary("schedule")["rows"]}
+        self.assertEqual(by_schedule[copy["schedule_id"]]["shifts"], 3)
+        self.assertEqual(by_schedule[copy["schedule_id"]]["no_shows"], 3)
+        later = self.day + timedelta(days=14)
+        report = attendance_summary("day", start=later, end=later + timedelta(days=2))
+        self.assertEqual([row["shifts"] for row in report["rows"]], [2, 1])
+        # Per staff member, they have no one to count against
+        self.assertEqual(sum(row["shifts"] for row in attendance_summary("staff")["rows"]), 3)
+
+    def test_closed_period_is_cached(self):
+        end = self.day + timedelta(days=7)
+        first = attendance_summary("schedule", start=self.day, end=end)
+        self.assertIs(first, attendance_summary("schedule", start=self.day, end=end))
+
+    def test_writes_to_a_closed_period_refresh_its_report(self):
+        start, end = self.day - timedelta(days=7), self.day + timedelta(days=7)
+        self.assertEqual(len(attendance_summary("day", start=start, end=end)["rows"]), 2)
+        # A clone moved into the past backfills the cached period
+        clone_schedule(self.admin.id, self.schedule.id, timedelta(days=-7), keep_staff=False)
+        rows = attendance_summary("day", start=start, end=end)["rows"]
+        self.assertEqual([row["shifts"] for row in rows], [2, 1, 2, 1])
+
+        no_show = db.session.scalar(db.select(Shift).where(Shift.start_time == self.day + timedelta(days=1)))
+        no_show.clock_in = no_show.start_time
+        db.session.commit()
+        rows = attendance_summary("day", start=start, end=end)["rows"]
+        self.assertEqual(rows[3]["no_shows"], 0)
+
+    def test_invalid_group_by(self):
+        with self.assertRaises(ValueError):
+            attendance_summary("month")
+
+    def test_report_requires_admin(self):
+        with self.assertRaises(PermissionError):
+            get_attendance_report(self.staff1.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ Tests the actual Flask routes to ensure views work correctly with refactored con
 """
 import unittest
 import json
+import pytest
 from datetime import datetime, timedelta, timezone
 from App.main import create_app
 from App.database import db, create_db
@@ -447,5 +448,135 @@ class APIResponseFormatTests(unittest.TestCase):
         self.assertIsInstance(json_data['upcoming_shift_count'], int)
 
 
+@pytest.mark.usefixtures("query_budget")
+class APIQueryBudgetTests(unittest.TestCase):
+    """Query budgets per endpoint: counts must not grow with the number of rows."""
+
+    STAFF = 8
+    SHIFTS_PER_STAFF = 3
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_api_budget.db',
+            'JWT_SECRET_KEY': 'test-secret-key',
+            'QUERY_PROFILE_HEADERS': True
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+        self.admin = create_user("budget_admin", "admin123", "admin")
+        self.staff = [create_user(f"budget_staff{i}", "staff123", "staff") for i in range(self.STAFF)]
+        self.schedule = create_schedule(self.admin.id, "Budget Schedule", user_id=self.staff[0].id)
+        start = datetime.now() - timedelta(hours=1)
+        self.shifts = [
+            add_shift(self.admin.id, member.id, self.schedule.id,
+                      start + timedelta(days=day), start + timedelta(days=day, hours=8))
+            for member in self.staff for day in range(self.SHIFTS_PER_STAFF)
+        ]
+        self.admin_id, self.schedule_id = self.admin.id, self.schedule.id
+        self.staff_id, self.shift_id = self.staff[0].id, self.shifts[0].id
+        self.admin_headers = self.auth_headers("budget_admin", "admin123")
+        self.staff_headers = self.auth_headers("budget_staff0", "staff123")
+        # The first authenticated request also syncs the token revocation cache
+        self.client.get('/allshifts', json={}, headers=self.staff_headers)
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def auth_headers(self, username, password):
+        response = self.client.post('/login', json={'username': username, 'password': password})
+        return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    def test_schedule_report_budget(self):
+        with self.query_budget(2):
+            response = self.client.get(
+                f'/scheduleReport?admin_id={self.admin_id}&schedule_id={self.schedule_id}',
+                json={}, headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['shifts']), self.STAFF * self.SHIFTS_PER_STAFF)
+        self.assertNotIn('X-DB-N-Plus-One', response.headers)
+
+    def test_attendance_report_budget(self):
+        with self.query_budget(1):
+            response = self.client.get(f'/attendanceReport?admin_id={self.admin_id}',
+                                       headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_all_shifts_budget(self):
+        with self.query_budget(1):
+            response = self.client.get('/allshifts', json={}, headers=self.staff_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_combined_roster_budget(self):
+        with self.query_budget(1):
+            response = self.client.get('/staff/combinedRoster', json={}, headers=self.staff_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_my_schedules_budget(self):
+        with self.query_budget(1):
+            response = self.client.get(f'/staff/mySchedules?staff_id={self.staff_id}',
+                                       json={}, headers=self.staff_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff_shift_budget(self):
+        with self.query_budget(2):
+            response = self.client.get('/staffshift', json={'shift_id': self.shift_id},
+                                       headers=self.staff_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_clock_in_and_out_budget(self):
+        # Each punch also records a roster event for the live dashboards
+        with self.query_budget(5):
+            response = self.client.post('/staff/clockIn', json={'shift_id': self.shift_id},
+                                        headers=self.staff_headers)
+        self.assertEqual(response.status_code, 200)
+        with self.query_budget(5):
+            response = self.client.post('/staff/clockOut',
+                                        json={'staff_id': self.staff_id, 'shift_id': self.shift_id},
+                                        headers=self.staff_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_schedule_budget(self):
+        with self.query_budget(3):
+            response = self.client.post('/createSchedule',
+                                        json={'admin_id': self.admin_id, 'name': 'Another'},
+                                        headers=self.admin_headers)
+        self.assertEqual(response.status_code, 201)
+
+    def test_add_shift_budget(self):
+        start = datetime.now() + timedelta(days=10)
+        with self.query_budget(8):
+            response = self.client.post('/addShift', json={
+                'admin_id': self.admin_id,
+                'staff_id': self.staff_id,
+                'schedule_id': self.schedule_id,
+                'start_time': start.isoformat(),
+                'end_time': (start + timedelta(hours=8)).isoformat()
+            }, headers=self.admin_headers)
+        self.assertEqual(response.status_code, 201)
+
+    def test_auto_populate_budget(self):
+        # Includes reading the version history and, on a first run, saving
+        # the schedule as it was before as well as after, and the roster events
+        with self.query_budget(9):
+            response = self.client.post('/autoPopulateSchedule', json={
+                'admin_id': self.admin_id,
+                'schedule_id': self.schedule_id,
+                'strategy_name': 'even_distribution'
+            }, headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_users_budget(self):
+        with self.query_budget(2):
+            response = self.client.get('/api/users', headers=self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for the static asset build and how its files are served.
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from flask import url_for
+from App.main import create_app
+from App.assets import build_assets, fingerprint
+
+STATIC = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+
+
+class AssetBuildTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="assets-")
+        self.static = os.path.join(self.dir, "static")
+        os.makedirs(os.path.join(self.static, "img"))
+        with open(os.path.join(self.static, "app.js"), "w") as f:
+            f.write("console.log('roster');\n" * 40)
+        with open(os.path.join(self.static, "tiny.css"), "w") as f:
+            f.write("a{}")
+        with open(os.path.join(self.static, "img", "logo.png"), "wb") as f:
+            f.write(b"\x89PNG" * 100)
+        self.build = os.path.join(self.static, "dist")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def manifest(self):
+        with open(os.path.join(self.build, "manifest.json")) as f:
+            return json.load(f)
+
+    def test_build_fingerprints_and_compresses(self):
+        totals = build_assets(self.static, self.build)
+        self.assertEqual(totals["files"], 3)
+        manifest = self.manifest()
+        with open(os.path.join(self.static, "app.js"), "rb") as f:
+            source = f.read()
+        self.assertEqual(manifest["app.js"], f"app.{fingerprint(source)}.js")
+        self.assertEqual(manifest["img/logo.png"].rsplit(".", 2)[0], "img/logo")
+        with gzip.open(os.path.join(self.build, manifest["app.js"] + ".gz")) as f:
+            self.assertEqual(f.read(), source)
+        # Too small to be worth it, or not text
+        self.assertFalse(os.path.exists(os.path.join(self.build, manifest["tiny.css"] + ".gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.build, manifest["img/logo.png"] + ".gz")))
+
+    def test_rebuild_drops_stale_files(self):
+        build_assets(self.static, self.build)
+        old = self.manifest()["app.js"]
+        with open(os.path.join(self.static, "app.js"), "a") as f:
+            f.write("console.log('changed');\n")
+        build_assets(self.static, self.build)
+        new = self.manifest()["app.js"]
+        self.assertNotEqual(old, new)
+        self.assertFalse(os.path.exists(os.path.join(self.build, old)))
+        self.assertFalse(os.path.exists(os.path.join(self.build, old + ".gz")))
+        # The previous build inside the static folder is not fingerprinted again
+        self.assertEqual(set(self.manifest()), {"app.js", "tiny.css", "img/logo.png"})
+
+
+class AssetServingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.build = tempfile.mkdtemp(prefix="assets-")
+        build_assets(STATIC, self.build)
+        self.app = create_app({'TESTING': True, 'ASSETS_BUILD_DIR': self.build})
+        self.client = self.app.test_client()
+        with open(os.path.join(self.build, "manifest.json")) as f:
+            self.manifest = json.load(f)
+
+    def tearDown(self):
+        shutil.rmtree(self.build)
+
+    def test_url_for_resolves_hashed_names(self):
+        with self.app.test_request_context():
+            self.assertEqual(url_for('static', filename='staff.js'), f"/static/dist/{self.manifest['staff.js']}")
+            self.assertEqual(url_for('static', filename='missing.js'), "/static/missing.js")
+
+    def test_hashed_files_are_immutable_and_precompressed(self):
+        url = f"/static/dist/{self.manifest['admin.js']}"
+        with open(os.path.join(STATIC, "admin.js"), "rb") as f:
+            source = f.read()
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('javascript', response.mimetype)
+        self.assertEqual(gzip.decompress(response.data), source)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        cache = response.cache_control
+        self.assertTrue(cache.public and cache.immutable)
+        self.assertEqual(cache.max_age, 365 * 24 * 3600)
+        response.close()
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, source)
+        response.close()
+
+    def test_files_outside_the_build_are_served_as_before(self):
+        response = self.client.get('/static/style.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.cache_control.immutable)
+        response.close()
+        self.assertEqual(self.client.get('/static/dist/nope.1234.js').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
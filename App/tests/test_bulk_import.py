@@ -0,0 +1,92 @@
+"""
+Tests for bulk user import.
+"""
+import unittest
+import json
+from werkzeug.security import check_password_hash
+from flask_jwt_extended import create_access_token
+from App.main import create_app
+from App.database import db, create_db
+from App.models import User, Staff, Admin
+from App.controllers.user import create_user, bulk_import_users, parse_user_records, hash_passwords
+
+
+class BulkImportTests(unittest.TestCase):
+    """Bulk import creates rows in chunks and reports bad rows."""
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_bulk_import.db',
+            'JWT_SECRET_KEY': 'test-secret-key'
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_parse_csv_and_jsonl(self):
+        csv_records = parse_user_records("username,password,role\nann,pw,staff\n", "csv")
+        self.assertEqual(csv_records, [{"username": "ann", "password": "pw", "role": "staff"}])
+
+        jsonl_records = parse_user_records('{"username": "ann", "password": "pw"}\nnot json\n', "jsonl")
+        self.assertEqual(jsonl_records[0]["username"], "ann")
+        self.assertIn("_error", jsonl_records[1])
+
+    def test_import_creates_polymorphic_rows(self):
+        create_user("taken", "pw", "staff")
+        records = [
+            {"username": "s1", "password": "pw1", "role": "staff"},
+            {"username": "a1", "password": "pw2", "role": "admin"},
+            {"username": "u1", "password": "pw3", "role": "user"},
+            {"username": "s1", "password": "pw4", "role": "staff"},
+            {"username": "taken", "password": "pw5", "role": "staff"},
+            {"username": "bad", "password": "pw6", "role": "ceo"},
+            {"username": "", "password": "pw7"},
+        ]
+        result = bulk_import_users(records, chunk_size=2)
+
+        self.assertEqual(result["total"], 7)
+        self.assertEqual(result["created"], 3)
+        self.assertEqual([e["row"] for e in result["errors"]], [4, 5, 6, 7])
+
+        staff = Staff.query.filter_by(username="s1").one()
+        self.assertTrue(staff.check_password("pw1"))
+        self.assertIsInstance(db.session.get(User, Admin.query.filter_by(username="a1").one().id), Admin)
+
+    def test_malformed_rows_are_reported_per_row(self):
+        records = parse_user_records('[1, 2]\n"abc"\n{"username": 123, "password": "pw"}\n'
+                                     '{"username": "ok", "password": ["pw"]}\n{"username": "ok", "password": "pw"}\n',
+                                     "jsonl")
+        result = bulk_import_users(records)
+        self.assertEqual(result["created"], 1)
+        self.assertEqual([e["row"] for e in result["errors"]], [1, 2, 3, 4])
+
+    def test_pooled_hashing(self):
+        passwords = [f"pw{i}" for i in range(40)]
+        hashes = hash_passwords(passwords, workers=2)
+        self.assertEqual(len(hashes), 40)
+        self.assertTrue(check_password_hash(hashes[7], "pw7"))
+
+    def test_import_endpoint_requires_admin(self):
+        admin = create_user("importer", "pw", "admin")
+        staff = create_user("worker", "pw", "staff")
+        body = "username,password,role\nnew1,pw,staff\nnew2,pw,admin\n"
+
+        response = self.client.post('/api/users/import', data=body,
+            headers={'Authorization': f'Bearer {create_access_token(identity=staff)}'})
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post('/api/users/import', data=body, content_type='text/csv',
+            headers={'Authorization': f'Bearer {create_access_token(identity=admin)}'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.data)["created"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tests for the per-staff iCalendar feed.
+"""
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift
+from App.controllers.calendar import issue_calendar_token, _fold
+from App.controllers.schedule_controller import ScheduleController
+from App.query_profile import record_queries
+
+
+class CalendarFeedTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_calendar.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.admin = create_user("cal_admin", "pass", "admin").id
+        self.staff = create_user("cal_staff", "pass", "staff").id
+        self.other = create_user("cal_other", "pass", "staff").id
+        self.schedule = create_schedule(self.admin, "Ward, East").id
+        today = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+        self.upcoming = add_shift(self.admin, self.staff, self.schedule,
+                                  today + timedelta(days=1), today + timedelta(days=1, hours=8)).id
+        # Years back: outside the feed window
+        self.old = add_shift(self.admin, self.staff, self.schedule,
+                             today - timedelta(days=800), today - timedelta(days=800, hours=-8)).id
+        add_shift(self.admin, self.other, self.schedule, today, today + timedelta(hours=8))
+        self.client = self.app.test_client()
+        self.url = f'/staff/calendar/{issue_calendar_token(self.staff)}.ics'
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_feed_lists_the_staff_members_shifts_in_the_window(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/calendar')
+        body = response.get_data(as_text=True)
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertIn(f"UID:shift-{self.upcoming}@", body)
+        self.assertNotIn(f"UID:shift-{self.old}@", body)
+        self.assertEqual(body.count("BEGIN:VEVENT"), 1)
+        self.assertIn("SUMMARY:Day shift (Ward\\, East)", body)
+
+    def test_unchanged_feed_revalidates_without_rendering(self):
+        first = self.client.get(self.url)
+        etag = first.headers['ETag']
+        with record_queries() as stats:
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(stats.count, 1)
+        response = self.client.get(self.url, headers={'If-Modified-Since': first.headers['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+        # A repeat fetch is served from the cache: just the token lookup
+        with record_queries() as stats:
+            self.assertEqual(self.client.get(self.url).get_data(), first.get_data())
+        self.assertEqual(stats.count, 1)
+
+    def test_shift_changes_invalidate_only_that_staff_members_feed(self):
+        etag = self.client.get(self.url).headers['ETag']
+        other_url = f'/staff/calendar/{issue_calendar_token(self.other)}.ics'
+        other_etag = self.client.get(other_url).headers['ETag']
+
+        shift = db.session.get(Shift, self.upcoming)
+        shift.end_time += timedelta(hours=1)
+        db.session.commit()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.client.get(other_url, headers={'If-None-Match': other_etag}).status_code, 304)
+
+        # Clocking in doesn't change the calendar
+        etag = response.headers['ETag']
+        shift.clock_in = datetime.now()
+        db.session.commit()
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_shifts_added_through_the_api_change_the_feed(self):
+        etag = self.client.get(self.url).headers['ETag']
+        login = self.client.post('/login', json={'username': 'cal_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        start = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=3)
+        response = self.client.post('/addShift', headers=headers, json={
+            'admin_id': self.admin, 'staff_id': self.staff, 'schedule_id': self.schedule,
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=8)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True).count("BEGIN:VEVENT"), 2)
+
+    def test_auto_populate_reassignments_change_both_feeds(self):
+        etag = self.client.get(self.url).headers['ETag']
+        other_url = f'/staff/calendar/{issue_calendar_token(self.other)}.ics'
+        other_etag = self.client.get(other_url).headers['ETag']
+        ScheduleController.auto_populate(self.schedule, "even_distribution")
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+        self.assertEqual(self.client.get(other_url, headers={'If-None-Match': other_etag}).status_code, 200)
+
+    def test_token_is_issued_by_the_api_and_rotation_revokes_the_old_url(self):
+        login = self.client.post('/login', json={'username': 'cal_staff', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        response = self.client.post('/staff/calendarToken', json={}, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        url = response.get_json()['url']
+        self.assertTrue(url.endswith('.ics'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_long_lines_are_folded(self):
+        line = "SUMMARY:" + "x" * 200
+        folded = _fold(line)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in folded.split("\r\n")))
+        self.assertEqual(folded.replace("\r\n ", ""), line)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Tests for response compression: negotiation, per-endpoint levels, streamed
+bodies and the compression metrics.
+"""
+import gzip
+import json
+import unittest
+import zlib
+from datetime import datetime, timedelta
+from flask import Response, jsonify, request
+from werkzeug.http import is_resource_modified, parse_accept_header
+from App.main import create_app
+from App.compression import compression, negotiate
+from App.metrics import get_metrics, render_prometheus
+
+START = datetime(2025, 3, 3, 9)
+ROWS = [{"id": i, "staff_id": i % 7, "start_time": (START + timedelta(hours=i)).isoformat(),
+         "end_time": (START + timedelta(hours=i + 8)).isoformat(), "type": "day"} for i in range(200)]
+
+
+class NegotiationTests(unittest.TestCase):
+
+    def test_client_quality_then_server_preference(self):
+        encodings = ["zstd", "br", "gzip"]
+        self.assertEqual(negotiate(parse_accept_header("gzip, deflate, br"), encodings), "br")
+        self.assertEqual(negotiate(parse_accept_header("br;q=0.5, gzip"), encodings), "gzip")
+        self.assertEqual(negotiate(parse_accept_header("*"), encodings), "zstd")
+        self.assertEqual(negotiate(parse_accept_header("br, zstd"), ["gzip"]), None)
+        self.assertEqual(negotiate(parse_accept_header("gzip;q=0"), encodings), None)
+        self.assertEqual(negotiate(parse_accept_header(""), encodings), None)
+
+
+class CompressionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_compression.db',
+            'COMPRESS_ENCODINGS': ['gzip'],
+            'COMPRESS_ENDPOINT_LEVELS': {'skipped': False},
+        })
+        app = self.app
+
+        @app.route('/test/rows')
+        def rows():
+            return jsonify(ROWS)
+
+        @app.route('/test/small')
+        def small():
+            return jsonify({"ok": True})
+
+        @app.route('/test/fast')
+        @compression(gzip=1)
+        def fast():
+            return jsonify(ROWS)
+
+        @app.route('/test/off')
+        @compression(False)
+        def off():
+            return jsonify(ROWS)
+
+        @app.route('/test/skipped')
+        def skipped():
+            return jsonify(ROWS)
+
+        @app.route('/test/tagged')
+        def tagged():
+            response = jsonify(ROWS)
+            response.set_etag("v1")
+            if not is_resource_modified(request.environ, etag="v1"):
+                return Response(status=304)
+            return response
+
+        @app.route('/test/events')
+        def events():
+            return Response((f"data: {json.dumps(row)}\n\n" for row in ROWS[:3]), mimetype="text/event-stream")
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def get(self, url, encoding="gzip, deflate, br", **headers):
+        return self.client.get(url, headers=dict(headers, **{'Accept-Encoding': encoding}))
+
+    def test_large_responses_are_compressed(self):
+        response = self.get('/test/rows')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertEqual(json.loads(gzip.decompress(response.data)), ROWS)
+        self.assertLess(len(response.data) * 5, len(json.dumps(ROWS)))
+
+        plain = self.get('/test/rows', encoding='identity')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.get_json(), ROWS)
+        small = self.get('/test/small')
+        self.assertNotIn('Content-Encoding', small.headers)
+        self.assertIn('Accept-Encoding', small.headers['Vary'])
+
+    def test_levels_per_endpoint(self):
+        # The gzip header's XFL byte records the level: 4 for the fastest, 0 for the default
+        self.assertEqual(self.get('/test/rows').data[8], 0)
+        self.assertEqual(self.get('/test/fast').data[8], 4)
+        self.assertNotIn('Content-Encoding', self.get('/test/off').headers)
+        self.assertNotIn('Content-Encoding', self.get('/test/skipped').headers)
+
+    def test_compressed_etags_are_weak(self):
+        response = self.get('/test/tagged')
+        self.assertEqual(response.headers['ETag'], 'W/"v1"')
+        self.assertEqual(self.get('/test/tagged', **{'If-None-Match': 'W/"v1"'}).status_code, 304)
+
+    def test_streams_are_compressed_message_by_message(self):
+        response = self.get('/test/events')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        decompressor = zlib.decompressobj(31)
+        chunks = iter(response.response)
+        # Each message can be read as soon as its chunk arrives
+        for row in ROWS[:3]:
+            self.assertEqual(decompressor.decompress(next(chunks)).decode(), f"data: {json.dumps(row)}\n\n")
+        decompressor.decompress(b"".join(chunks))
+        self.assertTrue(decompressor.eof)
+        response.close()
+
+        (count, size, compressed, seconds), = [totals for (endpoint, encoding), totals
+                                               in get_metrics().compression.items() if endpoint == 'events']
+        self.assertEqual((count, size), (1, len("".join(f"data: {json.dumps(row)}\n\n" for row in ROWS[:3]))))
+        self.assertGreater(compressed, 0)
+
+    def test_ratios_are_counted_per_endpoint(self):
+        self.get('/test/rows')
+        self.get('/test/rows')
+        count, size, compressed, seconds = get_metrics().compression[('rows', 'gzip')]
+        self.assertEqual((count, size), (2, 2 * len(self.get('/test/rows', encoding='identity').data)))
+        self.assertGreater(size / compressed, 5)
+        self.assertIn('http_response_compression_output_bytes_total{endpoint="rows",encoding="gzip"}',
+                      render_prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
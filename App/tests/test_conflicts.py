@@ -0,0 +1,144 @@
+"""
+Tests for shift conflict validation and the schedule conflict sweep.
+"""
+import random
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift
+from App.controllers.conflicts import Interval, ShiftConflictError, find_conflicts, schedule_conflicts
+from App.query_profile import record_queries
+
+H = timedelta(hours=1)
+
+
+class ConflictValidationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_conflicts.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.admin = create_user("conf_admin", "pass", "admin").id
+        self.staff = create_user("conf_staff", "pass", "staff").id
+        self.schedule = create_schedule(self.admin, "Week").id
+        self.other_schedule = create_schedule(self.admin, "Other").id
+        self.start = datetime(2025, 6, 2, 9)
+        self.first = add_shift(self.admin, self.staff, self.schedule, self.start, self.start + 8 * H).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add(self, start, end, schedule=None):
+        return add_shift(self.admin, self.staff, schedule or self.schedule, start, end)
+
+    def test_rejects_empty_and_overlong_ranges(self):
+        with self.assertRaisesRegex(ValueError, "after start_time"):
+            self.add(self.start + 30 * H, self.start + 30 * H)
+        with self.assertRaisesRegex(ValueError, "at most 24 hours"):
+            self.add(self.start + 30 * H, self.start + 60 * H)
+
+    def test_rejects_overlaps_with_one_query(self):
+        with record_queries() as stats:
+            with self.assertRaises(ShiftConflictError) as raised:
+                self.add(self.start + 7 * H, self.start + 12 * H, self.other_schedule)
+        conflict, = raised.exception.conflicts
+        self.assertEqual((conflict["other_shift_id"], conflict["kind"], conflict["minutes"]), (self.first, "overlap", 60.0))
+        self.assertEqual(len([s for s in stats.shapes if "FROM shift WHERE shift.staff_id" in s]), 1)
+        # Back-to-back is fine without a rest requirement
+        self.add(self.start + 8 * H, self.start + 12 * H)
+
+    def test_overlaps_with_shifts_longer_than_the_limit(self):
+        # Written directly, as the seed does, or stored before SHIFT_MAX_HOURS was lowered
+        long = Shift(self.staff, self.schedule, self.start + 24 * H, self.start + 72 * H)
+        db.session.add(long)
+        db.session.commit()
+        with self.assertRaises(ShiftConflictError) as raised:
+            self.add(self.start + 60 * H, self.start + 68 * H)
+        self.assertEqual(raised.exception.conflicts[0]["other_shift_id"], long.id)
+
+    def test_minimum_rest(self):
+        self.app.config['SHIFT_MIN_REST_HOURS'] = 11
+        with self.assertRaises(ShiftConflictError) as raised:
+            self.add(self.start + 18 * H, self.start + 26 * H)
+        self.assertEqual(raised.exception.conflicts[0]["kind"], "rest")
+        self.assertEqual(raised.exception.conflicts[0]["minutes"], 600.0)
+        self.add(self.start + 19 * H, self.start + 27 * H)
+
+    def test_add_shift_endpoint_reports_conflicts(self):
+        client = self.app.test_client()
+        login = client.post('/login', json={'username': 'conf_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        response = client.post('/addShift', headers=headers, json={
+            'admin_id': self.admin, 'staff_id': self.staff, 'schedule_id': self.schedule,
+            'start_time': (self.start + 2 * H).isoformat(), 'end_time': (self.start + 4 * H).isoformat(),
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['conflicts'][0]['other_shift_id'], self.first)
+
+    def test_offset_times_are_checked_as_wall_clock_times(self):
+        client = self.app.test_client()
+        login = client.post('/login', json={'username': 'conf_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        shift = {'admin_id': self.admin, 'staff_id': self.staff, 'schedule_id': self.schedule}
+        response = client.post('/addShift', headers=headers, json=dict(
+            shift, start_time='2025-06-02T15:00:00+02:00', end_time='2025-06-02T20:00:00+02:00'))
+        self.assertEqual(response.status_code, 409)
+        response = client.post('/addShift', headers=headers, json=dict(
+            shift, start_time='2025-06-02T17:00:00+02:00', end_time='2025-06-02T20:00:00+02:00'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(db.session.get(Shift, response.get_json()['id']).start_time, self.start + 8 * H)
+
+    def test_schedule_sweep_includes_other_schedules(self):
+        # Written directly, as imports and strategies can, to get conflicts in the table
+        db.session.execute(db.insert(Shift.__table__), [
+            {"staff_id": self.staff, "schedule_id": self.other_schedule,
+             "start_time": self.start + 4 * H, "end_time": self.start + 10 * H, "type": "day"},
+            {"staff_id": self.staff, "schedule_id": self.other_schedule,
+             "start_time": self.start + 100 * H, "end_time": self.start + 101 * H, "type": "day"},
+        ])
+        db.session.commit()
+        conflicts = schedule_conflicts(self.schedule)
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(conflicts[0]["other_shift_id"], self.first)
+        self.assertEqual(conflicts[0]["minutes"], 240.0)
+
+        client = self.app.test_client()
+        login = client.post('/login', json={'username': 'conf_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        response = client.get(f'/shifts/conflicts?admin_id={self.admin}&schedule_id={self.schedule}&min_rest_hours=100',
+                              headers=headers, json={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 2)
+
+
+class SweepTests(unittest.TestCase):
+
+    def test_sweep_matches_pairwise_comparison(self):
+        rng = random.Random(7)
+        base = datetime(2025, 1, 1)
+        intervals = []
+        for i in range(400):
+            start = base + timedelta(minutes=rng.randrange(0, 60 * 24 * 14, 30))
+            intervals.append(Interval(i, rng.randrange(5), 1, start, start + timedelta(hours=rng.randint(1, 12))))
+        rest = timedelta(hours=2)
+        expected = {
+            frozenset((a.id, b.id))
+            for a in intervals for b in intervals
+            if a.id < b.id and a.staff_id == b.staff_id
+            and a.start_time < b.end_time + rest and b.start_time < a.end_time + rest
+        }
+        found = {frozenset((c["shift_id"], c["other_shift_id"])) for c in find_conflicts(intervals, rest)}
+        self.assertEqual(found, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for the shared JWT identity resolution.
+"""
+import unittest
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from App.main import create_app
+from App.database import db, create_db
+from App.controllers.user import create_user, update_user
+from App.controllers.identity import resolve_identity, invalidate_identity, IdentityCache, Identity
+
+
+class IdentityResolutionTests(unittest.TestCase):
+    """Identities are resolved once per request and cached across requests."""
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_identity.db',
+            'JWT_SECRET_KEY': 'test-secret-key'
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.staff = create_user("identity_staff", "pass", "staff")
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self._record)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self._record)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def test_cache_hit_skips_query(self):
+        invalidate_identity()
+        self.assertEqual(resolve_identity(self.staff.id).role, "staff")
+        self.statements.clear()
+        self.assertEqual(resolve_identity(str(self.staff.id)).username, "identity_staff")
+        self.assertEqual(self.statements, [])
+
+    def test_update_invalidates(self):
+        resolve_identity(self.staff.id)
+        update_user(self.staff.id, "renamed_staff")
+        self.assertEqual(resolve_identity(self.staff.id).username, "renamed_staff")
+
+    def test_unknown_user(self):
+        self.assertIsNone(resolve_identity(9999))
+        self.assertIsNone(resolve_identity("not-an-id"))
+
+    def test_request_resolves_user_once(self):
+        invalidate_identity()
+        token = create_access_token(identity=self.staff)
+        self.statements.clear()
+        response = self.client.get('/allshifts', json={}, headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        user_lookups = [s for s in self.statements if 'FROM "user"' in s or "FROM user" in s]
+        self.assertEqual(len(user_lookups), 1)
+
+    def test_lru_eviction_and_expiry(self):
+        cache = IdentityCache(ttl=60, maxsize=2)
+        for i in range(3):
+            cache.put(Identity(i, "staff", f"u{i}"))
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(cache.get(2).username, "u2")
+
+        expired = IdentityCache(ttl=-1)
+        expired.put(Identity(1, "staff", "u1"))
+        self.assertIsNone(expired.get(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
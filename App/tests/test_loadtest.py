@@ -0,0 +1,64 @@
+"""
+Tests for the load-test harness.
+"""
+import unittest
+from App.main import create_app
+from App.database import db, create_db
+from App.loadtest import (
+    SCENARIOS, compare_reports, load_collection, local_server, percentile, run_load, seed_database
+)
+
+
+class LoadTestHarnessTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_loadtest.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_collection_mapped_to_current_routes(self):
+        requests = load_collection()
+        self.assertEqual(requests["Staff: Clock_In"]["path"], "/staff/clockIn")
+        self.assertEqual(requests["Staff: Clock_In"]["body"], {"shift_id": 1})
+        self.assertEqual(requests["Admin: Create_Shift"]["path"], "/addShift")
+        for scenario in SCENARIOS.values():
+            for step in scenario.steps:
+                self.assertIn(step, requests)
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_run_reports_every_endpoint_without_errors(self):
+        seeded = seed_database(staff=3, admins=1, shifts_per_staff=2)
+        db.session.remove()
+        with local_server(self.app) as url:
+            report = run_load(url, seeded, users=2, iterations=4, seed=3)
+
+        self.assertEqual(sum(report["scenarios"].values()), 8)
+        self.assertEqual(report["totals"]["errors"], 0, report["endpoints"])
+        self.assertIn("POST /api/login", report["endpoints"])
+        for row in report["endpoints"].values():
+            self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+            self.assertLessEqual(row["p95_ms"], row["p99_ms"])
+        self.assertEqual(report["meta"]["users"], 2)
+
+        changes = compare_reports(report, report)
+        self.assertEqual(changes["POST /api/login"]["p95_ms"]["change_pct"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
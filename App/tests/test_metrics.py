@@ -0,0 +1,98 @@
+"""
+Tests for request instrumentation and the Prometheus /metrics endpoint.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from App.main import create_app
+from App.database import db, create_db
+from App.metrics import Metrics, clear_snapshots, get_metrics, observe_strategy
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, auto_populate_schedule
+
+
+class MetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_metrics.db',
+            'METRICS_DIR': self.metrics_dir,
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        return response.data.decode()
+
+    def test_requests_recorded_per_endpoint(self):
+        self.client.get('/health')
+        self.client.get('/health')
+        self.client.get('/allshifts')
+        text = self.scrape()
+        self.assertIn('http_requests_total{endpoint="index_views.health_check",status="200"} 2', text)
+        self.assertIn('http_requests_total{endpoint="staff_views.get_all_shifts",status="401"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="index_views.health_check",le="+Inf"} 2', text)
+        self.assertIn('http_requests_in_flight{endpoint="index_views.metrics"} 1', text)
+        self.assertIn('db_pool_checked_out', text)
+
+    def test_strategy_time_recorded(self):
+        admin = create_user("metrics_admin", "pass", "admin")
+        create_user("metrics_staff", "pass", "staff")
+        schedule = create_schedule(admin.id, "Metrics")
+        auto_populate_schedule(admin.id, schedule.id, "minimize_days")
+        self.assertIn('schedule_strategy_duration_seconds_count{strategy="minimize_days"} 1', self.scrape())
+
+    def test_other_workers_are_aggregated(self):
+        other = Metrics()
+        other.observe_request("index_views.health_check", 200, 0.002)
+        other.in_flight["index_views.health_check"] = 3
+        alive, dead = os.getppid(), 2 ** 22 + 1
+        for pid in (alive, dead):
+            with open(os.path.join(self.metrics_dir, f"metrics-{pid}.json"), "w") as f:
+                json.dump(other.snapshot(), f)
+
+        self.client.get('/health')
+        text = self.scrape()
+        self.assertIn('http_requests_total{endpoint="index_views.health_check",status="200"} 3', text)
+        # Only the live worker's in-flight gauge counts
+        self.assertIn('http_requests_in_flight{endpoint="index_views.health_check"} 3', text)
+
+    def test_snapshot_flushed_for_other_workers(self):
+        self.client.get('/health')
+        self.assertIn(f"metrics-{os.getpid()}.json", os.listdir(self.metrics_dir))
+
+    def test_clearing_deletes_only_snapshots(self):
+        self.client.get('/health')
+        with open(os.path.join(self.metrics_dir, "notes.txt"), "w") as f:
+            f.write("not ours")
+        clear_snapshots(self.metrics_dir)
+        self.assertEqual(os.listdir(self.metrics_dir), ["notes.txt"])
+
+    def test_recording_overhead_is_small(self):
+        metrics = Metrics()
+        runs = 20000
+        start = time.perf_counter()
+        for _ in range(runs):
+            metrics.observe_request("admin_view.scheduleReport", 200, 0.012)
+        per_call = (time.perf_counter() - start) / runs
+        self.assertLess(per_call, 20e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests for the streaming payroll export.
+"""
+import csv
+import io
+import json
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift
+from App.controllers.payroll import payroll_rows, encode_payroll
+
+
+class PayrollExportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_payroll.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.admin = create_user("pay_admin", "pass", "admin").id
+        self.staff = create_user("pay_staff", "pass", "staff").id
+        self.other = create_user("pay_other", "pass", "staff").id
+        schedule = create_schedule(self.admin, "Payroll").id
+        # Monday 2025-03-03 and Wednesday 2025-03-05, then Monday of the next week
+        monday = datetime(2025, 3, 3, 9)
+        for day, clock_in, clock_out in [
+            (0, monday, monday + timedelta(hours=9)),          # 1h overtime
+            (2, monday + timedelta(days=2, minutes=30), monday + timedelta(days=2, hours=8)),
+            (7, None, None),                                   # no-show
+        ]:
+            shift = add_shift(self.admin, self.staff, schedule,
+                              monday + timedelta(days=day), monday + timedelta(days=day, hours=8))
+            shift.clock_in, shift.clock_out = clock_in, clock_out
+        add_shift(self.admin, self.other, schedule, monday, monday + timedelta(hours=8))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_hours_are_grouped_by_staff_and_week(self):
+        rows = list(payroll_rows(period="week"))
+        first, second, other = rows
+        self.assertEqual((first["staff_id"], first["period_start"]), (self.staff, "2025-03-03"))
+        self.assertEqual(first["shifts"], 2)
+        self.assertEqual(first["scheduled_hours"], 16.0)
+        self.assertEqual(first["worked_hours"], 16.5)
+        self.assertEqual(first["overtime_hours"], 1.0)
+        self.assertEqual((second["period_start"], second["attended"], second["worked_hours"]), ("2025-03-10", 0, 0.0))
+        self.assertEqual((other["username"], other["worked_hours"]), ("pay_other", 0.0))
+
+    def test_months_and_date_range(self):
+        rows = list(payroll_rows(period="month", start=datetime(2025, 3, 4), end=datetime(2025, 4, 1)))
+        self.assertEqual([(r["staff_id"], r["period_start"], r["shifts"]) for r in rows],
+                         [(self.staff, "2025-03-01", 2)])
+        with self.assertRaises(ValueError):
+            payroll_rows(period="year")
+
+    def test_encodings_stream_in_chunks(self):
+        chunks = list(encode_payroll(payroll_rows(period="day"), "csv", chunk_rows=2))
+        self.assertEqual(len(chunks), 2)
+        records = list(csv.DictReader(io.StringIO("".join(chunks))))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0]["period_start"], "2025-03-03")
+        lines = "".join(encode_payroll(payroll_rows(period="day"), "jsonl")).splitlines()
+        self.assertEqual(json.loads(lines[0])["overtime_hours"], 1.0)
+
+    def test_export_endpoint_streams_for_admins_only(self):
+        login = self.client.post('/login', json={'username': 'pay_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        response = self.client.get(f'/payrollExport?admin_id={self.admin}&format=jsonl&period=week',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual(len(response.get_data(as_text=True).splitlines()), 3)
+
+        response = self.client.get(f'/payrollExport?admin_id={self.staff}', headers=headers)
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(f'/payrollExport?admin_id={self.admin}&period=year', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Tests for connection pool configuration, metrics and per-request sessions.
+"""
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from App.main import create_app
+from App.database import db, create_db, pool_stats, InstrumentedQueuePool
+from App.controllers.user import create_user
+
+
+class PoolTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_pool.db',
+            'DB_POOL_SIZE': 4,
+            'DB_MAX_OVERFLOW': 0,
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        create_user("pool_staff", "pass", "staff")
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_pool_configured_from_settings(self):
+        stats = pool_stats()
+        self.assertEqual(stats["class"], "InstrumentedQueuePool")
+        self.assertEqual(stats["size"], 4)
+        self.assertTrue(db.engine.pool._pre_ping)
+
+    def test_concurrent_requests_return_connections(self):
+        def fetch(_):
+            return self.client.get('/api/users').status_code
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(fetch, range(32)))
+
+        self.assertEqual(statuses, [200] * 32)
+        stats = json.loads(self.client.get('/health').data)["pool"]
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["timeouts"], 0)
+
+    def test_request_gets_its_own_session(self):
+        outer = db.session()
+
+        @self.app.route('/_session_probe')
+        def session_probe():
+            return str(db.session() is outer)
+
+        self.assertEqual(self.client.get('/_session_probe').data, b'False')
+        self.assertIs(db.session(), outer)
+
+    def test_timeouts_are_counted(self):
+        engine = create_engine('sqlite://', poolclass=InstrumentedQueuePool,
+                               pool_size=1, max_overflow=0, pool_timeout=0.05)
+        held = engine.connect()
+        with self.assertRaises(PoolTimeoutError):
+            engine.connect()
+        held.close()
+        stats = pool_stats(engine)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["waits"], 1)
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
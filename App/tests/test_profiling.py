@@ -0,0 +1,103 @@
+"""
+Tests for auto-populate phase timings and profile captures.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift
+from App.controllers.schedule_controller import ScheduleController
+from App.models.strategies import EvenDistributionStrategy
+from App.profiling import Profile
+
+
+class ProfilingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_profiling.db',
+            'PROFILE_ALLOW_HEADER': True,
+            'PROFILE_DIR': self.profile_dir,
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+        admin = create_user("profile_admin", "pass", "admin")
+        staff = [create_user(f"profile_staff{i}", "pass", "staff") for i in range(3)]
+        schedule = create_schedule(admin.id, "Profiled")
+        start = datetime.now()
+        for i in range(6):
+            add_shift(admin.id, staff[0].id, schedule.id, start + timedelta(days=i), start + timedelta(days=i, hours=8))
+        self.admin_id, self.schedule_id = admin.id, schedule.id
+        response = self.client.post('/login', json={'username': 'profile_admin', 'password': 'pass'})
+        self.headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def populate(self, **headers):
+        return self.client.post('/autoPopulateSchedule', json={
+            'admin_id': self.admin_id,
+            'schedule_id': self.schedule_id,
+            'strategy_name': 'even_distribution'
+        }, headers={**self.headers, **headers})
+
+    def test_phase_timings_in_server_timing_header(self):
+        response = self.populate()
+        self.assertEqual(response.status_code, 200)
+        phases = [part.split(";")[0] for part in response.headers['Server-Timing'].split(", ")]
+        self.assertEqual(phases, ["load", "assign", "flush", "commit"])
+        self.assertNotIn('profile', response.get_json())
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_header_requests_captures(self):
+        response = self.populate(**{'X-Profile': 'cprofile,tracemalloc'})
+        profile = response.get_json()['profile']
+        self.assertEqual(profile['counts']['shifts'], 6)
+        self.assertEqual(profile['counts']['staff'], 3)
+        self.assertEqual(profile['counts']['reassigned'], 4)
+        self.assertTrue(profile['cprofile'])
+        self.assertEqual(set(profile['cprofile'][0]), {'function', 'calls', 'tottime_ms', 'cumtime_ms'})
+        self.assertIn('peak_kb', profile['tracemalloc'])
+        saved = sorted(os.listdir(self.profile_dir))
+        self.assertEqual([name.rsplit('.', 1)[1] for name in saved], ['json', 'pstats'])
+        with open(os.path.join(self.profile_dir, saved[0])) as f:
+            self.assertEqual(json.load(f)['phases_ms'].keys(), profile['phases_ms'].keys())
+
+    def test_header_ignored_unless_allowed(self):
+        self.app.config['PROFILE_ALLOW_HEADER'] = False
+        response = self.populate(**{'X-Profile': 'cprofile'})
+        self.assertNotIn('profile', response.get_json())
+
+    def test_config_flag_captures_outside_requests(self):
+        self.app.config['PROFILE_CAPTURE'] = 'tracemalloc'
+        ScheduleController.auto_populate(self.schedule_id, 'minimize_days')
+        self.assertEqual(len(os.listdir(self.profile_dir)), 1)
+
+    def test_strategy_run_without_profile(self):
+        strategy = EvenDistributionStrategy()
+        profile = Profile("standalone")
+        class Row:
+            def __init__(self, id, staff_id=None):
+                self.id, self.staff_id = id, staff_id
+        shifts = [Row(i) for i in range(4)]
+        self.assertEqual(len(strategy.run([Row(1), Row(2)], shifts)), 4)
+        strategy.run([Row(1), Row(2)], shifts, profile)
+        self.assertIn("assign", profile.phases)
+        self.assertEqual(profile.counts["reassigned"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
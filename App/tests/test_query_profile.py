@@ -0,0 +1,93 @@
+"""
+Tests for per-request query counting and N+1 detection.
+"""
+import unittest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from App.main import create_app
+from App.database import db, create_db
+from App.models import User
+from App.controllers.user import create_user
+from App.query_profile import fingerprint, record_queries
+
+
+class QueryProfileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_query_profile.db',
+            'QUERY_PROFILE_HEADERS': True,
+            'QUERY_N_PLUS_ONE_THRESHOLD': 3,
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.ids = [create_user(f"profiled{i}", "pass", "staff").id for i in range(5)]
+
+        def one_by_one():
+            names = [db.session.get(User, user_id).username for user_id in self.ids]
+            return {"names": names}
+        self.app.add_url_rule('/one-by-one', 'one_by_one', one_by_one)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM shift WHERE id IN (?, ?, ?) AND type = 'day' LIMIT 10"),
+            fingerprint("SELECT * FROM shift WHERE id IN (?, ?)  AND type = 'night' LIMIT 5"),
+        )
+
+    def test_headers_report_query_count(self):
+        response = self.client.get('/api/users')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-DB-Query-Count'], '2')
+        self.assertIn('X-DB-Query-Time-Ms', response.headers)
+        self.assertNotIn('X-DB-N-Plus-One', response.headers)
+
+    def test_repeated_statement_flagged(self):
+        db.session.remove()
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            response = self.client.get('/one-by-one')
+        self.assertEqual(response.headers['X-DB-Query-Count'], '5')
+        self.assertEqual(response.headers['X-DB-N-Plus-One'], '1')
+        self.assertIn('Possible N+1 in one_by_one', logs.output[0])
+
+    def test_headers_off_outside_debug(self):
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_query_profile.db',
+            'PUSH_APP_CONTEXT': False,
+        })
+        response = app.test_client().get('/api/users')
+        self.assertNotIn('X-DB-Query-Count', response.headers)
+
+    def test_record_queries_outside_requests(self):
+        with record_queries() as stats:
+            User.query.filter_by(username="profiled0").first()
+            User.query.filter_by(username="profiled1").first()
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(len(stats.shapes), 1)
+
+    def test_failed_statements_leave_no_start_behind(self):
+        connection = db.session.connection()
+        with self.assertRaises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+        self.assertEqual(connection.info["query_start"], [])
+        db.session.rollback()
+
+    def test_off_by_default_outside_testing_and_debug(self):
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_query_profile.db',
+            'PUSH_APP_CONTEXT': False,
+        })
+        self.assertFalse(app.config['QUERY_PROFILE_ENABLED'])
+        self.assertTrue(self.app.config['QUERY_PROFILE_ENABLED'])
+
+
+if __name__ == '__main__':
+    unittest.main()
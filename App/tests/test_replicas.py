@@ -0,0 +1,54 @@
+"""
+Tests for read-replica routing, using two SQLite files as primary and replica.
+"""
+import json
+import unittest
+from App.main import create_app
+from App.database import db, create_db, PRIMARY_COOKIE
+from App.controllers.user import create_user
+
+
+class ReplicaRoutingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_replica_primary.db',
+            'SQLALCHEMY_REPLICA_URIS': ['sqlite:///test_replica.db'],
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.replica = self.app.extensions['replica_engines'][0]
+        # The "replica" has the schema but nothing has replicated to it yet
+        db.metadata.create_all(self.replica)
+        create_user("primary_only", "pass", "staff")
+
+    def tearDown(self):
+        db.session.remove()
+        db.metadata.drop_all(self.replica)
+        db.drop_all()
+        self.app_context.pop()
+
+    def usernames(self, response):
+        return [u["username"] for u in json.loads(response.data)]
+
+    def test_read_only_view_uses_replica(self):
+        self.assertEqual(self.usernames(self.client.get('/api/users')), [])
+
+    def test_per_request_override(self):
+        response = self.client.get('/api/users', headers={'X-Read-Consistency': 'primary'})
+        self.assertEqual(self.usernames(response), ["primary_only"])
+        response = self.client.get('/api/users?consistency=primary')
+        self.assertEqual(self.usernames(response), ["primary_only"])
+
+    def test_read_your_writes_after_write(self):
+        response = self.client.post('/api/users', json={'username': 'new_user', 'password': 'pw', 'role': 'staff'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PRIMARY_COOKIE, response.headers.get('Set-Cookie', ''))
+        self.assertIn("new_user", self.usernames(self.client.get('/api/users')))
+
+
+if __name__ == '__main__':
+    unittest.main()
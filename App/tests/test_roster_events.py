@@ -0,0 +1,184 @@
+"""
+Tests for roster change events and the server-sent event streams.
+"""
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import RosterEvent, Shift
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift, auto_populate_schedule
+from App.controllers.staff import clock_in
+from App.controllers.roster_events import Subscriber, _hub, open_stream
+
+START = datetime(2025, 9, 1, 9)
+
+
+class RosterEventTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_roster_events.db',
+            # Tests drive polling by hand
+            'ROSTER_EVENTS_POLL_SECONDS': 3600,
+            'ROSTER_EVENTS_HEARTBEAT_SECONDS': 0.05,
+            'ROSTER_EVENTS_MAX_AGE_SECONDS': 0.2,
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.admin = create_user("push_admin", "pass", "admin").id
+        self.staff = [create_user(f"push_staff{i}", "pass", "staff").id for i in range(2)]
+        self.schedule = create_schedule(self.admin, "Pushed").id
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def events(self):
+        return db.session.execute(db.select(RosterEvent.kind, RosterEvent.shift_id, RosterEvent.staff_id,
+                                            RosterEvent.old_staff_id).order_by(RosterEvent.id)).all()
+
+    def add(self, staff, day=0):
+        return add_shift(self.admin, staff, self.schedule, START + timedelta(days=day),
+                         START + timedelta(days=day, hours=8)).id
+
+    def test_writes_publish_compact_events(self):
+        first = self.add(self.staff[0])
+        second = self.add(self.staff[0], 1)
+        clock_in(self.staff[0], first)
+        auto_populate_schedule(self.admin, self.schedule, "even_distribution")
+        shift = db.session.get(Shift, second)
+        shift.end_time += timedelta(hours=1)
+        db.session.commit()
+        db.session.delete(shift)
+        db.session.commit()
+
+        kinds = [(kind, shift_id) for kind, shift_id, _, _ in self.events()]
+        self.assertEqual(kinds[:3], [("added", first), ("added", second), ("clocked", first)])
+        reassigned = [e for e in self.events() if e.kind == "reassigned"]
+        self.assertEqual(len(reassigned), 1)
+        self.assertEqual(reassigned[0].old_staff_id, self.staff[0])
+        self.assertEqual(kinds[-2:], [("changed", second), ("removed", second)])
+
+    def test_large_writes_collapse_to_resyncs(self):
+        for day in range(4):
+            self.add(self.staff[0], day)
+        self.app.config['ROSTER_EVENT_BULK_LIMIT'] = 1
+        auto_populate_schedule(self.admin, self.schedule, "even_distribution")
+        tail = db.session.execute(db.select(RosterEvent.kind, RosterEvent.staff_id, RosterEvent.schedule_id)
+                                  .where(RosterEvent.kind != "added").order_by(RosterEvent.id)).all()
+        self.assertEqual(sorted(tail, key=str), sorted([("resync", self.staff[0], None), ("resync", self.staff[1], None),
+                                                        ("resync", None, self.schedule)], key=str))
+
+    def test_poll_fans_out_to_staff_and_schedule_subscribers(self):
+        hub = _hub()
+        mine = hub.subscribe(("staff", self.staff[1]))
+        schedule = hub.subscribe(("schedule", self.schedule))
+        others = hub.subscribe(("staff", self.staff[0]))
+        try:
+            shift = self.add(self.staff[1])
+            db.session.get(Shift, shift).staff_id = self.staff[0]
+            db.session.commit()
+            self.assertEqual(hub.poll(), 2)
+            self.assertEqual(hub.poll(), 0)
+        finally:
+            for subscriber in (mine, schedule, others):
+                hub.unsubscribe(subscriber)
+        added, removed = mine.take(0)
+        self.assertIn("event: added", added)
+        self.assertIn(f'"id":{shift}', added)
+        self.assertIn("event: removed", removed)
+        self.assertEqual([m.split("\n")[1] for m in schedule.take(0)], ["event: added", "event: reassigned"])
+        message, = others.take(0)
+        self.assertIn("event: added", message)
+        self.assertIn(f'"staff_id":{self.staff[0]}', message)
+        self.assertEqual(hub.stats(), {"streams": 0, "keys": 0})
+
+    def test_poll_delivers_events_committed_below_the_watermark(self):
+        hub = _hub()
+        subscriber = hub.subscribe(("staff", self.staff[0]))
+        try:
+            self.add(self.staff[0])
+            first = db.session.scalar(db.select(db.func.max(RosterEvent.id)))
+            db.session.add(RosterEvent(id=first + 10, kind="resync", staff_id=self.staff[0],
+                                       created_at=datetime.utcnow()))
+            db.session.commit()
+            self.assertEqual(hub.poll(), 2)
+            # A transaction that took a lower id and committed after the poll
+            late = first + 5
+            db.session.add(RosterEvent(id=late, kind="resync", staff_id=self.staff[0], created_at=datetime.utcnow()))
+            db.session.commit()
+            self.assertEqual(hub.poll(), 1)
+            self.assertEqual(hub.poll(), 0)
+        finally:
+            hub.unsubscribe(subscriber)
+        self.assertEqual([m.split("\n")[:2] for m in subscriber.take(0)][-1], [f"id: {late}", "event: resync"])
+        self.assertEqual(len(subscriber.take(0)), 0)
+
+    def test_slow_subscribers_are_bounded(self):
+        subscriber = Subscriber(("staff", 1), size=3)
+        for event_id in range(1, 10):
+            subscriber.push(event_id, f"id: {event_id}\n\n")
+        messages = subscriber.take(0)
+        self.assertEqual(len(messages), 1)
+        self.assertIn("id: 9\nevent: resync", messages[0])
+        subscriber.push(10, "id: 10\n\n")
+        self.assertEqual(subscriber.take(0), ["id: 10\n\n"])
+
+    def test_stream_replays_missed_events_and_pushes_new_ones(self):
+        login = self.client.post('/login', json={'username': 'push_staff0', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        first = self.add(self.staff[0])
+        last_seen = db.session.scalar(db.select(db.func.max(RosterEvent.id)))
+        missed = self.add(self.staff[0], 1)
+
+        response = self.client.get('/staff/rosterEvents', headers=dict(headers, **{'Last-Event-ID': str(last_seen)}))
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = (chunk.decode() for chunk in response.response)
+        self.assertTrue(next(chunks).startswith("retry:"))
+        backlog = next(chunks)
+        self.assertIn(f'"id":{missed}', backlog)
+        self.assertNotIn(f'"id":{first},', backlog)
+
+        pushed = self.add(self.staff[0], 2)
+        _hub().poll()
+        self.assertIn(f'"id":{pushed}', next(chunks))
+        rest = list(chunks)  # heartbeats until the stream's max age
+        self.assertTrue(rest and all(chunk == ": ping\n\n" for chunk in rest))
+        response.close()
+        self.assertEqual(_hub().stats()["streams"], 0)
+
+        response = self.client.get(f'/scheduleEvents?admin_id={self.staff[0]}&schedule_id={self.schedule}',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_writes_prune_old_events_without_open_streams(self):
+        db.session.add(RosterEvent(kind="resync", staff_id=self.staff[0], created_at=datetime.utcnow() - timedelta(hours=7)))
+        db.session.commit()
+        login = self.client.post('/login', json={'username': 'push_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        response = self.client.post('/addShift', headers=headers, json={
+            'admin_id': self.admin, 'staff_id': self.staff[0], 'schedule_id': self.schedule,
+            'start_time': START.isoformat(), 'end_time': (START + timedelta(hours=8)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(_hub().stats()["streams"], 0)
+        self.assertEqual([kind for kind, _, _, _ in self.events()], ["added"])
+
+    def test_stale_reconnects_resync(self):
+        self.add(self.staff[0])
+        db.session.execute(db.delete(RosterEvent))
+        self.add(self.staff[0], 1)
+        stream = open_stream(("staff", self.staff[0]), last_event_id=0)
+        try:
+            self.assertIn("event: resync", stream.backlog[0])
+        finally:
+            stream.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Tests for cloning a schedule with a time offset.
+"""
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Schedule, Shift, Staff
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift, clone_schedule
+from App.controllers.shift_import import bulk_add_shifts
+from App.query_profile import record_queries
+
+WEEK = timedelta(days=7)
+
+
+class ScheduleCloneTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_schedule_clone.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.admin = create_user("clone_admin", "pass", "admin").id
+        self.staff = [create_user(f"clone_staff{i}", "pass", "staff").id for i in range(2)]
+        self.schedule = create_schedule(self.admin, "Week 1").id
+        self.monday = datetime(2025, 6, 2, 9)
+        first = add_shift(self.admin, self.staff[0], self.schedule, self.monday, self.monday + timedelta(hours=8))
+        add_shift(self.admin, self.staff[1], self.schedule, self.monday + timedelta(hours=14, microseconds=500),
+                  self.monday + timedelta(hours=22), "night")
+        first.clock_in, first.clock_out = self.monday, self.monday + timedelta(hours=8)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def shifts(self, schedule_id):
+        query = db.select(Shift.staff_id, Shift.start_time, Shift.end_time, Shift.type, Shift.clock_in, Shift.clock_out) \
+            .where(Shift.schedule_id == schedule_id).order_by(Shift.start_time)
+        return [tuple(row) for row in db.session.execute(query)]
+
+    def test_clone_moves_shifts_and_drops_clock_times(self):
+        result = clone_schedule(self.admin, self.schedule, WEEK)
+        self.assertEqual((result["shifts"], result["name"]), (2, "Week 1 (copy)"))
+        cloned = db.session.get(Schedule, result["schedule_id"])
+        self.assertEqual(cloned.created_by, self.admin)
+
+        original = self.shifts(self.schedule)
+        copied = self.shifts(result["schedule_id"])
+        self.assertEqual(copied, [(staff_id, start + WEEK, end + WEEK, kind, None, None)
+                                  for staff_id, start, end, kind, _, _ in original])
+        # Moved values still compare correctly against Python datetimes
+        later = db.session.scalars(db.select(Shift.id).where(
+            Shift.schedule_id == result["schedule_id"], Shift.start_time >= self.monday + WEEK + timedelta(hours=14)
+        )).all()
+        self.assertEqual(len(later), 1)
+        self.assertIsNotNone(db.session.get(Staff, self.staff[1]).roster_changed_at)
+
+    def test_clone_can_leave_shifts_open(self):
+        result = clone_schedule(self.admin, self.schedule, -timedelta(hours=3), name="Open", keep_staff=False)
+        copied = self.shifts(result["schedule_id"])
+        self.assertEqual([row[0] for row in copied], [None, None])
+        self.assertEqual(copied[0][1], self.monday - timedelta(hours=3))
+        with self.assertRaises(ValueError):
+            clone_schedule(self.admin, 999, WEEK)
+        with self.assertRaises(PermissionError):
+            clone_schedule(self.staff[0], self.schedule, WEEK)
+
+    def test_clone_is_one_insert_whatever_the_size(self):
+        records = [{"staff_id": self.staff[i % 2], "schedule_id": self.schedule,
+                    "start_time": (self.monday + timedelta(days=1 + i)).isoformat(),
+                    "end_time": (self.monday + timedelta(days=1 + i, hours=8)).isoformat()} for i in range(500)]
+        self.assertEqual(bulk_add_shifts(records)["created"], 500)
+        with record_queries() as stats:
+            result = clone_schedule(self.admin, self.schedule, WEEK)
+        self.assertEqual(result["shifts"], 502)
+        # admin lookup, source lookup, schedule insert, shift INSERT ... SELECT, roster stamp
+        self.assertLessEqual(stats.count, 5)
+
+    def test_endpoint(self):
+        client = self.app.test_client()
+        login = client.post('/login', json={'username': 'clone_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        response = client.post('/cloneSchedule', headers=headers, json={
+            'admin_id': self.admin, 'schedule_id': self.schedule, 'name': 'Week 2', 'keep_staff': False,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['shifts'], 2)
+        response = client.post('/cloneSchedule', headers=headers, json={'admin_id': self.admin, 'schedule_id': 999})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
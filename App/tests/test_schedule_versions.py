@@ -0,0 +1,197 @@
+"""
+Tests for schedule versions: packed deltas, diffs and restores.
+"""
+import random
+import struct
+import unittest
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift, ScheduleVersion
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift, auto_populate_schedule
+from App.controllers.versions import (
+    ALL, CHECKPOINT_EVERY, REMOVED, STAFF, START, TYPE, _history, apply_delta, diff_states, diff_versions,
+    list_versions, make_delta, pack_delta, restore_version, snapshot_schedule, unpack_delta,
+)
+
+
+class DeltaPackingTests(unittest.TestCase):
+
+    def test_pack_round_trip(self):
+        start = datetime(2025, 5, 1, 9, 0, 0, 250)
+        delta = [
+            (3, ALL, 7, start, start + timedelta(hours=8), "night"),
+            (4, STAFF, None, None, None, None),
+            (90000, START, None, start - timedelta(days=400), None, None),
+            (90001, REMOVED, None, None, None, None),
+        ]
+        self.assertEqual(unpack_delta(pack_delta(delta)), delta)
+        self.assertEqual(unpack_delta(pack_delta([])), [])
+
+    def test_missing_and_empty_types_round_trip(self):
+        start = datetime(2025, 5, 1, 9)
+        delta = [
+            (1, ALL, 2, start, start + timedelta(hours=8), None),
+            (2, ALL, 2, start, start + timedelta(hours=8), ""),
+            (3, TYPE, None, None, None, "day"),
+        ]
+        self.assertEqual(unpack_delta(pack_delta(delta)), delta)
+        self.assertEqual(unpack_delta(pack_delta(delta[1:2])), delta[1:2])
+
+    def test_format_1_payloads_still_unpack(self):
+        names = b"day\x00night"
+        payload = zlib.compress(b"".join([
+            struct.pack("<BII", 1, 2, len(names)), names, bytes([TYPE, TYPE]),
+            array("q", [4, 1]).tobytes(), array("H", [1, 0]).tobytes(),
+        ]))
+        self.assertEqual(unpack_delta(payload), [(4, TYPE, None, None, None, "night"),
+                                                 (5, TYPE, None, None, None, "day")])
+
+    def test_merge_diff_matches_dict_comparison(self):
+        rng = random.Random(3)
+        base = datetime(2025, 1, 1)
+
+        def state(ids):
+            return sorted((i, rng.choice([None, 1, 2, 3]), base + timedelta(hours=i % 50),
+                           base + timedelta(hours=i % 50 + 8), rng.choice(["day", "night"])) for i in ids)
+
+        old = state(rng.sample(range(3000), 1500))
+        new = state(rng.sample(range(3000), 1500))
+        self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+        before, after = {row[0]: row for row in old}, {row[0]: row for row in new}
+        expected = {i for i in before.keys() | after.keys() if before.get(i) != after.get(i)}
+        self.assertEqual({c["shift_id"] for c in diff_states(old, new)}, expected)
+
+
+class ScheduleVersionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_schedule_versions.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.admin = create_user("ver_admin", "pass", "admin").id
+        self.staff = [create_user(f"ver_staff{i}", "pass", "staff").id for i in range(3)]
+        self.schedule = create_schedule(self.admin, "Versioned").id
+        monday = datetime(2025, 6, 2, 9)
+        self.shifts = [
+            add_shift(self.admin, self.staff[0], self.schedule,
+                      monday + timedelta(days=day), monday + timedelta(days=day, hours=8)).id
+            for day in range(6)
+        ]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def owners(self):
+        return db.session.scalars(db.select(Shift.staff_id).where(Shift.schedule_id == self.schedule)
+                                  .order_by(Shift.id)).all()
+
+    def test_auto_populate_runs_are_versioned(self):
+        auto_populate_schedule(self.admin, self.schedule, "even_distribution")
+        versions = list_versions(self.schedule)
+        self.assertEqual([v["label"] for v in versions],
+                         ["before auto_populate:even_distribution", "auto_populate:even_distribution"])
+        self.assertEqual(versions[0]["changed"], 6)
+        # Only reassigned shifts are stored, and only their staff column
+        diff = diff_versions(self.schedule, 1, 2)
+        self.assertEqual(diff["counts"]["changed"], versions[1]["changed"])
+        self.assertTrue(all(set(c["fields"]) == {"staff_id"} for c in diff["changes"]))
+        self.assertEqual(diff_versions(self.schedule, 2)["counts"], {"added": 0, "removed": 0, "changed": 0})
+
+        # Edits made by hand between runs get their own version
+        add_shift(self.admin, self.staff[1], self.schedule, datetime(2025, 7, 1, 9), datetime(2025, 7, 1, 17))
+        auto_populate_schedule(self.admin, self.schedule, "even_distribution")
+        labels = [v["label"] for v in list_versions(self.schedule)]
+        self.assertEqual(labels[2], "before auto_populate:even_distribution")
+        self.assertEqual(diff_versions(self.schedule, 2, 3)["counts"]["added"], 1)
+
+    def test_restore_puts_assignments_back_with_one_update(self):
+        auto_populate_schedule(self.admin, self.schedule, "even_distribution")
+        self.assertNotEqual(self.owners(), [self.staff[0]] * 6)
+        db.session.delete(db.session.get(Shift, self.shifts[5]))
+        db.session.commit()
+
+        result = restore_version(self.schedule, 1, created_by=self.admin)
+        self.assertEqual(self.owners(), [self.staff[0]] * 5)
+        self.assertEqual((result["missing"], result["untracked"]), ([self.shifts[5]], 0))
+        latest = db.session.scalars(db.select(ScheduleVersion).order_by(ScheduleVersion.number.desc())).first()
+        self.assertEqual((latest.number, latest.label, latest.created_by), (result["version"], "restore v1", self.admin))
+        with self.assertRaises(ValueError):
+            restore_version(self.schedule, 99)
+
+    def test_checkpoints_bound_the_history_replayed(self):
+        owners = {}
+        for number in range(1, 2 * CHECKPOINT_EVERY + 3):
+            shift = db.session.get(Shift, self.shifts[number % 6])
+            shift.staff_id = self.staff[number % 3] if shift.staff_id != self.staff[number % 3] else None
+            db.session.commit()
+            self.assertEqual(snapshot_schedule(self.schedule).number, number)
+            owners[number] = self.owners()
+        versions = list_versions(self.schedule)
+        self.assertEqual([v["version"] for v in versions if v["checkpoint"]],
+                         [1, CHECKPOINT_EVERY + 1, 2 * CHECKPOINT_EVERY + 1])
+        self.assertEqual(versions[-1]["changed"], 1)
+        # Recording the next version reads from the last checkpoint only
+        self.assertEqual([number for number, *_ in _history(self.schedule)],
+                         [2 * CHECKPOINT_EVERY + 1, 2 * CHECKPOINT_EVERY + 2])
+
+        self.assertEqual(diff_versions(self.schedule, 3, 2 * CHECKPOINT_EVERY)["counts"]["added"], 0)
+        self.assertEqual(diff_versions(self.schedule, 2 * CHECKPOINT_EVERY + 2)["counts"]["changed"], 0)
+        for number in (2, CHECKPOINT_EVERY + 1, CHECKPOINT_EVERY + 5):
+            restore_version(self.schedule, number)
+            self.assertEqual(self.owners(), owners[number])
+
+    def test_shifts_without_a_type_are_versioned(self):
+        for shift_id, kind in zip(self.shifts, (None, "")):
+            db.session.get(Shift, shift_id).type = kind
+        db.session.commit()
+        snapshot_schedule(self.schedule)
+        auto_populate_schedule(self.admin, self.schedule, "even_distribution")
+        restore_version(self.schedule, 1)
+        self.assertEqual(self.owners(), [self.staff[0]] * 6)
+        self.assertEqual(diff_versions(self.schedule, 1)["counts"]["changed"], 0)
+
+    def test_snapshot_skips_unchanged_schedules(self):
+        self.assertEqual(snapshot_schedule(self.schedule, label="start").number, 1)
+        self.assertIsNone(snapshot_schedule(self.schedule))
+        with self.assertRaises(ValueError):
+            snapshot_schedule(999)
+
+    def test_endpoints(self):
+        client = self.app.test_client()
+        login = client.post('/login', json={'username': 'ver_admin', 'password': 'pass'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        response = client.post('/schedule/versions', headers=headers,
+                               json={'admin_id': self.admin, 'schedule_id': self.schedule, 'label': 'draft'})
+        self.assertEqual(response.status_code, 201)
+        auto_populate_schedule(self.admin, self.schedule, "even_distribution")
+
+        query = f'admin_id={self.admin}&schedule_id={self.schedule}'
+        response = client.get(f'/schedule/versions?{query}', headers=headers)
+        self.assertEqual([v['version'] for v in response.get_json()], [1, 2])
+        response = client.get(f'/schedule/versions/diff?{query}&from=1&to=2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.get_json()['counts']['changed'], 0)
+        response = client.get(f'/schedule/versions/diff?{query}&from=7', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post('/schedule/versions/restore', headers=headers,
+                               json={'admin_id': self.admin, 'schedule_id': self.schedule, 'version': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.owners(), [self.staff[0]] * 6)
+        response = client.post('/schedule/versions/restore', headers=headers,
+                               json={'admin_id': self.staff[0], 'schedule_id': self.schedule, 'version': 1})
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for the synthetic organization seed generator.
+"""
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Admin, Schedule, Shift, Staff
+from sqlalchemy import event
+from App.controllers import seed_organization, login, create_user
+
+
+class SeedTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_seed.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_seeds_requested_counts(self):
+        result = seed_organization(staff=20, schedules=3, shifts=500, seed=1)
+        self.assertEqual(result["shifts"], 500)
+        self.assertEqual(Staff.query.count(), 20)
+        self.assertEqual(Admin.query.count(), 1)
+        self.assertEqual(Schedule.query.count(), 3)
+        self.assertEqual(Shift.query.count(), 500)
+        # Seeded rows load through the ORM like any other
+        member = Staff.query.filter_by(username="seed_staff0").one()
+        self.assertGreaterEqual(member.total_hours_scheduled, 0)
+        self.assertIsNotNone(login("seed_staff0", "staffpass"))
+
+    def test_database_assigns_ids(self):
+        statements = []
+        capture = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            seed_organization(staff=5, schedules=2, shifts=20, seed=6)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+        # Explicit ids would leave PostgreSQL's sequences behind the seeded rows
+        inserts = [s for s in statements if s.startswith(("INSERT INTO user ", 'INSERT INTO "user" ', "INSERT INTO schedule "))]
+        self.assertTrue(inserts)
+        self.assertFalse([s for s in inserts if "(id," in s])
+        seeded = {shift.staff_id for shift in Shift.query.all()}
+        self.assertTrue(seeded <= {member.id for member in Staff.query.all()})
+        self.assertGreater(create_user("after_seed", "pass", "staff").id, max(seeded))
+
+    def test_day_night_mix_and_clock_history(self):
+        start = datetime.now() - timedelta(days=30)
+        seed_organization(staff=10, schedules=1, shifts=2000, start=start, days=20,
+                          night_ratio=0.5, late_rate=0.5, no_show_rate=0.1, seed=2)
+        shifts = Shift.query.all()
+        nights = sum(1 for s in shifts if s.type == "night")
+        self.assertTrue(800 < nights < 1200)
+        for shift in shifts:
+            self.assertEqual(shift.end_time - shift.start_time, timedelta(hours=8))
+        late = sum(1 for s in shifts if s.clock_in and s.clock_in > s.start_time)
+        no_shows = sum(1 for s in shifts if s.clock_in is None)
+        self.assertTrue(700 < late < 1100)
+        self.assertTrue(100 < no_shows < 300)
+        self.assertTrue(all(s.clock_out is not None for s in shifts if s.clock_in))
+
+    def test_future_shifts_have_no_clock_times(self):
+        seed_organization(staff=5, schedules=1, shifts=100, start=datetime.now() + timedelta(days=1), seed=3)
+        self.assertEqual(Shift.query.filter(Shift.clock_in.isnot(None)).count(), 0)
+
+    def test_skewed_distribution(self):
+        seed_organization(staff=50, schedules=1, shifts=5000, distribution="skewed", seed=4)
+        counts = sorted((len(member.shifts) for member in Staff.query.all()), reverse=True)
+        self.assertGreater(counts[0], 3 * counts[len(counts) // 2])
+
+    def test_existing_prefix_rejected(self):
+        seed_organization(staff=2, schedules=1, shifts=10, seed=5)
+        with self.assertRaises(ValueError):
+            seed_organization(staff=2, schedules=1, shifts=10)
+        seed_organization(staff=2, schedules=1, shifts=10, prefix="more")
+        self.assertEqual(Staff.query.count(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
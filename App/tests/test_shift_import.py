@@ -0,0 +1,124 @@
+"""
+Tests for the bulk shift import.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift
+from App.controllers.shift_import import bulk_add_shifts, parse_shift_records
+from App.query_profile import record_queries
+
+START = datetime(2025, 9, 1, 8)
+
+
+def shift(staff_id, schedule_id, day, hours=8, start_hour=0):
+    begins = START + timedelta(days=day, hours=start_hour)
+    return {"staff_id": staff_id, "schedule_id": schedule_id,
+            "start_time": begins.isoformat(), "end_time": (begins + timedelta(hours=hours)).isoformat()}
+
+
+class ShiftImportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_shift_import.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.admin = create_user("import_admin", "pass", "admin").id
+        self.staff = [create_user(f"import_staff{i}", "pass", "staff").id for i in range(3)]
+        self.schedule = create_schedule(self.admin, "Imported").id
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def headers(self, username="import_admin"):
+        login = self.client.post('/login', json={'username': username, 'password': 'pass'})
+        return {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+
+    def test_valid_rows_are_created_and_bad_rows_reported(self):
+        existing = add_shift(self.admin, self.staff[0], self.schedule, START, START + timedelta(hours=8)).id
+        records = [
+            shift(self.staff[0], self.schedule, 1),
+            shift(self.staff[1], self.schedule, 1),
+            shift(999, self.schedule, 1),                             # unknown staff
+            shift(self.staff[1], 999, 2),                             # unknown schedule
+            {"staff_id": self.staff[2], "schedule_id": self.schedule},  # missing times
+            shift(self.staff[0], self.schedule, 0, start_hour=4),     # overlaps the existing shift
+            shift(self.staff[1], self.schedule, 1, start_hour=2),     # overlaps row 2
+            shift(self.staff[2], self.schedule, 3, hours=-1),
+        ]
+        result = bulk_add_shifts(records)
+        self.assertEqual((result["total"], result["created"]), (8, 2))
+        self.assertEqual([r["row"] for r in result["ids"]], [1, 2])
+        errors = {e["row"]: e["error"] for e in result["errors"]}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6, 7, 8])
+        self.assertIn("Staff 999 not found", errors[3])
+        self.assertIn("Schedule 999 not found", errors[4])
+        self.assertIn(f"with shift {existing}", errors[6])
+        self.assertIn("with row 2", errors[7])
+        created = db.session.get(Shift, result["ids"][1]["id"])
+        self.assertEqual((created.staff_id, created.start_time), (self.staff[1], START + timedelta(days=1)))
+
+    def test_queries_do_not_grow_with_the_import(self):
+        records = [shift(self.staff[day % 3], self.schedule, day) for day in range(300)]
+        with record_queries() as stats:
+            result = bulk_add_shifts(records, chunk_size=100)
+        self.assertEqual(result["created"], 300)
+        self.assertEqual(len(set(r["id"] for r in result["ids"])), 300)
+        # staff IN, schedule IN, existing shifts, 3 insert chunks, roster stamp, roster events
+        self.assertLessEqual(stats.count, 8)
+
+    def test_endpoint_accepts_arrays_and_ndjson(self):
+        headers = self.headers()
+        records = [shift(self.staff[0], self.schedule, day) for day in range(3)]
+        response = self.client.post('/addShifts', json=records, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()["created"], 3)
+
+        body = "\n".join(json.dumps(shift(self.staff[1], self.schedule, day)) for day in range(4)) + "\nnot json\n"
+        response = self.client.post('/addShifts', data=body, headers=dict(headers, **{'Content-Type': 'application/x-ndjson'}))
+        self.assertEqual(response.status_code, 201)
+        result = response.get_json()
+        self.assertEqual(result["created"], 4)
+        self.assertEqual(result["errors"], [{"row": 5, "error": "Invalid JSON"}])
+
+        response = self.client.post('/addShifts', json=records, headers=self.headers("import_staff0"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_offset_times_are_stored_like_add_shift_stores_them(self):
+        add_shift(self.admin, self.staff[0], self.schedule, START, START + timedelta(hours=8))
+        records = [
+            {"staff_id": self.staff[1], "schedule_id": self.schedule,
+             "start_time": "2025-09-01T08:00:00+00:00", "end_time": "2025-09-01T16:00:00+00:00"},
+            {"staff_id": self.staff[2], "schedule_id": self.schedule,
+             "start_time": "2025-09-01T08:00:00+02:00", "end_time": "2025-09-01T16:00:00+02:00"},
+        ]
+        response = self.client.post('/addShifts', json=records, headers=self.headers())
+        self.assertEqual(response.status_code, 201)
+        result = response.get_json()
+        self.assertEqual((result["created"], result["errors"]), (2, []))
+        starts = [db.session.get(Shift, r["id"]).start_time for r in result["ids"]]
+        self.assertEqual(starts, [START, START])
+        single = add_shift(self.admin, self.staff[0], self.schedule,
+                           datetime.fromisoformat("2025-09-02T08:00:00+02:00"),
+                           datetime.fromisoformat("2025-09-02T16:00:00+02:00"))
+        self.assertEqual(single.start_time, START + timedelta(days=1))
+
+    def test_parse_rejects_non_arrays(self):
+        self.assertEqual(len(parse_shift_records('{"shifts": [{}, {}]}')), 2)
+        with self.assertRaises(ValueError):
+            parse_shift_records('{"staff_id": 1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
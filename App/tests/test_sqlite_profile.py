@@ -0,0 +1,95 @@
+"""
+Tests for the SQLite engine profile and the group-commit writer queue.
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from App.main import create_app
+from App.database import db, create_db, run_write
+from App.models import Shift
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift
+from App.controllers.staff import clock_in
+
+
+class SQLiteProfileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_sqlite_profile.db',
+            'SQLITE_WRITE_QUEUE': True,
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.queue = self.app.extensions['write_queue']
+        self.admin = create_user("sqlite_admin", "pass", "admin")
+        self.staff = create_user("sqlite_staff", "pass", "staff")
+        self.schedule = create_schedule(self.admin.id, "SQLite")
+
+    def tearDown(self):
+        self.queue.close()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_pragmas_applied_on_connect(self):
+        with db.engine.connect() as connection:
+            self.assertEqual(connection.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(connection.execute(text("PRAGMA synchronous")).scalar(), 1)  # NORMAL
+            self.assertEqual(connection.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+
+    def test_concurrent_punches_are_group_committed(self):
+        start = datetime.now() - timedelta(hours=1)
+        shift_ids = [
+            add_shift(self.admin.id, self.staff.id, self.schedule.id,
+                      start - timedelta(days=day), start - timedelta(days=day) + timedelta(hours=8)).id
+            for day in range(20)
+        ]
+        staff_id = self.staff.id
+        batches_before = self.queue.batches
+
+        def punch(shift_id):
+            with self.app.app_context():
+                return clock_in(staff_id, shift_id).clock_in
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            punched = list(executor.map(punch, shift_ids))
+
+        self.assertTrue(all(punched))
+        self.assertEqual(db.session.scalar(db.select(db.func.count(Shift.id)).where(Shift.clock_in.is_not(None))), 20)
+        self.assertLessEqual(self.queue.batches - batches_before, 20)
+        self.assertEqual(self.queue.stats()["pending"], 0)
+
+    def test_queued_writes_share_commits(self):
+        batches_before = self.queue.batches
+        futures = [
+            self.queue.submit(lambda c: c.execute(text("UPDATE shift SET type = 'day'")).rowcount)
+            for _ in range(50)
+        ]
+        self.assertEqual([f.result() for f in futures], [0] * 50)
+        self.assertLess(self.queue.batches - batches_before, 50)
+
+    def test_failing_write_does_not_sink_batch(self):
+        futures = [
+            self.queue.submit(lambda c: c.execute(text("UPDATE shift SET type = 'night'")).rowcount),
+            self.queue.submit(lambda c: c.execute(text("INSERT INTO missing_table VALUES (1)"))),
+        ]
+        self.assertEqual(futures[0].result(), 0)
+        with self.assertRaises(Exception):
+            futures[1].result()
+
+    def test_run_write_without_queue(self):
+        del self.app.extensions['write_queue']
+        try:
+            count = run_write(lambda c: c.execute(text("SELECT count(*) FROM user")).scalar())
+            self.assertEqual(count, 2)
+        finally:
+            self.app.extensions['write_queue'] = self.queue
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Guards against cold start regressions: optional subsystems and test tooling
+must not be imported unless they are used.
+"""
+import json
+import os
+import subprocess
+import sys
+import unittest
+from App.main import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY_MODULES = ["pytest", "flask_admin", "flask_uploads", "flask_cors", "alembic"]
+
+
+def imported_modules(code, env=None):
+    """Run code in a fresh interpreter and return which HEAVY_MODULES it loaded."""
+    probe = code + "\nimport sys, json\nprint(json.dumps([m for m in %r if m in sys.modules]))" % HEAVY_MODULES
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, **(env or {})}
+    )
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class StartupTests(unittest.TestCase):
+
+    def test_api_worker_skips_optional_subsystems(self):
+        loaded = imported_modules(
+            "from App.main import create_app\n"
+            "create_app({'ENABLE_ADMIN_UI': False, 'ENABLE_UPLOADS': False, 'ENABLE_CORS': False})"
+        )
+        self.assertEqual(loaded, [])
+
+    def test_wsgi_does_not_import_test_tooling(self):
+        loaded = imported_modules("import wsgi", env={"FLASK_ENABLE_ADMIN_UI": "false"})
+        self.assertNotIn("pytest", loaded)
+        self.assertNotIn("alembic", loaded)
+
+    def test_startup_timings_recorded_per_component(self):
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_startup.db',
+            'ENABLE_ADMIN_UI': False,
+        })
+        timings = app.extensions['startup_timings']
+        self.assertIn('database', timings)
+        self.assertIn('uploads', timings)
+        self.assertNotIn('admin_ui', timings)
+        self.assertNotIn('admin', app.blueprints)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Tests for the column-projection read model used by scheduling strategies.
+"""
+import unittest
+from datetime import datetime, timedelta
+from App.main import create_app
+from App.database import db, create_db
+from App.models import Shift
+from App.models.strategies import ShiftRecord, StaffRecord
+from App.controllers.user import create_user
+from App.controllers.admin import create_schedule, add_shift
+from App.controllers.schedule_controller import ScheduleController
+from App.query_profile import record_queries
+
+
+class StrategyRecordTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_strategy_records.db',
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        admin = create_user("records_admin", "pass", "admin")
+        self.staff = [create_user(f"records_staff{i}", "pass", "staff").id for i in range(2)]
+        self.schedule = create_schedule(admin.id, "Records").id
+        other = create_schedule(admin.id, "Other").id
+        start = datetime.now()
+        for i in range(4):
+            add_shift(admin.id, self.staff[0], self.schedule, start + timedelta(days=i), start + timedelta(days=i, hours=8))
+        self.untouched = add_shift(admin.id, self.staff[0], other, start - timedelta(days=1), start - timedelta(hours=16)).id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_strategies_get_records_and_changes_are_written_back(self):
+        with record_queries() as stats:
+            updated = ScheduleController.auto_populate(self.schedule, "even_distribution")
+        self.assertTrue(all(isinstance(shift, ShiftRecord) for shift in updated))
+        self.assertEqual([shift.staff_id for shift in updated], [self.staff[0], self.staff[1]] * 2)
+        # Only the two reassigned shifts are written, in one executemany UPDATE
+        updates = [shape for shape in stats.shapes if shape.startswith("UPDATE shift")]
+        self.assertEqual(len(updates), 1)
+
+        rows = db.session.execute(
+            db.select(Shift.staff_id).where(Shift.schedule_id == self.schedule).order_by(Shift.id)
+        ).scalars().all()
+        self.assertEqual(rows, [self.staff[0], self.staff[1]] * 2)
+        self.assertEqual(db.session.get(Shift, self.untouched).staff_id, self.staff[0])
+
+    def test_nothing_written_when_nothing_changes(self):
+        ScheduleController.auto_populate(self.schedule, "even_distribution")
+        with record_queries() as stats:
+            ScheduleController.auto_populate(self.schedule, "even_distribution")
+        self.assertFalse([shape for shape in stats.shapes if shape.startswith("UPDATE")])
+
+    def test_records_are_lightweight(self):
+        self.assertFalse(hasattr(ShiftRecord(1, 2, "day", None, None), "__dict__"))
+        self.assertEqual(StaffRecord._fields, ("id",))
+
+
+if __name__ == '__main__':
+    unittest.main()
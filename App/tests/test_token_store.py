@@ -0,0 +1,106 @@
+"""
+Tests for the jti-keyed token session and revocation store.
+"""
+import unittest
+from datetime import timedelta
+from sqlalchemy import event
+from flask_jwt_extended import decode_token
+from App.main import create_app
+from App.database import db, create_db
+from App.models import TokenSession
+from App.controllers.user import create_user
+from App.controllers.auth import login, loginCLI, logout
+from App.controllers.token_store import (
+    RevocationCache, active_token_count, prune_expired_tokens, revoke_token, _utcnow
+)
+
+
+class TokenStoreTests(unittest.TestCase):
+    """Sessions live in an indexed table; revocation checks use a memory set."""
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_token_store.db',
+            'JWT_SECRET_KEY': 'test-secret-key'
+        })
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+        self.staff = create_user("token_staff", "pass", "staff")
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def auth(self, token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_login_records_session_per_device(self):
+        first = login("token_staff", "pass")
+        second = loginCLI("token_staff", "pass")["token"]
+        self.assertNotEqual(first, second)
+        self.assertEqual(active_token_count(self.staff.id), 2)
+
+        jti = decode_token(first)["jti"]
+        self.assertIsNotNone(db.session.execute(db.select(TokenSession).filter_by(jti=jti)).scalar_one())
+
+    def test_logout_revokes_only_that_token(self):
+        phone = login("token_staff", "pass")
+        laptop = login("token_staff", "pass")
+
+        response = self.client.get('/api/logout', headers=self.auth(phone))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/identify', headers=self.auth(phone)).status_code, 401)
+        self.assertEqual(self.client.get('/api/identify', headers=self.auth(laptop)).status_code, 200)
+
+    def test_cli_logout_revokes_all_devices(self):
+        login("token_staff", "pass")
+        login("token_staff", "pass")
+        self.assertIn("logged out", logout("token_staff")["message"])
+        self.assertEqual(active_token_count(self.staff.id), 0)
+        self.assertIn("not logged in", logout("token_staff")["message"])
+
+    def test_checks_do_not_query_between_syncs(self):
+        token = login("token_staff", "pass")
+        self.client.get('/api/identify', headers=self.auth(token))
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            self.client.get('/api/identify', headers=self.auth(token))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertFalse([s for s in statements if "token_session" in s])
+
+    def test_sync_picks_up_other_workers_revocations(self):
+        token = login("token_staff", "pass")
+        jti = decode_token(token)["jti"]
+        other_worker = RevocationCache(sync_interval=0)
+        self.assertFalse(other_worker.is_revoked(jti))
+        revoke_token(jti)
+        self.assertTrue(other_worker.is_revoked(jti))
+
+    def test_prune_expired(self):
+        login("token_staff", "pass")
+        db.session.execute(db.update(TokenSession).values(expires_at=_utcnow() - timedelta(minutes=1)))
+        db.session.commit()
+        self.assertEqual(prune_expired_tokens(), 1)
+
+    def test_sync_prunes_without_committing_the_request(self):
+        login("token_staff", "pass")
+        db.session.execute(db.update(TokenSession).values(expires_at=_utcnow() - timedelta(minutes=1)))
+        db.session.commit()
+        self.staff.username = "renamed"
+        with db.session.no_autoflush:
+            RevocationCache(sync_interval=0, prune_interval=0).sync()
+        db.session.rollback()
+        self.assertEqual(self.staff.username, "token_staff")
+        self.assertEqual(db.session.scalar(db.select(db.func.count(TokenSession.id))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Tests for the preload / per-worker warmup lifecycle.
+"""
+import gc
+import unittest
+from App.main import create_app
+from App.database import db, create_db, pool_stats
+from App.warmup import prepare_for_fork, warm_worker
+
+
+class WarmupTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///test_warmup.db',
+            'ENABLE_ADMIN_UI': False,
+            'WARMUP_CONNECTIONS': 3,
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_db()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_prepare_for_fork_compiles_and_disposes(self):
+        try:
+            timings = prepare_for_fork(self.app)
+            self.assertGreater(gc.get_freeze_count(), 0)
+        finally:
+            gc.unfreeze()
+        self.assertEqual(set(timings), {"mappers", "templates"})
+        self.assertEqual(pool_stats()["checked_in"], 0)
+        cached = [name for _, name in self.app.jinja_env.cache.keys()]
+        self.assertIn("layout.html", cached)
+
+    def test_warm_worker_fills_pool(self):
+        timings = warm_worker(self.app)
+        for step in ("mappers", "templates", "connections", "caches", "total"):
+            self.assertIn(step, timings)
+        self.assertEqual(pool_stats()["checked_in"], 3)
+        self.assertIs(self.app.extensions["warmup_timings"], timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,10 +3,15 @@
 from .user import user_views
 from .index import index_views
 from .auth import auth_views
-from .admin import setup_admin
 from .staffView import staff_views
 from .adminView import admin_view
 
 
 views = [user_views, index_views, auth_views, staff_views,admin_view] 
-# blueprints must be added to this list
\ No newline at end of file
+# blueprints must be added to this list
+
+
+def setup_admin(app):
+    # Flask-Admin is heavy to import; only load it when the admin UI is enabled
+    from .admin import setup_admin as _setup_admin
+    return _setup_admin(app)
@@ -1,10 +1,17 @@
+import logging
+import time
+
 from flask_admin.contrib.sqla import ModelView
 from flask_jwt_extended import jwt_required, current_user, unset_jwt_cookies, set_access_cookies
 from flask_admin import Admin
 from flask import flash, redirect, url_for, request
+from sqlalchemy import func, text
+from sqlalchemy.orm import joinedload
 from App.database import db
 from App.models import User, Admin as AdminModel, Staff, Schedule, Shift
 
+logger = logging.getLogger(__name__)
+
 class AdminView(ModelView):
 
     @jwt_required()
@@ -16,10 +23,164 @@ class AdminView(ModelView):
         flash("Login to access admin")
         return redirect(url_for('index_page', next=request.url))
 
+
+def indexed_columns(model):
+    """Names of the columns that are a primary key or lead an index on the model's tables."""
+    names = set()
+    for table in model.__mapper__.tables:
+        for column in table.columns:
+            if column.primary_key or column.index or column.unique:
+                names.add(column.key)
+        for index in table.indexes:
+            names.add(list(index.columns)[0].key)
+    return names
+
+
+def estimated_count(model):
+    """
+    Roughly how many rows the model's table holds, without a COUNT(*) scan:
+    the planner's estimate on PostgreSQL, otherwise the highest id.
+    """
+    table = model.__table__
+    if db.engine.dialect.name == "postgresql":
+        name = db.engine.dialect.identifier_preparer.quote(table.name)
+        estimate = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+            {"name": name},
+        ).scalar()
+        # -1 until the table has been vacuumed or analyzed
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    pk = list(table.primary_key.columns)[0]
+    return db.session.execute(db.select(func.max(pk))).scalar() or 0
+
+
+def _username(view, context, model, name):
+    user = getattr(model, name)
+    return user.username if user else None
+
+
+class LargeTableView(AdminView):
+    """
+    List view for tables too big for COUNT(*) and OFFSET paging: shows an
+    estimated row count, pages by id with an `after` cursor while in the
+    default newest-first order, and only sorts or filters on indexed columns.
+    Relationships shown in the list are eager loaded by get_query().
+    """
+
+    list_template = 'admin/large_list.html'
+    simple_list_pager = True
+    can_set_page_size = False
+    page_size = 50
+    column_default_sort = ('id', True)
+    column_display_pk = True
+    column_auto_select_related = False
+    column_sortable_list = ('id',)
+    column_filters = ()
+    # Seconds to reuse the estimated row count for
+    estimate_ttl = 60
+
+    def __init__(self, model, session, **kwargs):
+        indexed = indexed_columns(model)
+        for attr in ('column_sortable_list', 'column_filters'):
+            columns = getattr(self, attr)
+            unindexed = [c for c in columns if c not in indexed]
+            if unindexed:
+                logger.warning("%s: dropping unindexed %s %s", model.__name__, attr, unindexed)
+                setattr(self, attr, tuple(c for c in columns if c in indexed))
+        self._estimate = (0.0, None)
+        super().__init__(model, session, **kwargs)
+
+    def _keyset_cursor(self):
+        """The id to continue below, when paging in the default order."""
+        if request.args.get('sort') is not None:
+            return None
+        return request.args.get('after', type=int)
+
+    def _get_list_extra_args(self):
+        view_args = super()._get_list_extra_args()
+        # Sorting, searching or filtering starts again from the newest rows
+        view_args.extra_args.pop('after', None)
+        return view_args
+
+    def _apply_pagination(self, query, page, page_size):
+        after = self._keyset_cursor()
+        if after is None:
+            return super()._apply_pagination(query, page, page_size)
+        query = query.filter(self.model.id < after)
+        return query.limit(page_size or self.page_size)
+
+    def estimated_count(self):
+        expires, value = self._estimate
+        if value is None or time.monotonic() > expires:
+            value = estimated_count(self.model)
+            self._estimate = (time.monotonic() + self.estimate_ttl, value)
+        return value
+
+    def older_url(self, data):
+        """Link to the page after the last row shown, keeping the current filters."""
+        if request.args.get('sort') is not None or len(data) < self.page_size:
+            return None
+        args = {k: v for k, v in request.args.items() if k not in ('page', 'after')}
+        return self.get_url('.index_view', after=self.get_pk_value(data[-1]), **args)
+
+    def newest_url(self):
+        if request.args.get('after') is None:
+            return None
+        args = {k: v for k, v in request.args.items() if k not in ('page', 'after')}
+        return self.get_url('.index_view', **args)
+
+
+class UserView(LargeTableView):
+    # Accounts come from the signup API and CLI, which hash the password
+    can_create = False
+    column_list = ('id', 'username', 'role')
+    column_exclude_list = ('password',)
+    column_details_exclude_list = ('password',)
+    column_sortable_list = ('id', 'username')
+    column_filters = ('username',)
+    # The shift and schedule backrefs would render every related row as a select option
+    form_excluded_columns = ('password', 'shifts', 'created_schedules', 'schedules',
+                             'calendar_token_hash', 'roster_changed_at')
+
+
+class ScheduleView(LargeTableView):
+    column_list = ('id', 'name', 'created_at', 'creator', 'strategy_used')
+    column_formatters = {'creator': _username}
+    form_excluded_columns = ('shifts', 'versions')
+    form_ajax_refs = {
+        'creator': {'fields': ('username',), 'page_size': 10},
+        'user': {'fields': ('username',), 'page_size': 10},
+    }
+
+    def get_query(self):
+        return super().get_query().options(joinedload(Schedule.creator).load_only(User.username))
+
+
+class ShiftView(LargeTableView):
+    column_list = ('id', 'staff', 'schedule', 'start_time', 'end_time', 'type', 'clock_in', 'clock_out')
+    column_formatters = {
+        'staff': _username,
+        'schedule': lambda view, context, model, name: model.schedule.name if model.schedule else None,
+    }
+    column_sortable_list = ('id', 'start_time')
+    column_filters = ('staff_id', 'schedule_id', 'start_time')
+    form_ajax_refs = {
+        'staff': {'fields': ('username',), 'page_size': 10},
+        'schedule': {'fields': ('name',), 'page_size': 10},
+    }
+
+    def get_query(self):
+        return super().get_query().options(
+            joinedload(Shift.staff).load_only(User.username),
+            joinedload(Shift.schedule).load_only(Schedule.name),
+        )
+
+
 def setup_admin(app):
     admin = Admin(app, name='FlaskMVC', template_mode='bootstrap3')
-    admin.add_view(AdminView(User, db.session))
-    admin.add_view(AdminView(AdminModel, db.session, name='Admins', endpoint='admins'))
-    admin.add_view(AdminView(Staff, db.session))
-    admin.add_view(AdminView(Schedule, db.session))
-    admin.add_view(AdminView(Shift, db.session))
\ No newline at end of file
+    admin.add_view(UserView(User, db.session))
+    admin.add_view(UserView(AdminModel, db.session, name='Admins', endpoint='admins'))
+    admin.add_view(UserView(Staff, db.session))
+    admin.add_view(ScheduleView(Schedule, db.session))
+    admin.add_view(ShiftView(Shift, db.session))
@@ -1,9 +1,12 @@
 # app/views/admin_views.py
-from flask import Blueprint, jsonify, request
-from datetime import datetime
-from App.controllers import admin
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
+from datetime import datetime, timedelta
+from App.controllers import admin, payroll, shift_import
+from App.controllers.conflicts import ShiftConflictError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError
+from App.compression import compression
+from App.database import read_only
 
 admin_view = Blueprint('admin_view', __name__, template_folder='../templates')
 
@@ -54,6 +57,47 @@ def admin_createSchedule():
     except SQLAlchemyError as e:
         return jsonify({"error": "Database error"}), 500
 
+@admin_view.route('/cloneSchedule', methods=['POST'])
+@jwt_required()
+def admin_cloneSchedule():
+    """
+    Copy a schedule and its shifts with a time offset, e.g. to roll this
+    week's roster forward to next week. Clock-ins are not copied.
+
+    Expected JSON:
+    {
+        "admin_id": int,
+        "schedule_id": int,
+        "offset_days": int (optional, default=7),
+        "offset_hours": int (optional, default=0),
+        "name": str (optional, default="<name> (copy)"),
+        "keep_staff": bool (optional, default=true) - false leaves the copied shifts open
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        admin_id = data.get("admin_id")
+        schedule_id = data.get("schedule_id")
+        if not admin_id or not schedule_id:
+            return jsonify({"error": "admin_id and schedule_id are required"}), 400
+        offset = timedelta(days=int(data.get("offset_days", 7)), hours=int(data.get("offset_hours", 0)))
+        keep_staff = data.get("keep_staff", True)
+        if not isinstance(keep_staff, bool):
+            return jsonify({"error": "keep_staff must be true or false"}), 400
+
+        result = admin.clone_schedule(admin_id, schedule_id, offset, name=data.get("name"), keep_staff=keep_staff)
+        return jsonify(result), 201
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
 @admin_view.route('/addShift', methods=['POST'])
 @jwt_required()
 def admin_add_Shift():
@@ -110,6 +154,49 @@ def admin_add_Shift():
         else:
             return jsonify({"error": "Failed to add shift"}), 500
             
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ShiftConflictError as e:
+        return jsonify({"error": str(e), "conflicts": e.conflicts}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/addShifts', methods=['POST'])
+@jwt_required()
+def admin_add_shifts():
+    """
+    Add many shifts in one transaction, e.g. an import from another rostering
+    system. The admin is the JWT identity.
+
+    Body: a JSON array of shifts (or {"shifts": [...]}), or NDJSON with one
+    shift per line (Content-Type application/x-ndjson or ?format=jsonl):
+    {
+        "staff_id": int,
+        "schedule_id": int,
+        "start_time": str (ISO format),
+        "end_time": str (ISO format),
+        "shift_type": str (optional, default="day")
+    }
+    Returns the created ids by row, and per-row errors.
+    """
+    try:
+        fmt = request.args.get('format')
+        if not fmt:
+            content_type = request.content_type or ''
+            fmt = 'jsonl' if 'ndjson' in content_type or 'jsonl' in content_type else 'json'
+        # NDJSON is read line by line off the request stream
+        body = request.stream if fmt == 'jsonl' else request.get_data(as_text=True)
+        records = shift_import.parse_shift_records(body, fmt)
+
+        result = admin.add_shifts(
+            int(get_jwt_identity()),
+            records,
+            chunk_size=current_app.config['SHIFT_IMPORT_CHUNK_SIZE']
+        )
+        return jsonify(result), 201 if result['created'] else 200
+
     except PermissionError as e:
         return jsonify({"error": str(e)}), 403
     except ValueError as e:
@@ -129,6 +216,9 @@ def admin_auto_populate():
         "schedule_id": int,
         "strategy_name": str ("even_distribution", "minimize_days", or "balance_day_night")
     }
+
+    With PROFILE_ALLOW_HEADER on, an "X-Profile: cprofile,tracemalloc" header
+    adds those captures to the response under "profile".
     """
     try:
         data = request.get_json()
@@ -145,11 +235,19 @@ def admin_auto_populate():
         # Auto-populate schedule
         updated_shifts = admin.auto_populate_schedule(admin_id, schedule_id, strategy_name)
         
-        return jsonify({
+        body = {
             "message": "Schedule auto-populated successfully",
             "strategy_used": strategy_name,
             "shifts_updated": len(updated_shifts) if updated_shifts else 0
-        }), 200
+        }
+        # Phase timings go in Server-Timing; captures, when asked for, in the body
+        profile = g.get("profile")
+        if profile and profile.captures:
+            body["profile"] = profile.summary()
+        response = jsonify(body)
+        if profile:
+            response.headers["Server-Timing"] = profile.server_timing()
+        return response, 200
         
     except PermissionError as e:
         return jsonify({"error": str(e)}), 403
@@ -159,6 +257,7 @@ def admin_auto_populate():
         return jsonify({"error": "Database error"}), 500
     
 @admin_view.route('/scheduleReport', methods=['GET'])
+@read_only
 @jwt_required()
 def scheduleReport():
     """
@@ -191,4 +290,297 @@ def scheduleReport():
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except SQLAlchemyError as e:
-        return jsonify({"error": "Database error"}), 500
\ No newline at end of file
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/schedule/versions', methods=['GET'])
+@read_only
+@jwt_required()
+def scheduleVersions():
+    """
+    List the saved versions of a schedule, oldest first. Auto-populate runs
+    save versions automatically.
+
+    Query Parameters:
+    {
+        "admin_id": int,
+        "schedule_id": int
+    }
+    """
+    try:
+        admin_id = request.args.get('admin_id', type=int)
+        schedule_id = request.args.get('schedule_id', type=int)
+        if not admin_id or not schedule_id:
+            return jsonify({"error": "admin_id and schedule_id are required"}), 400
+
+        return jsonify(admin.list_schedule_versions(admin_id, schedule_id)), 200
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/schedule/versions', methods=['POST'])
+@jwt_required()
+def admin_snapshotSchedule():
+    """
+    Save a schedule's current shifts as a new version. Nothing is saved if
+    they have not changed since the last version.
+
+    Expected JSON:
+    {
+        "admin_id": int,
+        "schedule_id": int,
+        "label": str (optional)
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        admin_id = data.get("admin_id")
+        schedule_id = data.get("schedule_id")
+        if not admin_id or not schedule_id:
+            return jsonify({"error": "admin_id and schedule_id are required"}), 400
+
+        version = admin.snapshot_schedule(admin_id, schedule_id, label=data.get("label"))
+        if version is None:
+            return jsonify({"message": "No changes since the last version"}), 200
+        return jsonify(version.get_json()), 201
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/schedule/versions/diff', methods=['GET'])
+@read_only
+@jwt_required()
+def scheduleVersionDiff():
+    """
+    Show which shifts were added, removed or changed (staff, times or type)
+    between two versions of a schedule.
+
+    Query Parameters:
+    {
+        "admin_id": int,
+        "schedule_id": int,
+        "from": int - version number,
+        "to": int (optional) - version number; the live schedule if omitted
+    }
+    """
+    try:
+        admin_id = request.args.get('admin_id', type=int)
+        schedule_id = request.args.get('schedule_id', type=int)
+        old = request.args.get('from', type=int)
+        if not admin_id or not schedule_id or old is None:
+            return jsonify({"error": "admin_id, schedule_id and from are required"}), 400
+        new = request.args.get('to', type=int)
+
+        return jsonify(admin.diff_schedule_versions(admin_id, schedule_id, old, new)), 200
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/schedule/versions/restore', methods=['POST'])
+@jwt_required()
+def admin_restoreScheduleVersion():
+    """
+    Put a schedule's shifts back to the staff, times and types of an earlier
+    version. The result is saved as a new version.
+
+    Expected JSON:
+    {
+        "admin_id": int,
+        "schedule_id": int,
+        "version": int
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+
+        admin_id = data.get("admin_id")
+        schedule_id = data.get("schedule_id")
+        number = data.get("version")
+        if not admin_id or not schedule_id or not number:
+            return jsonify({"error": "admin_id, schedule_id and version are required"}), 400
+
+        return jsonify(admin.restore_schedule_version(admin_id, schedule_id, int(number))), 200
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/scheduleEvents', methods=['GET'])
+@compression(gzip=1, br=1, zstd=1)
+@jwt_required()
+def scheduleEvents():
+    """
+    Server-sent events for changes to a schedule's shifts: added,
+    reassigned, changed, clocked, removed, and resync when the schedule
+    should be fetched again.
+
+    Query Parameters:
+    {
+        "admin_id": int,
+        "schedule_id": int
+    }
+    """
+    try:
+        admin_id = request.args.get('admin_id', type=int)
+        schedule_id = request.args.get('schedule_id', type=int)
+        if not admin_id or not schedule_id:
+            return jsonify({"error": "admin_id and schedule_id are required"}), 400
+
+        stream = admin.schedule_events(admin_id, schedule_id, request.headers.get('Last-Event-ID', type=int))
+        return Response(stream, mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/shifts/conflicts', methods=['GET'])
+@read_only
+@jwt_required()
+def shiftConflicts():
+    """
+    List pairs of shifts in a schedule that overlap, or leave less than the
+    minimum rest between them, including clashes with the same staff
+    members' shifts in other schedules.
+
+    Query Parameters:
+    {
+        "admin_id": int,
+        "schedule_id": int,
+        "min_rest_hours": float (optional, default SHIFT_MIN_REST_HOURS)
+    }
+    """
+    try:
+        admin_id = request.args.get('admin_id', type=int)
+        schedule_id = request.args.get('schedule_id', type=int)
+        if not admin_id or not schedule_id:
+            return jsonify({"error": "admin_id and schedule_id are required"}), 400
+        min_rest_hours = request.args.get('min_rest_hours', type=float)
+        min_rest = timedelta(hours=min_rest_hours) if min_rest_hours is not None else None
+
+        conflicts = admin.get_schedule_conflicts(admin_id, schedule_id, min_rest)
+        return jsonify({"schedule_id": schedule_id, "count": len(conflicts), "conflicts": conflicts}), 200
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+@admin_view.route('/attendanceReport', methods=['GET'])
+@read_only
+@jwt_required()
+def attendanceReport():
+    """
+    Get lateness, no-show, early leave and overtime figures.
+
+    Query Parameters:
+    {
+        "admin_id": int,
+        "group_by": str (optional, "staff", "schedule" or "day", default="staff"),
+        "start": str (optional, ISO format),
+        "end": str (optional, ISO format),
+        "schedule_id": int (optional),
+        "staff_id": int (optional)
+    }
+    """
+    try:
+        admin_id = request.args.get('admin_id', type=int)
+        if not admin_id:
+            return jsonify({"error": "admin_id is required"}), 400
+
+        start = request.args.get('start')
+        end = request.args.get('end')
+        try:
+            start = datetime.fromisoformat(start) if start else None
+            end = datetime.fromisoformat(end) if end else None
+        except ValueError:
+            return jsonify({"error": "Invalid datetime format. Use ISO format (YYYY-MM-DDTHH:MM:SS)"}), 400
+
+        report = admin.get_attendance_report(
+            admin_id,
+            group_by=request.args.get('group_by', 'staff'),
+            start=start,
+            end=end,
+            schedule_id=request.args.get('schedule_id', type=int),
+            staff_id=request.args.get('staff_id', type=int)
+        )
+        return jsonify(report), 200
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
+
+
+@admin_view.route('/payrollExport', methods=['GET'])
+@read_only
+@jwt_required()
+def payrollExport():
+    """
+    Stream scheduled, worked and overtime hours per staff per pay period.
+
+    Query Parameters:
+    {
+        "admin_id": int,
+        "format": str (optional, "csv" or "jsonl", default="csv"),
+        "period": str (optional, "day", "week" or "month", default="week"),
+        "start": str (optional, ISO format),
+        "end": str (optional, ISO format),
+        "schedule_id": int (optional),
+        "staff_id": int (optional)
+    }
+    """
+    try:
+        admin_id = request.args.get('admin_id', type=int)
+        if not admin_id:
+            return jsonify({"error": "admin_id is required"}), 400
+
+        start = request.args.get('start')
+        end = request.args.get('end')
+        try:
+            start = datetime.fromisoformat(start) if start else None
+            end = datetime.fromisoformat(end) if end else None
+        except ValueError:
+            return jsonify({"error": "Invalid datetime format. Use ISO format (YYYY-MM-DDTHH:MM:SS)"}), 400
+
+        fmt = request.args.get('format', 'csv')
+        chunks = admin.export_payroll(
+            admin_id,
+            fmt=fmt,
+            period=request.args.get('period', 'week'),
+            start=start,
+            end=end,
+            schedule_id=request.args.get('schedule_id', type=int),
+            staff_id=request.args.get('staff_id', type=int)
+        )
+        # stream_with_context keeps the request (and its session) open while rows are fetched
+        response = Response(stream_with_context(chunks), mimetype=payroll.CONTENT_TYPES[fmt])
+        response.headers['Content-Disposition'] = f'attachment; filename="payroll.{fmt}"'
+        return response
+
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": "Database error"}), 500
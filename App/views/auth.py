@@ -1,10 +1,11 @@
 from flask import Blueprint, render_template, jsonify, request, flash, send_from_directory, flash, redirect, url_for
-from flask_jwt_extended import get_jwt_identity, jwt_required, current_user, unset_jwt_cookies, set_access_cookies, create_access_token
+from flask_jwt_extended import get_jwt_identity, get_jwt, jwt_required, current_user, unset_jwt_cookies, set_access_cookies, create_access_token
 from App.models import User
 from App.database import db
 import App.controllers.auth as auth
 import App.controllers.user as userr
 from App.controllers.auth import login
+from App.controllers.token_store import revoke_token
 
 from.index import index_views 
 
@@ -61,8 +62,6 @@ def user_login_api():
     return jsonify(message='bad username or password given'), 401
   
   response = jsonify(access_token=token) 
-  user.active_token = token
-  db.session.commit()
   set_access_cookies(response, token)
   return response
 
@@ -76,17 +75,13 @@ def identify_user():
 @auth_views.route('/api/logout', methods=['GET'])
 @jwt_required()
 def logout_api():
-    userid = get_jwt_identity()
-    user = User.query.get(userid)
+    user = current_user
     if not user:
         return {"message": "User not found"}
 
-    if not user.active_token:
+    if not revoke_token(get_jwt()["jti"]):
         return {"message": f"User '{user.username}' is not logged in"}
 
-    user.active_token = None
-    db.session.commit()
-
     response = jsonify(message=f"User '{user.username}' logged out successfully")
     unset_jwt_cookies(response)
     return response
\ No newline at end of file
@@ -1,5 +1,7 @@
-from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify
+from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify, current_app, Response
 from App.controllers import create_user, initialize
+from App.database import pool_stats
+from App.metrics import render_prometheus
 
 index_views = Blueprint('index_views', __name__, template_folder='../templates')
 
@@ -14,7 +16,15 @@ def init():
 
 @index_views.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status':'healthy'})
+    return jsonify({
+        'status': 'healthy',
+        'pool': pool_stats(),
+        'warmup': current_app.extensions.get('warmup_timings')
+    })
+
+@index_views.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @index_views.route('/admin/dashboard', methods=['GET'])
 def admin_dashboard():
@@ -1,8 +1,12 @@
 # app/views/staff_views.py
-from flask import Blueprint, jsonify, request
-from App.controllers import staff, user
+from flask import Blueprint, Response, jsonify, request, url_for
+from werkzeug.http import is_resource_modified
+from App.controllers import calendar, roster_events, staff, user
+from App.controllers.identity import resolve_identity
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError
+from App.compression import compression
+from App.database import read_only
 
 staff_views = Blueprint('staff_views', __name__, template_folder='../templates')
 
@@ -14,6 +18,7 @@ staff_views = Blueprint('staff_views', __name__, template_folder='../templates')
 # 4. Clock out from shift
 
 @staff_views.route("/allshifts", methods=['GET'])
+@read_only
 @jwt_required()
 def get_all_shifts():
     try:    
@@ -31,6 +36,7 @@ def get_all_shifts():
         return jsonify({"error": "Database error"}), 500
 
 @staff_views.route('/staffshift', methods=['GET'])
+@read_only
 @jwt_required()
 def staff_get_shift():
     try:
@@ -56,6 +62,7 @@ def staff_get_shift():
 
 
 @staff_views.route('/staff/combinedRoster', methods=['GET'])
+@read_only
 @jwt_required()
 def get_combinedRoster():
     """
@@ -135,6 +142,7 @@ def staff_clock_out():
         return jsonify({"error": "Database error"}), 500
 
 @staff_views.route("/staff/mySchedules", methods=["GET"])
+@read_only
 @jwt_required()
 def get_my_schedules():
     """
@@ -156,7 +164,7 @@ def get_my_schedules():
         staff_id = int(staff_id)
         
         # Get staff member
-        staff_member = user.get_user(staff_id)
+        staff_member = resolve_identity(staff_id)
         
         if not staff_member or staff_member.role != "staff":
             return jsonify({"error": "Staff member not found"}), 404
@@ -175,24 +183,71 @@ def get_my_schedules():
         return jsonify({"error": "Database error"}), 500
 
 
+@staff_views.route("/staff/rosterEvents", methods=["GET"])
+# Small, frequent messages each flushed on their own: the fastest levels do as well
+@compression(gzip=1, br=1, zstd=1)
+@jwt_required()
+def staff_roster_events():
+    """
+    Server-sent events for changes to the staff member's shifts: added,
+    removed (including reassigned to someone else), changed, clocked, and
+    resync when the roster should be fetched again. Browsers reconnect with
+    Last-Event-ID and get the events they missed.
+    """
+    try:
+        staff_id = int(get_jwt_identity())
+        staff._assert_staff(staff_id)
+        stream = roster_events.open_stream(("staff", staff_id), request.headers.get("Last-Event-ID", type=int))
+        return Response(stream, mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except SQLAlchemyError:
+        return jsonify({"error": "Database error"}), 500
 
 
+@staff_views.route("/staff/calendarToken", methods=["POST"])
+@jwt_required()
+def issue_calendar_token():
+    """
+    Issue the staff member a calendar feed URL to subscribe to from their
+    phone. Issuing a new one revokes the previous URL.
+    """
+    try:
+        staff_id = int(get_jwt_identity())
+        token = calendar.issue_calendar_token(staff_id)
+        return jsonify({
+            "token": token,
+            "url": url_for("staff_views.staff_calendar", token=token, _external=True),
+        }), 201
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except SQLAlchemyError:
+        return jsonify({"error": "Database error"}), 500
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+@staff_views.route("/staff/calendar/<token>.ics", methods=["GET"])
+@read_only
+def staff_calendar(token):
+    """
+    The staff member's shifts as an iCalendar feed. Calendar apps can't send
+    a JWT, so the secret in the URL authenticates; they revalidate with
+    If-None-Match / If-Modified-Since and get a 304 until a shift changes.
+    """
+    try:
+        feed = calendar.calendar_feed(token)
+        if feed is None:
+            return jsonify({"error": "Calendar not found"}), 404
+        etag, last_modified, render = feed
+        response = Response(mimetype="text/calendar")
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response.status_code = 304
+            return response
+        response.set_data(render())
+        return response
+    except SQLAlchemyError:
+        return jsonify({"error": "Database error"}), 500
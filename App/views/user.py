@@ -1,12 +1,15 @@
-from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
+from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for, current_app
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
 
 from.index import index_views
+from App.database import read_only
 
 from App.controllers import (
     create_user,
     get_all_users,
     get_all_users_json,
+    bulk_import_users,
+    parse_user_records,
 )
 
 user_views = Blueprint('user_views', __name__, template_folder='../templates')
@@ -24,6 +27,7 @@ def create_user_action():
     return redirect(url_for('user_views.get_user_page'))
 
 @user_views.route('/api/users', methods=['GET'])
+@read_only
 def get_users_action():
     users = get_all_users_json()
     return jsonify(users)
@@ -34,6 +38,35 @@ def create_user_endpoint():
     user = create_user(data['username'], data['password'], data['role']) 
     return jsonify({'message': f"user {user.username} created with id {user.id}"}), 201
 
+@user_views.route('/api/users/import', methods=['POST'])
+@jwt_required()
+def import_users_endpoint():
+    """
+    Bulk create users from a CSV (username,password,role header) or JSONL
+    upload, sent either as the 'file' form field or as the raw request body.
+    """
+    if not jwt_current_user or jwt_current_user.role != "admin":
+        return jsonify({"error": "Only admins can import users"}), 403
+
+    upload = request.files.get('file')
+    body = upload.read().decode('utf-8') if upload else request.get_data(as_text=True)
+    fmt = request.args.get('format')
+    if not fmt:
+        name = upload.filename if upload else ''
+        fmt = 'jsonl' if name.endswith('.jsonl') or 'ndjson' in (request.content_type or '') else 'csv'
+
+    try:
+        records = parse_user_records(body, fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = bulk_import_users(
+        records,
+        chunk_size=current_app.config['USER_IMPORT_CHUNK_SIZE'],
+        workers=current_app.config['USER_IMPORT_WORKERS']
+    )
+    return jsonify(result), 201 if result['created'] else 200
+
 @user_views.route('/static/users', methods=['GET'])
 def static_user_page():
   return send_from_directory('static', 'static-user.html')
\ No newline at end of file
@@ -0,0 +1,86 @@
+import gc
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+
+from App.database import db
+
+
+def _timed(timings, name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[name] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def _compile_templates(app):
+    compiled = 0
+    for name in app.jinja_env.list_templates(filter_func=lambda n: n.endswith(".html")):
+        app.jinja_env.get_template(name)
+        compiled += 1
+    return compiled
+
+
+def _open_connections(app):
+    """Check out up to WARMUP_CONNECTIONS connections at once, then return them to the pool."""
+    wanted = app.config["WARMUP_CONNECTIONS"]
+    size = getattr(db.engine.pool, "size", lambda: wanted)()
+    connections = []
+    try:
+        for _ in range(min(wanted, size)):
+            connection = db.engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def _prime_caches(app):
+    from App.controllers.token_store import _revocations
+    try:
+        _revocations().sync()
+    except SQLAlchemyError:
+        # Tables may not exist yet on a fresh database
+        db.session.rollback()
+        return False
+    finally:
+        db.session.remove()
+    return True
+
+
+def prepare_for_fork(app):
+    """
+    Run in the gunicorn master when the app is preloaded: do the one-off work
+    every worker would otherwise repeat, then freeze the heap so the garbage
+    collector doesn't touch (and un-share) those pages in the children.
+    """
+    timings = {}
+    with app.app_context():
+        _timed(timings, "mappers", configure_mappers)
+        _timed(timings, "templates", _compile_templates, app)
+        # Connections must never be shared across a fork
+        db.engine.dispose()
+    gc.freeze()
+    app.extensions["preload_timings"] = timings
+    return timings
+
+
+def warm_worker(app):
+    """Per-worker warmup after fork: pool connections, mappers, templates and caches."""
+    timings = {}
+    start = time.perf_counter()
+    with app.app_context():
+        # Drop any pool state inherited from the master without closing its sockets
+        db.engine.dispose(close=False)
+        _timed(timings, "mappers", configure_mappers)
+        _timed(timings, "templates", _compile_templates, app)
+        _timed(timings, "connections", _open_connections, app)
+        _timed(timings, "caches", _prime_caches, app)
+    timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+    app.extensions["warmup_timings"] = timings
+    app.logger.info("Worker warmed up in %.2f ms: %s", timings["total"], timings)
+    return timings
@@ -1,4 +1,15 @@
 # gunicorn_config.py
+import os
+
+# Build the app once in the master and fork it into the workers: opt in with
+# GUNICORN_PRELOAD=true. The app's engine, locks and threads would then be
+# built in the master before the gevent workers monkey-patch, so patch the
+# master here first, before anything else is imported.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+if preload_app:
+    from gevent import monkey
+    monkey.patch_all()
+
 import multiprocessing
 
 # The socket to bind.
@@ -11,9 +22,43 @@ workers = 4
 # Use the 'gevent' worker type for async performance.
 worker_class = 'gevent'
 
+# Open roster event streams are idle greenlets that hold no database
+# connection, so each worker can keep thousands of them
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 5000))
+
 # Log level
 loglevel = 'info'
 
 # Where to log to
 accesslog = '-'  # '-' means log to stdout
-errorlog = '-'  # '-' means log to stderr
\ No newline at end of file
+errorlog = '-'  # '-' means log to stderr
+
+# Workers handle each request in its own greenlet with its own app context
+# and database session, so don't push a process-wide app context at import
+# Workers share request metrics through snapshot files in a directory of
+# their own under METRICS_DIR
+metrics_dir = os.path.join(os.environ.get('METRICS_DIR', '/tmp'), 'agileminds-metrics')
+raw_env = ['FLASK_PUSH_APP_CONTEXT=false', f'FLASK_METRICS_DIR={metrics_dir}']
+
+def on_starting(server):
+    # Start every deploy with empty counters, deleting only the snapshots
+    from App.metrics import clear_snapshots
+    clear_snapshots(metrics_dir)
+
+def when_ready(server):
+    # With preload_app the app is already loaded in the master here
+    if preload_app:
+        from App.warmup import prepare_for_fork
+        timings = prepare_for_fork(server.app.wsgi())
+        server.log.info("Preloaded app prepared for fork: %s", timings)
+
+def post_fork(server, worker):
+    # Let psycopg2 yield to other greenlets while waiting on Postgres
+    from App.database import make_psycopg_green
+    if make_psycopg_green():
+        server.log.info("psycopg2 patched for gevent in worker %s", worker.pid)
+
+def post_worker_init(worker):
+    from App.warmup import warm_worker
+    timings = warm_worker(worker.wsgi)
+    worker.log.info("Worker %s warmed up in %.2f ms", worker.pid, timings["total"])
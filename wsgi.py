@@ -1,4 +1,4 @@
-import click, pytest, sys, os
+import click, sys, os
 from flask.cli import with_appcontext, AppGroup
 from datetime import datetime
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
@@ -12,13 +12,49 @@ from App.controllers import (
 )
 
 app = create_app()
-migrate = get_migrate(app)
+# Flask-Migrate (and alembic) is only needed for `flask db`, not in workers
+migrate = get_migrate(app) if os.environ.get("FLASK_RUN_FROM_CLI") == "true" else None
 
 @app.cli.command("init", help="Creates and initializes the database")
 def init():
     initialize()
     print('database intialized')
 
+@app.cli.command("seed", help="Generates a large synthetic organization for benchmarking")
+@click.option("--staff", default=1000, show_default=True, help="Staff members to create")
+@click.option("--schedules", default=10, show_default=True, help="Schedules to create")
+@click.option("--shifts", default=50000, show_default=True, help="Shifts to spread across staff and schedules")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="First day of the date range (default: half the range before today)")
+@click.option("--days", default=28, show_default=True, help="Length of the date range in days")
+@click.option("--night-ratio", default=0.3, show_default=True, help="Share of night shifts")
+@click.option("--late-rate", default=0.1, show_default=True, help="Share of past shifts clocked in late")
+@click.option("--no-show-rate", default=0.03, show_default=True, help="Share of past shifts never clocked")
+@click.option("--distribution", type=click.Choice(["uniform", "skewed"]), default="uniform", show_default=True, help="How shifts are spread across staff")
+@click.option("--password", default="staffpass", show_default=True, help="Password for every seeded account")
+@click.option("--prefix", default="seed", show_default=True, help="Username prefix for seeded accounts")
+@click.option("--seed", "random_seed", type=int, default=None, help="Random seed for a reproducible dataset")
+@click.option("--reset", is_flag=True, help="Drop and recreate all tables first")
+def seed_command(staff, schedules, shifts, start, days, night_ratio, late_rate, no_show_rate,
+                 distribution, password, prefix, random_seed, reset):
+    from App.controllers.seed import seed_organization
+    if reset:
+        db.drop_all()
+        db.create_all()
+    def progress(done, total):
+        print(f"\r  {done}/{total} shifts", end="", flush=True)
+    try:
+        result = seed_organization(
+            staff=staff, schedules=schedules, shifts=shifts, start=start, days=days,
+            night_ratio=night_ratio, late_rate=late_rate, no_show_rate=no_show_rate,
+            distribution=distribution, password=password, prefix=prefix, seed=random_seed,
+            progress=progress
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print()
+    print(f"🌱 Seeded {result['staff']} staff, {result['schedules']} schedules and {result['shifts']} shifts "
+          f"in {result['timings']['total']:.2f}s (admin login: {result['admin']} / {password})")
+
 auth_cli = AppGroup('auth', help='Authentication commands')
 
 @auth_cli.command("login", help="Login and get JWT token")
@@ -42,6 +78,11 @@ def logout_command(username):
     if os.path.exists("active_token.txt"):
         os.remove("active_token.txt")
     print(result["message"])
+
+@auth_cli.command("prune", help="Delete expired token sessions")
+def prune_tokens_command():
+    from App.controllers.token_store import prune_expired_tokens
+    print(f"🧹 {prune_expired_tokens()} expired token session(s) removed")
     
 app.cli.add_command(auth_cli)
 
@@ -56,6 +97,21 @@ def create_user_command(username, password, role):
     create_user(username, password, role)
     print(f'{username} created!')
 
+@user_cli.command("import", help="Bulk creates users from a CSV or JSONL file")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default=None)
+@click.option("--chunk-size", default=500, show_default=True)
+@click.option("--workers", type=int, default=None, help="Hashing processes (default: all cores)")
+def import_users_command(path, fmt, chunk_size, workers):
+    from App.controllers import bulk_import_users, parse_user_records
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, encoding="utf-8") as f:
+        records = parse_user_records(f.read(), fmt)
+    result = bulk_import_users(records, chunk_size=chunk_size, workers=workers)
+    print(f"✅ {result['created']} of {result['total']} users created")
+    for error in result["errors"]:
+        print(f"⚠️ row {error['row']}: {error['error']}")
+
 @user_cli.command("list", help="Lists users in the database")
 @click.argument("format", default="string")
 def list_user_command(format):
@@ -200,6 +256,23 @@ def view_schedule_command(schedule_id):
         print(f"✅ Viewing schedule {schedule_id}:")
         print(schedule.get_json())
 
+@schedule_cli.command("clone", help="Copy a schedule and its shifts, moved forward by an offset")
+@click.argument("schedule_id", type=int)
+@click.option("--days", default=7, show_default=True, help="Days to move the copied shifts by")
+@click.option("--hours", default=0, show_default=True, help="Extra hours to move the copied shifts by")
+@click.option("--name", default=None, help="Name of the copy (default: '<name> (copy)')")
+@click.option("--keep-staff/--no-staff", default=True, show_default=True, help="Keep or clear staff assignments")
+def clone_schedule_command(schedule_id, days, hours, name, keep_staff):
+    from datetime import timedelta
+    from App.controllers import clone_schedule
+    admin = require_admin_login()
+    try:
+        result = clone_schedule(admin.id, schedule_id, timedelta(days=days, hours=hours), name=name, keep_staff=keep_staff)
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        return
+    print(f"✅ Schedule {schedule_id} cloned to {result['schedule_id']} ({result['shifts']} shifts)")
+
 app.cli.add_command(schedule_cli)
 '''
 Test Commands
@@ -209,6 +282,7 @@ test = AppGroup('test', help='Testing commands')
 @test.command("user", help="Run User tests")
 @click.argument("type", default="all")
 def user_tests_command(type):
+    import pytest
     if type == "unit":
         sys.exit(pytest.main(["-k", "UserUnitTests"]))
     elif type == "int":
@@ -217,3 +291,140 @@ def user_tests_command(type):
         sys.exit(pytest.main(["-k", "App"]))
     
 app.cli.add_command(test)
+
+profile_cli = AppGroup('profile', help='Performance profiling commands')
+
+@profile_cli.command("startup", help="Report import and initialization time per component")
+@click.option("--top", default=15, show_default=True, help="Number of slowest imports to show")
+def profile_startup_command(top):
+    import subprocess
+    # Run in a fresh interpreter so nothing is already imported
+    code = (
+        "import json, sys\n"
+        "from App.main import create_app\n"
+        "app = create_app()\n"
+        "print(json.dumps(app.extensions['startup_timings']))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env={**os.environ, "FLASK_STARTUP_PROFILE": "false"}
+    )
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    print("⏱️ Import time per package:")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"  {package:<40} {self_us / 1000:8.2f} ms")
+    print("⏱️ create_app components:")
+    import json
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    for name, ms in sorted(timings.items(), key=lambda t: -t[1]):
+        print(f"  {name:<40} {ms:8.2f} ms")
+
+app.cli.add_command(profile_cli)
+
+
+payroll_cli = AppGroup('payroll', help='Payroll commands')
+
+@payroll_cli.command("export", help="Write worked, scheduled and overtime hours per staff per pay period to a file")
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@click.option("--start", type=click.DateTime(), default=None, help="First shift start to include")
+@click.option("--end", type=click.DateTime(), default=None, help="Shift starts before this are included")
+@click.option("--period", type=click.Choice(["day", "week", "month"]), default="week", show_default=True)
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default=None, help="Default: from the file extension")
+@click.option("--staff-id", type=int, default=None)
+@click.option("--schedule-id", type=int, default=None)
+@click.option("--batch-size", default=5000, show_default=True, help="Rows fetched from the cursor at a time")
+def payroll_export_command(output, start, end, period, fmt, staff_id, schedule_id, batch_size):
+    import time
+    from App.controllers import payroll_rows, encode_payroll
+    fmt = fmt or ("jsonl" if output.endswith((".jsonl", ".ndjson")) else "csv")
+    began = time.perf_counter()
+    written = 0
+    def counted(rows):
+        nonlocal written
+        for row in rows:
+            written += 1
+            yield row
+    try:
+        rows = payroll_rows(start, end, period, staff_id=staff_id, schedule_id=schedule_id, batch_size=batch_size)
+        chunks = encode_payroll(counted(rows), fmt)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    print(f"💰 {written} staff-period rows written to {output} in {time.perf_counter() - began:.2f}s")
+
+app.cli.add_command(payroll_cli)
+
+
+loadtest_cli = AppGroup('loadtest', help='Load testing commands')
+
+@loadtest_cli.command("run", help="Replay weighted scenarios from the Postman collection and report latency per endpoint")
+@click.option("--url", default=None, help="Target a running server that uses this app's database instead of a local one")
+@click.option("--users", default=8, show_default=True, help="Concurrent virtual users")
+@click.option("--iterations", default=20, show_default=True, help="Scenarios run by each virtual user")
+@click.option("--seed", default=1, show_default=True, help="Seed for the data and the scenario mix")
+@click.option("--staff", default=40, show_default=True, help="Staff members to seed")
+@click.option("--output", "-o", type=click.Path(dir_okay=False), default=None, help="Write the JSON report here")
+def loadtest_run_command(url, users, iterations, seed, staff, output):
+    import json, tempfile
+    from contextlib import nullcontext
+    from App.loadtest import local_server, run_load, seed_database
+    if url:
+        seeded = seed_database(staff=staff, seed=seed)
+        server = nullcontext(url)
+    else:
+        # A throwaway database so the dev data is left alone, and no debug
+        # mode so the numbers are closer to production
+        path = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "load.db")
+        target = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "PUSH_APP_CONTEXT": False, "DEBUG": False})
+        with target.app_context():
+            db.create_all()
+            seeded = seed_database(staff=staff, seed=seed)
+        server = local_server(target)
+    with server as base_url:
+        print(f"🚀 {users} users x {iterations} scenarios against {base_url}")
+        report = run_load(base_url, seeded, users=users, iterations=iterations, seed=seed)
+    totals = report["totals"]
+    for endpoint, row in report["endpoints"].items():
+        print(f"  {endpoint:<32} {row['requests']:>6} req  p50 {row['p50_ms']:>8} ms  "
+              f"p95 {row['p95_ms']:>8} ms  p99 {row['p99_ms']:>8} ms  errors {row['error_rate']:.1%}")
+    print(f"📊 {totals['requests']} requests, {totals['throughput_rps']} req/s, "
+          f"p95 {totals['p95_ms']} ms, errors {totals['error_rate']:.1%}")
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"📝 Report written to {output}")
+
+@loadtest_cli.command("compare", help="Compare two load test reports per endpoint")
+@click.argument("old", type=click.File())
+@click.argument("new", type=click.File())
+def loadtest_compare_command(old, new):
+    import json
+    from App.loadtest import compare_reports
+    for endpoint, row in compare_reports(json.load(old), json.load(new)).items():
+        deltas = "  ".join(f"{key[:-3]} {value['old']} -> {value['new']} ({value['change_pct']:+}%)"
+                           for key, value in row.items() if key.endswith("_ms"))
+        print(f"  {endpoint:<32} {deltas}")
+
+app.cli.add_command(loadtest_cli)
+
+
+assets_cli = AppGroup('assets', help='Static asset commands')
+
+@assets_cli.command("build", help="Write content-hashed, pre-compressed copies of the static files")
+@click.option("--output", "-o", type=click.Path(file_okay=False), default=None, help="Default: ASSETS_BUILD_DIR, or App/static/dist")
+def assets_build_command(output):
+    from App.assets import BUILD_PREFIX, build_assets
+    output = output or app.config['ASSETS_BUILD_DIR'] or os.path.join(app.static_folder, BUILD_PREFIX)
+    totals = build_assets(app.static_folder, output)
+    compressed = ", ".join(f"{name[:-6]} {totals[name] / 1024:.1f} KiB" for name in ("gzip_bytes", "br_bytes") if totals[name])
+    print(f"📦 {totals['files']} files ({totals['bytes'] / 1024:.1f} KiB; {compressed or 'none compressed'}) written to {output}")
+
+app.cli.add_command(assets_cli)